@@ -1,6 +1,8 @@
 import os, random, cv2
 import numpy as np
 
+from tesstrain.boxfile import line_boxes, symbol_boxes, write_box_file
+
 SYMBOL_MAP = {
 	"res": "A",
 	"cap": "B",
@@ -150,31 +152,23 @@ def generate_toolbar_files(image_folder, tiff_folder, jpg_folder,
 		# .box és .gt.txt
 		box_path = os.path.join(tiff_folder, f"toolbar_{idx}.box")
 		gt_path = os.path.join(tiff_folder, f"toolbar_{idx}.gt.txt")
-		with open(box_path, "w", encoding="utf-8") as box_file, \
-			 open(gt_path, "w", encoding="utf-8") as gt_file:
-
-			x_offset = 0
-			labels_out = []
-			for img, lbl in line_imgs_resized:
-				h, w = img.shape[:2]
-				labels_out.append(lbl)
-
-				if use_char_boxes:
-					# szimbólumonkénti bounding box
-					box_file.write(f"{lbl} {x_offset} 0 {x_offset+w} {h} 0\n")
-
-				x_offset += w
+		labels_out = [lbl for _, lbl in line_imgs_resized]
+		if use_char_boxes:
+			# szimbólumonkénti bounding box
+			boxes = symbol_boxes(
+				labels_out,
+				[img.shape[1] for img, _ in line_imgs_resized],
+				[img.shape[0] for img, _ in line_imgs_resized],
+			)
+		else:
+			# minden karakter külön sorban, de a teljes sor befoglaló méretével
+			boxes = line_boxes(labels_out, aug_row.shape[1], aug_row.shape[0], end_line=False)
+		write_box_file(box_path, boxes)
 
+		with open(gt_path, "w", encoding="utf-8") as gt_file:
 			gt_string = "".join(labels_out)
 			gt_file.write(gt_string + "\n")
 
-			if not use_char_boxes:
-				# minden karakter külön sorban, de a teljes sor befoglaló méretével
-				total_w = aug_row.shape[1]
-				total_h = aug_row.shape[0]
-				for lbl in labels_out:
-					box_file.write(f"{lbl} 0 0 {total_w} {total_h} 0\n")
-
 	print(f"[INFO] {num_files} sor generálva: {tiff_folder} (TIFF/BOX/GT) és {jpg_folder} (JPG).")
 
 if __name__ == "__main__":
@@ -2,6 +2,8 @@ import os, random, cv2, unicodedata
 from PIL import Image
 import numpy as np
 
+from tesstrain.boxfile import line_boxes, symbol_boxes, write_box_file
+
 # --- Symbol mapping (Latin letters only) ---
 # Each component name is mapped to a unique Latin letter.
 SYMBOL_MAP = {
@@ -82,23 +84,16 @@ def generate_toolbar_files(image_folder, tiff_folder, jpg_folder,
 
         # --- Save BOX file ---
         w, h = toolbar_gray.size
-        box_lines = []
 
         if use_char_boxes:
-            # Character-level bounding boxes
-            x_offset = 0
-            for ch, im in zip(textline, imgs):
-                cw, ch_h = im.size
-                # Coordinates: left, bottom, right, top
-                # Note: Tesseract uses bottom-left origin
-                box_lines.append(f"{ch} {x_offset} 0 {x_offset+cw} {ch_h} 0")
-                x_offset += cw
+            # Character-level bounding boxes, side by side from the left edge
+            # Note: Tesseract uses bottom-left origin
+            boxes = symbol_boxes(textline, widths, heights)
         else:
             # Line-level boxes (whole image for each character)
-            box_lines = [f"{ch} 0 0 {w} {h} 0" for ch in textline]
+            boxes = line_boxes(textline, w, h, end_line=False)
 
-        with open(box_path, "w", encoding="utf-8") as f:
-            f.write("\n".join(box_lines) + "\n")
+        write_box_file(box_path, boxes)
 
         # --- Save JPG preview (RGB) ---
         jpg_path = os.path.join(jpg_folder, base + ".jpg")
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+
+"""
+Create the box files of many line images in one invocation.
+
+Instead of starting a box file script once per ground truth line, this loads
+the `create_boxes` function of the script once per worker process and runs it
+for every `.gt.txt` file whose `.box` file is missing or older than the
+ground truth text or the line image, like the `%.box` rules of the Makefile.
+The box files are the same as those written by the script itself.
+"""
+
+import argparse
+import concurrent.futures
+import functools
+import importlib
+import os
+import pathlib
+import sys
+
+from gt_index import GT_SUFFIX, IMAGE_SUFFIXES, update_index
+
+# Box files created by a worker process per batch.
+CHUNK_SIZE = 64
+
+
+def find_gt_files(sources, index=None):
+    """
+    Generate the ground truth files in the directories, `.gt.txt` files and
+    file lists (one path per line, `-` for standard input) of `sources`.
+
+    With the index file `index` (see gt_index.py), directories are listed
+    from the index, which is updated first.
+    """
+    for source in sources:
+        if os.path.isdir(source) and index:
+            yield from sorted(update_index(index, source))
+        elif os.path.isdir(source):
+            # Follow symbolic links like `find -L` in the Makefile.
+            for root, dirs, files in os.walk(source, followlinks=True):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.endswith(GT_SUFFIX):
+                        yield os.path.join(root, name)
+        elif source.endswith(GT_SUFFIX):
+            yield source
+        else:
+            with open(source if source != '-' else 0, encoding='utf-8') as f:
+                yield from (line.strip() for line in f if line.strip())
+
+
+def find_image(stem):
+    """
+    Return the line image of the ground truth file `<stem>.gt.txt`, or None.
+    """
+    for suffix in IMAGE_SUFFIXES:
+        if os.path.exists(stem + suffix):
+            return stem + suffix
+    return None
+
+
+def is_up_to_date(box_file, *inputs):
+    """
+    Return whether `box_file` exists and is not older than any of `inputs`.
+    """
+    try:
+        box_mtime = os.stat(box_file).st_mtime_ns
+    except FileNotFoundError:
+        return False
+    return all(os.stat(path).st_mtime_ns <= box_mtime for path in inputs)
+
+
+def box_jobs(gt_files, force=False):
+    """
+    Return the `(image, gt file, box file)` triples of the box files to
+    create, and the ground truth files without a line image.
+    """
+    jobs = []
+    missing = []
+    for gt_file in gt_files:
+        stem = gt_file[: -len(GT_SUFFIX)]
+        image = find_image(stem)
+        if image is None:
+            missing.append(gt_file)
+            continue
+        box_file = stem + '.box'
+        if force or not is_up_to_date(box_file, image, gt_file):
+            jobs.append((image, gt_file, box_file))
+    return jobs, missing
+
+
+@functools.lru_cache(maxsize=None)
+def load_generator(script):
+    """
+    Import the box file script `script`, a file name or module name.
+    """
+    path = pathlib.Path(script)
+    if path.suffix == '.py':
+        sys.path.insert(0, str(path.resolve().parent))
+    return importlib.import_module(path.stem)
+
+
+def write_box_file(script, job):
+    """
+    Create one box file with the `create_boxes` function of `script`.
+
+    Returns the box file and None, or an error message if it failed or
+    produced an invalid box. The box file is replaced atomically, so an
+    interrupted run never leaves a partial box file which looks up to date.
+    """
+    image, gt_file, box_file = job
+    tmp_file = box_file + '.tmp'
+    try:
+        boxes = load_generator(script).create_boxes(image, gt_file)
+        problems = boxes.check() if boxes is not None else []
+        if problems:
+            index, problem = problems[0]
+            raise ValueError(f'box {index + 1}: {problem}')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            if boxes is not None:
+                boxes.write(f)
+        os.replace(tmp_file, box_file)
+    except Exception as e:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        return box_file, f'{type(e).__name__}: {e}'
+    return box_file, None
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(
+        description=(
+            'Create all missing or outdated box files of the given ground '
+            'truth with a pool of worker processes.'
+        )
+    )
+    arg_parser.add_argument(
+        'sources',
+        nargs='+',
+        metavar='SOURCE',
+        help=(
+            'ground truth directory, .gt.txt file, or file listing .gt.txt '
+            'files (- for standard input)'
+        ),
+    )
+    arg_parser.add_argument(
+        '-g',
+        '--generator',
+        default='generate_line_box.py',
+        help='box file script to use (default: %(default)s)',
+    )
+    arg_parser.add_argument(
+        '-j',
+        '--jobs',
+        type=int,
+        default=os.cpu_count(),
+        help='number of worker processes (default: number of CPUs)',
+    )
+    arg_parser.add_argument(
+        '-i',
+        '--index',
+        help='index of the ground truth directory to update and read',
+    )
+    arg_parser.add_argument(
+        '-f',
+        '--force',
+        action='store_true',
+        help='also recreate box files which are up to date',
+    )
+    args = arg_parser.parse_args()
+
+    if not hasattr(load_generator(args.generator), 'create_boxes'):
+        arg_parser.error(f'{args.generator} has no create_boxes function')
+
+    jobs, missing = box_jobs(
+        find_gt_files(args.sources, args.index), args.force
+    )
+    for gt_file in missing:
+        print(f'WARNING: no line image for {gt_file}', file=sys.stderr)
+
+    failed = 0
+    if jobs:
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=max(1, args.jobs)
+        ) as executor:
+            results = executor.map(
+                functools.partial(write_box_file, args.generator),
+                jobs,
+                chunksize=CHUNK_SIZE,
+            )
+            for box_file, error in results:
+                if error:
+                    failed += 1
+                    print(f'ERROR: {box_file}: {error}', file=sys.stderr)
+    print(
+        f'Created {len(jobs) - failed} box files, {failed} failed',
+        file=sys.stderr,
+    )
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,7 +1,8 @@
 #!/usr/bin/env python3
 
 import argparse
-import io
+
+from tesstrain.boxfile import read_box_file
 
 #
 # command line arguments
@@ -34,19 +35,8 @@ args = arg_parser.parse_args()
 
 #
 # main
-# uses US (ASCII unit separator, U+001F) for substitution to  get the space delimiters
 #
 
-gtstring = io.StringIO()
-gtfile = open(args.txt, 'w', encoding='utf-8')
-with io.open(args.box, 'r', encoding='utf-8') as boxfile:
-    print(
-        ''.join(
-            line.replace('  ', '\u001f ').split(' ', 1)[0]
-            for line in boxfile
-            if line
-        ),
-        file=gtstring,
-    )
-gt = gtstring.getvalue().replace('\u001f', ' ').replace('\t', '\n')
-print(gt, file=gtfile)
+gt = read_box_file(args.box).ground_truth()
+with open(args.txt, 'w', encoding='utf-8') as gtfile:
+    print(gt + '\n', file=gtfile)
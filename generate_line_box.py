@@ -2,64 +2,78 @@
 
 import argparse
 import io
+import sys
 import unicodedata
 
 from PIL import Image
 
-#
-# command line arguments
-#
-arg_parser = argparse.ArgumentParser(
-    """Creates tesseract box files for given (line) image text pairs"""
-)
+from tesstrain.boxfile import line_boxes
 
-# Text ground truth
-arg_parser.add_argument(
-    '-t',
-    '--txt',
-    nargs='?',
-    metavar='TXT',
-    help='Line text (GT)',
-    required=True,
-)
 
-# Image file
-arg_parser.add_argument(
-    '-i',
-    '--image',
-    nargs='?',
-    metavar='IMAGE',
-    help='Image file',
-    required=True,
-)
+def create_boxes(image, txt):
+    """
+    Return the boxes for the line image `image` with the ground truth text
+    file `txt`, or None if the text is empty.
+    """
+    # Get image size.
+    with Image.open(image) as im:
+        width, height = im.size
 
-args = arg_parser.parse_args()
+    # load gt
+    with io.open(txt, 'r', encoding='utf-8') as f:
+        lines = f.read().strip().split('\n')
+        if len(lines) != 1:
+            raise ValueError(
+                'ERROR: %s: Ground truth text file should contain exactly one line, not %s'
+                % (txt, len(lines))
+            )
+        line = unicodedata.normalize('NFC', lines[0].strip())
 
-#
-# main
-#
-
-# Get image size.
-width, height = Image.open(args.image).size
-
-# load gt
-with io.open(args.txt, 'r', encoding='utf-8') as f:
-    lines = f.read().strip().split('\n')
-    if len(lines) != 1:
-        raise ValueError(
-            'ERROR: %s: Ground truth text file should contain exactly one line, not %s'
-            % (args.txt, len(lines))
-        )
-    line = unicodedata.normalize('NFC', lines[0].strip())
-
-if line:
+    if not line:
+        return None
+    symbols = []
     for i in range(1, len(line)):
         char = line[i]
         prev_char = line[i - 1]
         if unicodedata.combining(char):
-            print('%s 0 0 %d %d 0' % ((prev_char + char), width, height))
+            symbols.append(prev_char + char)
         elif not unicodedata.combining(prev_char):
-            print('%s 0 0 %d %d 0' % (prev_char, width, height))
+            symbols.append(prev_char)
     if not unicodedata.combining(line[-1]):
-        print('%s 0 0 %d %d 0' % (line[-1], width, height))
-    print('\t 0 0 %d %d 0' % (width, height))
+        symbols.append(line[-1])
+    return line_boxes(symbols, width, height)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(
+        """Creates tesseract box files for given (line) image text pairs"""
+    )
+
+    # Text ground truth
+    arg_parser.add_argument(
+        '-t',
+        '--txt',
+        nargs='?',
+        metavar='TXT',
+        help='Line text (GT)',
+        required=True,
+    )
+
+    # Image file
+    arg_parser.add_argument(
+        '-i',
+        '--image',
+        nargs='?',
+        metavar='IMAGE',
+        help='Image file',
+        required=True,
+    )
+
+    args = arg_parser.parse_args()
+    boxes = create_boxes(args.image, args.txt)
+    if boxes is not None:
+        boxes.write(sys.stdout)
+
+
+if __name__ == '__main__':
+    main()
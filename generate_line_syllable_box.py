@@ -2,42 +2,12 @@
 
 import argparse
 import io
+import sys
 import unicodedata
 
 from PIL import Image
 
-#
-# command line arguments
-#
-arg_parser = argparse.ArgumentParser(
-    """Creates tesseract box files for given (line) image text pairs"""
-)
-
-# Text ground truth
-arg_parser.add_argument(
-    '-t',
-    '--txt',
-    nargs='?',
-    metavar='TXT',
-    help='Line text (GT)',
-    required=True,
-)
-
-# Image file
-arg_parser.add_argument(
-    '-i',
-    '--image',
-    nargs='?',
-    metavar='IMAGE',
-    help='Image file',
-    required=True,
-)
-
-args = arg_parser.parse_args()
-
-#
-# main
-#
+from tesstrain.boxfile import TAB, line_boxes
 
 # https://stackoverflow.com/questions/6805311/combining-devanagari-characters
 # Letters are category Lo (Letter, Other), vowel signs are category Mc (Mark, Spacing Combining),
@@ -71,20 +41,63 @@ def splitclusters(s):
         yield cluster
 
 
-# Get image size.
-width, height = Image.open(args.image).size
-
-# load gt
-with io.open(args.txt, 'r', encoding='utf-8') as f:
-    lines = f.read().strip().split('\n')
-    if len(lines) != 1:
-        raise ValueError(
-            'ERROR: %s: Ground truth text file should contain exactly one line, not %s'
-            % (args.txt, len(lines))
-        )
-    line = unicodedata.normalize('NFC', lines[0].strip())
-
-if line:
+def create_boxes(image, txt):
+    """
+    Return the syllable boxes for the line image `image` with the ground
+    truth text file `txt`, or None if the text is empty.
+    """
+    # Get image size.
+    with Image.open(image) as im:
+        width, height = im.size
+
+    # load gt
+    with io.open(txt, 'r', encoding='utf-8') as f:
+        lines = f.read().strip().split('\n')
+        if len(lines) != 1:
+            raise ValueError(
+                'ERROR: %s: Ground truth text file should contain exactly one line, not %s'
+                % (txt, len(lines))
+            )
+        line = unicodedata.normalize('NFC', lines[0].strip())
+
+    if not line:
+        return None
+    symbols = []
     for syllable in splitclusters(line):
-        print('%s 0 0 %d %d 0' % (syllable, width, height))
-        print('\t 0 0 %d %d 0' % (width, height))
+        symbols += [syllable, TAB]
+    return line_boxes(symbols, width, height, end_line=False)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(
+        """Creates tesseract box files for given (line) image text pairs"""
+    )
+
+    # Text ground truth
+    arg_parser.add_argument(
+        '-t',
+        '--txt',
+        nargs='?',
+        metavar='TXT',
+        help='Line text (GT)',
+        required=True,
+    )
+
+    # Image file
+    arg_parser.add_argument(
+        '-i',
+        '--image',
+        nargs='?',
+        metavar='IMAGE',
+        help='Image file',
+        required=True,
+    )
+
+    args = arg_parser.parse_args()
+    boxes = create_boxes(args.image, args.txt)
+    if boxes is not None:
+        boxes.write(sys.stdout)
+
+
+if __name__ == '__main__':
+    main()
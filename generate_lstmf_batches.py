@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+
+"""
+Create the .lstmf files of many line images with few tesseract runs.
+
+The lines are first split into training and evaluation lines by
+`--ratio_train`, and the lines of each side into batches of up to
+`--batch_size` lines on average. Both use a hash of the image path of a line,
+so adding or removing lines only changes their own batches, until the number
+of batches of a side has to double. Every batch is passed to a single
+tesseract run as a list file, so the model is loaded once per batch
+instead of once per line, and the resulting .lstmf file holds one page per
+line. Tesseract reads the boxes of page `i` of a list from the box file of
+the `i`th image, so each batch is run on numbered links to its images with
+copies of their box files carrying the page number.
+
+Batches run in parallel. A batch is only created again if its lines changed
+or one of its images or box files is newer than its .lstmf file. The paths of
+the .lstmf files of the training and evaluation batches are written to
+`--train_list` and `--eval_list`, and those of all batches to `--list`.
+"""
+
+import argparse
+import concurrent.futures
+import hashlib
+import os
+import pathlib
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from generate_box_files import GT_SUFFIX, find_gt_files, find_image
+from tesstrain.boxfile import read_box_file, write_box_file
+
+
+def find_lines(sources, index=None):
+    """
+    Return the sorted `(image, box file)` pairs of the ground truth in
+    `sources` which have boxes to train on.
+    """
+    lines = []
+    for gt_file in find_gt_files(sources, index):
+        stem = gt_file[: -len(GT_SUFFIX)]
+        image = find_image(stem)
+        box_file = stem + '.box'
+        if image is None or not os.path.exists(box_file):
+            print(f'WARNING: no image or box for {gt_file}', file=sys.stderr)
+        elif os.path.getsize(box_file) == 0:
+            # Empty lines have nothing to train on.
+            continue
+        else:
+            lines.append((image, box_file))
+    return sorted(lines)
+
+
+def line_hash(line):
+    """
+    Return the hash of the image path of `line` as two numbers below 2**64,
+    the first for the train/eval split and the second for the batch.
+    """
+    digest = hashlib.sha1(line[0].encode('utf-8')).digest()
+    return (
+        int.from_bytes(digest[:8], 'big'),
+        int.from_bytes(digest[8:16], 'big'),
+    )
+
+
+def split_lines(lines, ratio_train):
+    """
+    Return the training and the evaluation lines of `lines`.
+
+    A line is used for evaluation if its hash lies above `ratio_train`. If
+    that leaves no evaluation line, the line with the highest hash is used.
+    """
+    limit = ratio_train * 2**64
+    train = []
+    evaluation = []
+    for line in lines:
+        if line_hash(line)[0] < limit:
+            train.append(line)
+        else:
+            evaluation.append(line)
+    if not evaluation and ratio_train < 1 and len(train) > 1:
+        last = max(train, key=line_hash)
+        train.remove(last)
+        evaluation.append(last)
+    return train, evaluation
+
+
+def assign_batches(lines, batch_size, prefix):
+    """
+    Return the batches of `lines` by name, with names starting with `prefix`.
+
+    The lines are assigned to a power of two of batches by their hash.
+    """
+    count = 1
+    while count * batch_size < len(lines):
+        count *= 2
+    buckets = {}
+    for line in lines:
+        buckets.setdefault(line_hash(line)[1] % count, []).append(line)
+    return {
+        f'{prefix}{bucket:06d}': sorted(batch)
+        for bucket, batch in sorted(buckets.items())
+    }
+
+
+def members_text(batch):
+    return ''.join(f'{image}\t{box_file}\n' for image, box_file in batch)
+
+
+def is_stale(lstmf_file, members_file, batch):
+    """
+    Return whether the .lstmf file of `batch` has to be created again.
+    """
+    try:
+        lstmf_mtime = os.stat(lstmf_file).st_mtime_ns
+        members = pathlib.Path(members_file).read_text(encoding='utf-8')
+    except FileNotFoundError:
+        return True
+    if members != members_text(batch):
+        return True
+    return any(
+        os.stat(path).st_mtime_ns > lstmf_mtime
+        for line in batch
+        for path in line
+    )
+
+
+def build_batch(tesseract, psm, output_dir, name, batch):
+    """
+    Create `<name>.lstmf` in `output_dir` from the lines of `batch`.
+
+    Returns None, or an error message if a box file is invalid or tesseract
+    failed.
+    """
+    output_dir = pathlib.Path(output_dir)
+    work_dir = pathlib.Path(
+        tempfile.mkdtemp(prefix=f'{name}.', dir=output_dir)
+    )
+    try:
+        images = []
+        for page, (image, box_file) in enumerate(batch):
+            link = work_dir / f'{page:06d}{pathlib.Path(image).suffix}'
+            try:
+                os.symlink(os.path.abspath(image), str(link))
+            except OSError:
+                shutil.copyfile(image, str(link))
+            boxes = read_box_file(box_file)
+            problems = boxes.check()
+            if problems:
+                index, problem = problems[0]
+                return f'{box_file}: box {index + 1}: {problem}'
+            boxes.page[:] = page
+            write_box_file(str(link.with_suffix('.box')), boxes)
+            images.append(str(link))
+        list_file = work_dir / 'images.txt'
+        list_file.write_text('\n'.join(images) + '\n', encoding='utf-8')
+
+        # Parallelism comes from running batches side by side.
+        env = dict(os.environ, OMP_THREAD_LIMIT='1')
+        proc = subprocess.run(
+            [
+                tesseract,
+                str(list_file),
+                str(work_dir / name),
+                '--psm',
+                str(psm),
+                'lstm.train',
+            ],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            env=env,
+        )
+        lstmf_file = work_dir / f'{name}.lstmf'
+        if proc.returncode != 0 or not lstmf_file.exists():
+            output = proc.stdout.decode('utf-8', 'replace').strip()
+            return f'tesseract failed ({proc.returncode}): {output}'
+        os.replace(str(lstmf_file), str(output_dir / f'{name}.lstmf'))
+        (output_dir / f'{name}.members').write_text(
+            members_text(batch), encoding='utf-8'
+        )
+        return None
+    finally:
+        shutil.rmtree(str(work_dir), ignore_errors=True)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(
+        description=(
+            'Create .lstmf files of batches of ground truth lines with a '
+            'pool of tesseract processes.'
+        )
+    )
+    arg_parser.add_argument(
+        'sources',
+        nargs='+',
+        metavar='SOURCE',
+        help=(
+            'ground truth directory, .gt.txt file, or file listing .gt.txt '
+            'files (- for standard input)'
+        ),
+    )
+    arg_parser.add_argument(
+        '-o',
+        '--output_dir',
+        required=True,
+        help='directory for the .lstmf files of the batches',
+    )
+    arg_parser.add_argument(
+        '-l',
+        '--list',
+        help='file to write the paths of all .lstmf files to',
+    )
+    arg_parser.add_argument(
+        '--train_list',
+        help='file to write the paths of the training .lstmf files to',
+    )
+    arg_parser.add_argument(
+        '--eval_list',
+        help='file to write the paths of the evaluation .lstmf files to',
+    )
+    arg_parser.add_argument(
+        '-r',
+        '--ratio_train',
+        type=float,
+        default=1.0,
+        help='ratio of training lines to all lines (default: %(default)s)',
+    )
+    arg_parser.add_argument(
+        '-i',
+        '--index',
+        help='index of the ground truth directory to update and read',
+    )
+    arg_parser.add_argument(
+        '-b',
+        '--batch_size',
+        type=int,
+        default=1000,
+        help='maximum average lines per tesseract run (default: %(default)s)',
+    )
+    arg_parser.add_argument(
+        '--psm', type=int, default=13, help='page segmentation mode'
+    )
+    arg_parser.add_argument(
+        '-j',
+        '--jobs',
+        type=int,
+        default=os.cpu_count(),
+        help='number of parallel tesseract runs (default: number of CPUs)',
+    )
+    arg_parser.add_argument(
+        '--tesseract', default='tesseract', help='tesseract program to run'
+    )
+    args = arg_parser.parse_args()
+    if args.batch_size < 1:
+        arg_parser.error('--batch_size must be positive')
+    if not 0 <= args.ratio_train <= 1:
+        arg_parser.error('--ratio_train must be between 0 and 1')
+
+    lines = find_lines(args.sources, args.index)
+    if not lines:
+        arg_parser.error('found no lines with box files')
+    output_dir = pathlib.Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    train, evaluation = split_lines(lines, args.ratio_train)
+    train_batches = assign_batches(train, args.batch_size, 'train')
+    eval_batches = assign_batches(evaluation, args.batch_size, 'eval')
+    batches = {**train_batches, **eval_batches}
+    # Remove batches left over from a larger set of lines.
+    for pattern in ('*.lstmf', '*.members'):
+        for path in output_dir.glob(pattern):
+            if path.is_file() and path.stem not in batches:
+                path.unlink()
+    stale = {
+        name: batch
+        for name, batch in batches.items()
+        if is_stale(
+            output_dir / f'{name}.lstmf', output_dir / f'{name}.members', batch
+        )
+    }
+    print(
+        f'{len(train)} training lines in {len(train_batches)} batches, '
+        f'{len(evaluation)} evaluation lines in {len(eval_batches)} '
+        f'batches, {len(stale)} to create',
+        file=sys.stderr,
+    )
+
+    failed = 0
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=max(1, args.jobs)
+    ) as executor:
+        futures = {
+            executor.submit(
+                build_batch,
+                args.tesseract,
+                args.psm,
+                output_dir,
+                name,
+                batch,
+            ): name
+            for name, batch in stale.items()
+        }
+        for future in concurrent.futures.as_completed(futures):
+            error = future.result()
+            if error:
+                failed += 1
+                print(f'ERROR: {futures[future]}: {error}', file=sys.stderr)
+    if failed:
+        print(f'{failed} batches failed', file=sys.stderr)
+        return 1
+
+    for list_file, names in (
+        (args.list, batches),
+        (args.train_list, train_batches),
+        (args.eval_list, eval_batches),
+    ):
+        if list_file:
+            with open(list_file, 'w', encoding='utf-8') as f:
+                for name in names:
+                    f.write(f'{output_dir / name}.lstmf\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
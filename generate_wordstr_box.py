@@ -2,61 +2,72 @@
 
 import argparse
 import io
+import sys
 import unicodedata
 
 import bidi.algorithm
 from PIL import Image
 
-#
-# command line arguments
-#
-arg_parser = argparse.ArgumentParser(
-    """Creates tesseract WordStr box files for given (line) image text pairs"""
-)
-
-# Text ground truth
-arg_parser.add_argument(
-    '-t',
-    '--txt',
-    nargs='?',
-    metavar='TXT',
-    help='Line text (GT)',
-    required=True,
-)
-
-# Image file
-arg_parser.add_argument(
-    '-i',
-    '--image',
-    nargs='?',
-    metavar='IMAGE',
-    help='Image file',
-    required=True,
-)
-
-args = arg_parser.parse_args()
-
-#
-# main
-#
-
-# load image
-with open(args.image, 'rb') as f:
-    im = Image.open(f)
-    width, height = im.size
-
-# load gt
-with io.open(args.txt, 'r', encoding='utf-8') as f:
-    lines = f.read().strip().split('\n')
-    if len(lines) != 1:
-        raise ValueError(
-            'ERROR: %s: Ground truth text file should contain exactly one line, not %s'
-            % (args.txt, len(lines))
-        )
-    line = unicodedata.normalize('NFC', lines[0].strip())
-
-# create WordStr line boxes for Indic & RTL
-if line:
+from tesstrain.boxfile import wordstr_boxes
+
+
+def create_boxes(image, txt):
+    """
+    Return the WordStr boxes for the line image `image` with the ground
+    truth text file `txt`, or None if the text is empty.
+    """
+    # load image
+    with open(image, 'rb') as f:
+        im = Image.open(f)
+        width, height = im.size
+
+    # load gt
+    with io.open(txt, 'r', encoding='utf-8') as f:
+        lines = f.read().strip().split('\n')
+        if len(lines) != 1:
+            raise ValueError(
+                'ERROR: %s: Ground truth text file should contain exactly one line, not %s'
+                % (txt, len(lines))
+            )
+        line = unicodedata.normalize('NFC', lines[0].strip())
+
+    # create WordStr line boxes for Indic & RTL
+    if not line:
+        return None
     line = bidi.algorithm.get_display(line)
-    print('WordStr 0 0 %d %d 0 #%s' % (width, height, line))
-    print('\t 0 0 %d %d 0' % (width, height))
+    return wordstr_boxes(line, width, height)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(
+        """Creates tesseract WordStr box files for given (line) image text pairs"""
+    )
+
+    # Text ground truth
+    arg_parser.add_argument(
+        '-t',
+        '--txt',
+        nargs='?',
+        metavar='TXT',
+        help='Line text (GT)',
+        required=True,
+    )
+
+    # Image file
+    arg_parser.add_argument(
+        '-i',
+        '--image',
+        nargs='?',
+        metavar='IMAGE',
+        help='Image file',
+        required=True,
+    )
+
+    args = arg_parser.parse_args()
+    boxes = create_boxes(args.image, args.txt)
+    if boxes is not None:
+        boxes.write(sys.stdout)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+
+"""
+Index of the ground truth files below a directory.
+
+The index is a JSON Lines file. Its first line describes the index, every
+directory below the ground truth directory has a line with its modification
+time and subdirectories, and every `.gt.txt` file a line with its line image,
+the modification times and sizes of both, the SHA-1 of the text, its number
+of characters and the size of the image.
+
+Updating the index only lists directories whose modification time changed,
+which are those where files were added, removed or renamed. Directories are
+still visited to check their time, but no file is opened or hashed unless it
+is new or was replaced. Ground truth edited in place keeps its old entry until
+the index is updated with `--rescan`.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import unicodedata
+
+INDEX_VERSION = 1
+
+GT_SUFFIX = '.gt.txt'
+
+# Line images of a ground truth file, in the order of the Makefile rules.
+IMAGE_SUFFIXES = ('.png', '.bin.png', '.nrm.png', '.raw.png', '.tif')
+
+
+def read_index(index_file, root):
+    """
+    Return the directory and ground truth entries of `index_file` by path,
+    or empty ones if it does not exist or indexes another directory.
+    """
+    dirs = {}
+    gts = {}
+    try:
+        with open(index_file, encoding='utf-8') as f:
+            header = json.loads(next(f, '{}'))
+            if header.get('version') != INDEX_VERSION or (
+                header.get('root') != root
+            ):
+                return dirs, gts
+            for line in f:
+                entry = json.loads(line)
+                if 'dir' in entry:
+                    dirs[entry['dir']] = entry
+                else:
+                    gts[entry['gt']] = entry
+    except (OSError, ValueError):
+        return {}, {}
+    return dirs, gts
+
+
+def write_index(index_file, root, dirs, gts):
+    """
+    Write the index atomically, so that readers never see a partial one.
+    """
+    directory = os.path.dirname(index_file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_file = f'{index_file}.tmp{os.getpid()}'
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        f.write(json.dumps({'version': INDEX_VERSION, 'root': root}) + '\n')
+        for path in sorted(dirs):
+            f.write(json.dumps(dirs[path], ensure_ascii=False) + '\n')
+        for path in sorted(gts):
+            f.write(json.dumps(gts[path], ensure_ascii=False) + '\n')
+    os.replace(tmp_file, index_file)
+
+
+def gt_entry(gt_file, image, gt_stat, image_stat):
+    """
+    Return the index entry of `gt_file` and its line `image`.
+    """
+    with open(gt_file, 'rb') as f:
+        data = f.read()
+    text = unicodedata.normalize('NFC', data.decode('utf-8').strip())
+    entry = {
+        'gt': gt_file,
+        'gt_mtime': gt_stat.st_mtime_ns,
+        'gt_size': gt_stat.st_size,
+        'sha1': hashlib.sha1(data).hexdigest(),
+        'chars': len(text),
+        'image': image,
+        'image_mtime': None,
+        'image_size': None,
+        'width': None,
+        'height': None,
+    }
+    if image:
+        from PIL import Image
+
+        entry['image_mtime'] = image_stat.st_mtime_ns
+        entry['image_size'] = image_stat.st_size
+        try:
+            with Image.open(image) as im:
+                entry['width'], entry['height'] = im.size
+        except OSError as e:
+            print(f'WARNING: cannot read {image}: {e}', file=sys.stderr)
+    return entry
+
+
+def is_current(entry, gt_stat, image, image_stat):
+    return (
+        entry['gt_mtime'] == gt_stat.st_mtime_ns
+        and entry['gt_size'] == gt_stat.st_size
+        and entry['image'] == image
+        and (
+            image is None
+            or (
+                entry['image_mtime'] == image_stat.st_mtime_ns
+                and entry['image_size'] == image_stat.st_size
+            )
+        )
+    )
+
+
+def scan_directory(path, old_gts, rescan):
+    """
+    List the directory `path` and return its entry and the entries of its
+    ground truth files, reusing those in `old_gts` which are unchanged.
+    """
+    subdirs = []
+    names = set()
+    with os.scandir(path) as it:
+        for dir_entry in it:
+            # Follow symbolic links like `find -L`.
+            if dir_entry.is_dir():
+                subdirs.append(dir_entry.name)
+            else:
+                names.add(dir_entry.name)
+
+    gts = {}
+    for name in sorted(names):
+        if not name.endswith(GT_SUFFIX):
+            continue
+        stem = name[: -len(GT_SUFFIX)]
+        image_name = next(
+            (stem + s for s in IMAGE_SUFFIXES if stem + s in names), None
+        )
+        gt_file = os.path.join(path, name)
+        image = os.path.join(path, image_name) if image_name else None
+        try:
+            gt_stat = os.stat(gt_file)
+            image_stat = os.stat(image) if image else None
+        except FileNotFoundError as e:
+            # A dangling symbolic link or a file removed while scanning.
+            print(f'WARNING: skipping {gt_file}: {e}', file=sys.stderr)
+            continue
+        entry = old_gts.get(gt_file)
+        if rescan or not entry or not is_current(
+            entry, gt_stat, image, image_stat
+        ):
+            entry = gt_entry(gt_file, image, gt_stat, image_stat)
+        gts[gt_file] = entry
+    return {
+        'dir': path,
+        'mtime': os.stat(path).st_mtime_ns,
+        'subdirs': sorted(subdirs),
+    }, gts
+
+
+def update_index(index_file, root, rescan=False):
+    """
+    Bring the index of the ground truth below `root` up to date and return
+    its ground truth entries by path.
+
+    With `rescan`, the files of every directory are checked, not only those
+    of changed directories.
+    """
+    old_dirs, old_gts = read_index(index_file, root)
+    old_by_dir = {}
+    for entry in old_gts.values():
+        old_by_dir.setdefault(os.path.dirname(entry['gt']), {})[
+            entry['gt']
+        ] = entry
+
+    dirs = {}
+    gts = {}
+    changed = 0
+    pending = [(root, frozenset())]
+    while pending:
+        path, ancestors = pending.pop()
+        try:
+            st = os.stat(path)
+            if (st.st_dev, st.st_ino) in ancestors:
+                # A symbolic link to a directory containing it, which
+                # `find -L` skips as well.
+                continue
+            old = old_dirs.get(path)
+            if not rescan and old and old['mtime'] == st.st_mtime_ns:
+                entry = old
+                dir_gts = old_by_dir.get(path, {})
+            else:
+                entry, dir_gts = scan_directory(
+                    path, old_by_dir.get(path, {}), rescan
+                )
+                changed += 1
+        except FileNotFoundError as e:
+            # A dangling symbolic link or a directory removed while scanning.
+            print(f'WARNING: skipping {path}: {e}', file=sys.stderr)
+            continue
+        ancestors |= {(st.st_dev, st.st_ino)}
+        gts.update(dir_gts)
+        dirs[path] = entry
+        pending.extend(
+            (os.path.join(path, name), ancestors) for name in entry['subdirs']
+        )
+
+    if changed or len(dirs) != len(old_dirs):
+        write_index(index_file, root, dirs, gts)
+    return gts
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(
+        description=(
+            'Update the index of a ground truth directory and optionally '
+            'list its .gt.txt files.'
+        )
+    )
+    arg_parser.add_argument('root', help='ground truth directory')
+    arg_parser.add_argument(
+        '-i', '--index', required=True, help='index file (JSON Lines)'
+    )
+    arg_parser.add_argument(
+        '-l',
+        '--list',
+        action='store_true',
+        help='print the paths of all .gt.txt files',
+    )
+    arg_parser.add_argument(
+        '--rescan',
+        action='store_true',
+        help='check all files, also in unchanged directories',
+    )
+    args = arg_parser.parse_args()
+
+    gts = update_index(args.index, args.root, args.rescan)
+    if args.list:
+        sys.stdout.writelines(path + '\n' for path in sorted(gts))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
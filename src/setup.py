@@ -33,6 +33,10 @@ setuptools.setup(
     install_requires=[
         'tqdm',
     ],
+    extras_require={
+        'boxfile': ['numpy'],
+        'synthesize': ['numpy', 'Pillow'],
+    },
     entry_points={
         'console_scripts': [],
     },
@@ -10,6 +10,29 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from tesstrain.wrapper import run
+import importlib
 
 __version__ = '0.1'
+
+# Imported on first use, so that scripts which only need a light module such
+# as `tesstrain.boxfile` do not load the whole training stack.
+_EXPORTS = {
+    'TesstrainError': 'tesstrain.exceptions',
+    'Session': 'tesstrain.session',
+    'TrainingResult': 'tesstrain.session',
+    'run': 'tesstrain.wrapper',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = getattr(importlib.import_module(_EXPORTS[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -15,14 +15,16 @@
 # https://tesseract-ocr.github.io/tessdoc/Training-Tesseract.html.
 
 import logging
+import sys
 
 from tesstrain.arguments import (
     TrainingArguments,
     get_argument_parser,
     verify_parameters_and_handle_defaults,
 )
+from tesstrain.exceptions import TesstrainError
 from tesstrain.generate import cleanup
-from tesstrain.wrapper import run_from_context
+from tesstrain.wrapper import plan_from_context, run_from_context
 
 log = logging.getLogger()
 
@@ -59,10 +61,17 @@ def parse_flags(argv=None):
 
 def main():
     setup_logging_console()
-    ctx = parse_flags()
-    logfile = setup_logging_logfile(ctx.log_file)
+    try:
+        ctx = parse_flags()
+        if ctx.plan is not None:
+            plan_from_context(ctx)
+            return 0
+        logfile = setup_logging_logfile(ctx.log_file)
 
-    run_from_context(ctx)
+        run_from_context(ctx)
+    except TesstrainError:
+        # The reason has been logged already.
+        sys.exit(1)
 
     log.removeHandler(logfile)
     logfile.close()
@@ -16,6 +16,7 @@ Argument handling utilities.
 
 import argparse
 import atexit
+import importlib.util
 import logging
 import os
 import pathlib
@@ -23,10 +24,68 @@ import platform
 from datetime import date
 from tempfile import TemporaryDirectory, mkdtemp
 
+from tesstrain.cache import RenderCache, fontconfig_cache_path
+from tesstrain.disk import parse_size
+from tesstrain.exceptions import ConfigurationError
+from tesstrain.fonts import check_fonts
 from tesstrain.generate import err_exit
+from tesstrain.manifest import Manifest
+from tesstrain.shards import parse_shard
 
 log = logging.getLogger(__name__)
 
+# Training directories of this process, reported at exit if they still exist.
+_training_dirs = set()
+
+
+@atexit.register
+def _show_training_dirs():
+    # On successful exit we will delete these first; on failure we want to let
+    # the user know where the log is
+    for training_dir in sorted(_training_dirs):
+        if pathlib.Path(training_dir).exists():
+            print(f'Temporary files retained at: {training_dir}')
+
+
+# Rough upper bound of the resident memory of a single text2image or
+# tesseract process, used to avoid oversubscribing memory with parallel jobs.
+JOB_MEMORY_BYTES = 512 * 1024 * 1024
+
+
+def available_memory():
+    """
+    Return the bytes of memory available for new processes, or None if
+    unknown.
+
+    This is `MemAvailable` from /proc/meminfo, which unlike the free memory
+    includes the page cache that can be reclaimed. Elsewhere it falls back to
+    the physical memory.
+    """
+    try:
+        with open('/proc/meminfo', encoding='ascii') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        return os.sysconf('SC_PHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (AttributeError, ValueError, OSError):
+        # Not available on this platform, e.g. Windows.
+        return None
+
+
+def default_jobs():
+    """
+    Derive a default number of parallel jobs from the CPU count and the
+    available memory.
+    """
+    jobs = os.cpu_count() or 1
+    available = available_memory()
+    if available is None:
+        return jobs
+    return max(1, min(jobs, available // JOB_MEMORY_BYTES))
+
 
 class TrainingArguments(argparse.Namespace):
     def __init__(self):
@@ -35,8 +94,9 @@ class TrainingArguments(argparse.Namespace):
         self.lang_code = 'eng'
         self.timestamp = str(date.today())
 
-        self._font_config_cache = TemporaryDirectory(prefix='font_tmp')
-        self.font_config_cache = self._font_config_cache.name
+        # A temporary directory unless a shared or resumable font cache is
+        # used, see verify_parameters_and_handle_defaults.
+        self.font_config_cache = None
         self.fonts_dir = (
             '/Library/Fonts/'
             if 'darwin' in self.uname
@@ -50,6 +110,34 @@ class TrainingArguments(argparse.Namespace):
         self.run_shape_clustering = False
         self.extract_font_properties = True
         self.distort_image = False
+        self.synthesize_exposures = False
+        self.render_cache_dir = None
+        self.render_cache = None
+        self.work_dir = None
+        self.manifest = None
+        self.fontconfig_cache_dir = None
+        self.fontconfig_per_worker = False
+        self.fontconfig_pool = None
+        self.check_fonts = True
+        self.vertical_fonts = None
+        self.font_index = None
+        self.jobs = None
+        self.render_jobs = None
+        self.extract_jobs = None
+        self.pipeline = False
+        self.engine = 'threads'
+        self.render_shards = 1
+        self.plan = None
+        self.bounded_disk = False
+        self.disk_budget = None
+        self.disk_admission = None
+        self.shard = None
+        self.shard_costs = None
+        self.shard_jobs = None
+        self.merge_shards = None
+        self.executor = None
+        self.report = None
+        self.render_outbases = None
 
     def __eq__(self, other):
         return (
@@ -97,6 +185,15 @@ def get_argument_parser():
     parser.add_argument(
         '--tmp_dir', help='Path to temporary training directory.'
     )
+    parser.add_argument(
+        '--work_dir',
+        metavar='WORKDIR',
+        help=(
+            'Stable training directory for a resumable run. Phases and jobs '
+            'completed by an earlier run with the same inputs are skipped. '
+            'Overrides --tmp_dir.'
+        ),
+    )
     parser.add_argument(
         '--lang', metavar='LANG_CODE', dest='lang_code', help='ISO 639 code.'
     )
@@ -154,6 +251,15 @@ def get_argument_parser():
     parser.add_argument(
         '--distort_image', dest='distort_image', action='store_true'
     )
+    parser.add_argument(
+        '--synthesize_exposures',
+        action='store_true',
+        help=(
+            'Render every font once without degradation and derive all '
+            'exposures from it, instead of rendering each exposure. Needs '
+            'NumPy and Pillow.'
+        ),
+    )
 
     tessdata_group = parser.add_argument_group(
         'tessdata',
@@ -184,25 +290,163 @@ def get_argument_parser():
         help='Size of printed text.',
     )
 
-    return parser
+    parser.add_argument(
+        '-j',
+        '--jobs',
+        type=int,
+        help=(
+            'Number of parallel jobs. Defaults to the number of CPUs, '
+            'limited by the available memory.'
+        ),
+    )
+    parser.add_argument(
+        '--render_jobs',
+        type=int,
+        help='Number of parallel text2image jobs. Defaults to --jobs.',
+    )
+    parser.add_argument(
+        '--extract_jobs',
+        type=int,
+        help='Number of parallel tesseract jobs. Defaults to --jobs.',
+    )
+
+    parser.add_argument(
+        '--pipeline',
+        action='store_true',
+        help=(
+            'Extract the features of each font as soon as it has been '
+            'rendered instead of running the phases one after another.'
+        ),
+    )
 
+    parser.add_argument(
+        '--engine',
+        choices=('threads', 'asyncio'),
+        default='threads',
+        help=(
+            'How to run parallel jobs: a thread per job, or an asyncio event '
+            'loop waiting for all programs, which scales to many more '
+            'concurrent jobs.'
+        ),
+    )
 
-def verify_parameters_and_handle_defaults(ctx):
-    log.debug(ctx)
+    parser.add_argument(
+        '--render_shards',
+        metavar='N',
+        type=int,
+        default=1,
+        help=(
+            'Split the training text into N line-aligned parts, which are '
+            'rendered concurrently for every font.'
+        ),
+    )
 
-    if not ctx.lang_code:
-        err_exit('Need to specify a language --lang')
-    if not ctx.langdata_dir:
-        err_exit('Need to specify path to language files --langdata_dir')
-    if not ctx.tessdata_dir:
-        tessdata_prefix = os.environ.get('TESSDATA_PREFIX', '')
-        if not tessdata_prefix:
-            err_exit(
-                'Need to specify a --tessdata_dir or have a '
-                'TESSDATA_PREFIX variable defined in your environment'
-            )
-        else:
-            ctx.tessdata_dir = tessdata_prefix
+    parser.add_argument(
+        '--fontconfig_cache_dir',
+        metavar='CACHEDIR',
+        help=(
+            'Persistent directory for font caches, which are reused by all '
+            'runs using the same fonts_dir contents.'
+        ),
+    )
+    parser.add_argument(
+        '--no_font_check',
+        dest='check_fonts',
+        action='store_false',
+        help=(
+            'Do not check that all fonts are available before rendering '
+            'starts.'
+        ),
+    )
+    parser.add_argument(
+        '--fontconfig_per_worker',
+        action='store_true',
+        help=(
+            'Give every rendering worker its own copy of the initialized '
+            'font cache instead of sharing one.'
+        ),
+    )
+    parser.add_argument(
+        '--render_cache_dir',
+        metavar='CACHEDIR',
+        help=(
+            'Persistent directory for caching rendered images between runs. '
+            'Renders with identical inputs are restored instead of being '
+            'generated again.'
+        ),
+    )
+
+    parser.add_argument(
+        '--bounded_disk',
+        action='store_true',
+        help=(
+            'Remove every image and box file as soon as its features have '
+            'been extracted (with --save_box_tiff, move them to output_dir). '
+            'Most effective with --pipeline. A resumed run renders the '
+            'removed images again.'
+        ),
+    )
+    parser.add_argument(
+        '--disk_budget',
+        metavar='SIZE',
+        type=parse_size,
+        help=(
+            'Delay new renders while the training directory would grow '
+            'beyond SIZE bytes (e.g. 500M, 20G). Implies --pipeline and '
+            '--bounded_disk.'
+        ),
+    )
+
+    parser.add_argument(
+        '--shard',
+        metavar='I/N',
+        type=parse_shard,
+        help=(
+            'Only run the font/exposure jobs of shard I of N (counted from '
+            '0), for spreading a run over several hosts with otherwise equal '
+            'arguments. The output_dir holds the partial results to be '
+            'combined with --merge_shards.'
+        ),
+    )
+    parser.add_argument(
+        '--shard_costs',
+        metavar='REPORT',
+        nargs='+',
+        help=(
+            'Performance reports of earlier runs, used to balance the '
+            'shards by the rendering time of each font.'
+        ),
+    )
+    parser.add_argument(
+        '--merge_shards',
+        metavar='SHARD_DIR',
+        nargs='+',
+        help=(
+            'Instead of rendering, combine the output_dirs of all shards of '
+            'a run into one training file list and starter traineddata.'
+        ),
+    )
+
+    parser.add_argument(
+        '--plan',
+        metavar='REPORT',
+        nargs='*',
+        help=(
+            'Only print the jobs of the run with estimates of its wall time '
+            'and disk usage, based on the given performance reports of '
+            'earlier runs (default: the report in output_dir, if any). No '
+            'training programs are run.'
+        ),
+    )
+
+    return parser
+
+
+def make_directories(ctx):
+    """
+    Create the output and training directories of a run and set the paths
+    which depend on them. A plan (see `--plan`) leaves the filesystem alone.
+    """
     if not ctx.output_dir:
         ctx.output_dir = mkdtemp(
             prefix=f'trained-{ctx.lang_code}-{ctx.timestamp}'
@@ -210,7 +454,20 @@ def verify_parameters_and_handle_defaults(ctx):
         log.info(f'Output directory set to: {ctx.output_dir}')
 
     # Location where intermediate files will be created.
-    if not ctx.tmp_dir:
+    if ctx.work_dir:
+        ctx.training_dir = str(pathlib.Path(ctx.work_dir).resolve())
+        pathlib.Path(ctx.training_dir).mkdir(parents=True, exist_ok=True)
+        ctx.manifest = Manifest(
+            pathlib.Path(ctx.training_dir) / 'manifest.jsonl'
+        )
+        # Keep the font cache with the work directory, it belongs to the
+        # recorded fontconfig phase.
+        ctx.font_config_cache = str(
+            pathlib.Path(ctx.training_dir) / 'fontconfig'
+        )
+        pathlib.Path(ctx.font_config_cache).mkdir(exist_ok=True)
+        log.info(f'Resuming from work directory: {ctx.training_dir}')
+    elif not ctx.tmp_dir:
         ctx.training_dir = mkdtemp(prefix=f'{ctx.lang_code}-{ctx.timestamp}')
     else:
         ctx.training_dir = mkdtemp(
@@ -220,13 +477,31 @@ def verify_parameters_and_handle_defaults(ctx):
     ctx.log_file = pathlib.Path(ctx.training_dir) / 'tesstrain.log'
     log.info(f'Log file location: {ctx.log_file}')
 
-    def show_tmpdir_location(training_dir):
-        # On successful exit we will delete this first; on failure we want to let the user
-        # know where the log is
-        if pathlib.Path(training_dir).exists():
-            print(f'Temporary files retained at: {training_dir}')
+    _training_dirs.add(ctx.training_dir)
+
 
-    atexit.register(show_tmpdir_location, ctx.training_dir)
+def verify_parameters_and_handle_defaults(ctx):
+    log.debug(ctx)
+
+    if not ctx.lang_code:
+        err_exit('Need to specify a language --lang', ConfigurationError)
+    if not ctx.langdata_dir:
+        err_exit(
+            'Need to specify path to language files --langdata_dir',
+            ConfigurationError,
+        )
+    if not ctx.tessdata_dir:
+        tessdata_prefix = os.environ.get('TESSDATA_PREFIX', '')
+        if not tessdata_prefix:
+            err_exit(
+                'Need to specify a --tessdata_dir or have a '
+                'TESSDATA_PREFIX variable defined in your environment',
+                ConfigurationError,
+            )
+        else:
+            ctx.tessdata_dir = tessdata_prefix
+    if ctx.plan is None:
+        make_directories(ctx)
 
     # Take training text and wordlist from the langdata directory if not
     # specified in the command-line.
@@ -269,5 +544,50 @@ def verify_parameters_and_handle_defaults(ctx):
     )
     ctx.generate_dawgs = 1
 
+    if not ctx.jobs or ctx.jobs <= 0:
+        ctx.jobs = default_jobs()
+    if not ctx.render_jobs or ctx.render_jobs <= 0:
+        ctx.render_jobs = ctx.jobs
+    if not ctx.extract_jobs or ctx.extract_jobs <= 0:
+        ctx.extract_jobs = ctx.jobs
+    log.info(
+        f'Using {ctx.render_jobs} rendering and '
+        f'{ctx.extract_jobs} feature extraction jobs'
+    )
+
+    if ctx.fontconfig_cache_dir:
+        ctx.font_config_cache = str(
+            fontconfig_cache_path(ctx.fontconfig_cache_dir, ctx.fonts_dir)
+        )
+        log.info(f'Using font cache at: {ctx.font_config_cache}')
+    elif not ctx.font_config_cache and ctx.plan is None:
+        ctx._font_config_cache = TemporaryDirectory(prefix='font_tmp')
+        ctx.font_config_cache = ctx._font_config_cache.name
+
+    # Catch misspelled or missing fonts before any work is done. Fonts which
+    # are only known after the language defaults are applied are checked in
+    # run_from_context. Planning and merging do not need the fonts.
+    if ctx.plan is None and not ctx.merge_shards:
+        check_fonts(ctx, [*(ctx.fonts or []), *(ctx.vertical_fonts or [])])
+
+    if ctx.disk_budget:
+        # Space is only freed by extracting features while rendering.
+        ctx.pipeline = True
+        ctx.bounded_disk = True
+        log.info(f'Limiting the training directory to {ctx.disk_budget} bytes')
+
+    if ctx.synthesize_exposures and not all(
+        importlib.util.find_spec(module) for module in ('numpy', 'PIL')
+    ):
+        err_exit(
+            '--synthesize_exposures needs NumPy and Pillow, install them with '
+            '`pip install tesstrain[synthesize]`',
+            ConfigurationError,
+        )
+
+    if ctx.render_cache_dir and ctx.render_cache is None and ctx.plan is None:
+        ctx.render_cache = RenderCache(ctx.render_cache_dir)
+        log.info(f'Using render cache at: {ctx.render_cache_dir}')
+
     log.debug(ctx)
     return ctx
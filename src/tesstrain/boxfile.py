@@ -0,0 +1,353 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Reading, writing and checking of Tesseract box files.
+
+A box file has one line per symbol::
+
+    <text> <left> <bottom> <right> <top> <page>[ #<line text>]
+
+Coordinates have their origin in the bottom left corner of the page. A line
+with the text `\\t` ends a text line, and `WordStr` lines carry the text of a
+whole line after `#`.
+
+The lines are held as columns: the coordinates in a single `int32` array and
+the texts in a list, so large box files can be checked and transformed with
+array operations instead of an object per line.
+"""
+
+import io
+import itertools
+import warnings
+
+import numpy as np
+
+# Columns of `Boxes.coords`.
+COLUMNS = ('left', 'bottom', 'right', 'top', 'page')
+
+# Text of the box ending a text line.
+TAB = '\t'
+
+WORDSTR = 'WordStr'
+
+# Number of lines parsed or formatted at a time.
+CHUNK_LINES = 1 << 16
+
+
+class Boxes:
+    """
+    Lines of a box file.
+
+    :param text: Text of every line.
+    :param coords: Array of shape `(len(text), 5)` with the `COLUMNS`.
+    :param comments: Text after `#` of every line, or None for lines without
+                     one. Omitted if no line has one.
+    """
+
+    __slots__ = ('text', 'coords', 'comments')
+
+    def __init__(self, text=(), coords=None, comments=None):
+        self.text = list(text)
+        if coords is None:
+            coords = np.zeros((len(self.text), len(COLUMNS)), dtype=np.int32)
+        self.coords = np.asarray(coords, dtype=np.int32).reshape(
+            -1, len(COLUMNS)
+        )
+        if len(self.coords) != len(self.text):
+            raise ValueError(
+                f'{len(self.text)} texts but {len(self.coords)} boxes'
+            )
+        if comments is not None and not any(c is not None for c in comments):
+            comments = None
+        self.comments = list(comments) if comments is not None else None
+
+    def __len__(self):
+        return len(self.text)
+
+    def __repr__(self):
+        return f'<Boxes with {len(self)} lines>'
+
+    @property
+    def left(self):
+        return self.coords[:, 0]
+
+    @property
+    def bottom(self):
+        return self.coords[:, 1]
+
+    @property
+    def right(self):
+        return self.coords[:, 2]
+
+    @property
+    def top(self):
+        return self.coords[:, 3]
+
+    @property
+    def page(self):
+        return self.coords[:, 4]
+
+    @classmethod
+    def concatenate(cls, parts):
+        parts = list(parts)
+        comments = None
+        if any(part.comments is not None for part in parts):
+            comments = list(
+                itertools.chain.from_iterable(
+                    part.comments or [None] * len(part) for part in parts
+                )
+            )
+        return cls(
+            itertools.chain.from_iterable(part.text for part in parts),
+            (
+                np.concatenate([part.coords for part in parts])
+                if parts
+                else None
+            ),
+            comments,
+        )
+
+    @classmethod
+    def parse(cls, lines, first_lineno=1):
+        """
+        Parse box file `lines`. Blank lines are skipped.
+
+        The lines are split into texts and coordinates with array operations
+        on their bytes. Chunks with `WordStr`, blank or invalid lines are
+        parsed line by line instead.
+
+        Raises ValueError for lines which are not valid box lines.
+        """
+        lines = list(lines)
+        columns = _parse_columns(lines)
+        if columns is not None:
+            return cls(*columns)
+        return cls._parse_lines(lines, first_lineno)
+
+    @classmethod
+    def _parse_lines(cls, lines, first_lineno):
+        text = []
+        numbers = []
+        comments = []
+        for lineno, line in enumerate(lines, first_lineno):
+            line = line.rstrip('\r\n')
+            if not line.strip(' '):
+                continue
+            comment = None
+            if line.startswith(WORDSTR + ' '):
+                line, sep, comment = line.partition(' #')
+                if not sep:
+                    comment = ''
+            fields = line.rsplit(' ', len(COLUMNS))
+            if len(fields) != len(COLUMNS) + 1:
+                raise ValueError(f'Line {lineno}: not a box line: {line!r}')
+            text.append(fields[0])
+            numbers.extend(fields[1:])
+            comments.append(comment)
+        try:
+            coords = np.array(numbers, dtype=np.int32)
+        except (ValueError, OverflowError) as e:
+            raise ValueError(f'Invalid box coordinates: {e}') from None
+        return cls(text, coords, comments)
+
+    def lines(self):
+        """
+        Generate the formatted lines, each ending with a newline.
+        """
+        for start in range(0, len(self), CHUNK_LINES):
+            stop = start + CHUNK_LINES
+            rows = self.coords[start:stop].tolist()
+            comments = (
+                self.comments[start:stop]
+                if self.comments is not None
+                else itertools.repeat(None)
+            )
+            for text, row, comment in zip(
+                self.text[start:stop], rows, comments
+            ):
+                line = f'{text} {row[0]} {row[1]} {row[2]} {row[3]} {row[4]}'
+                if comment is not None:
+                    line += f' #{comment}'
+                yield line + '\n'
+
+    def write(self, f):
+        """
+        Write the box lines to the text file `f`.
+        """
+        f.writelines(self.lines())
+
+    def __str__(self):
+        out = io.StringIO()
+        self.write(out)
+        return out.getvalue()
+
+    def check(self, width=None, height=None):
+        """
+        Return a list of `(line index, problem)` for boxes which are empty,
+        inverted or outside the page of the given size.
+        """
+        checks = [
+            (self.right < self.left, 'right edge is left of left edge'),
+            (self.top < self.bottom, 'top edge is below bottom edge'),
+            ((self.left < 0) | (self.bottom < 0), 'negative coordinate'),
+            (self.page < 0, 'negative page number'),
+        ]
+        if width is not None:
+            checks.append((self.right > width, f'wider than {width}'))
+        if height is not None:
+            checks.append((self.top > height, f'higher than {height}'))
+        problems = []
+        for mask, problem in checks:
+            problems.extend((int(i), problem) for i in np.flatnonzero(mask))
+        problems.sort()
+        return problems
+
+    def line_ends(self):
+        """
+        Return the indices of the boxes ending a text line.
+        """
+        return np.flatnonzero(np.array(self.text, dtype=object) == TAB)
+
+    def ground_truth(self):
+        """
+        Return the text of the symbols, one text line per line.
+        """
+        return ''.join(self.text).replace(TAB, '\n')
+
+
+def _parse_columns(lines):
+    """
+    Return the texts and coordinates of the box `lines` without comments, or
+    None if not all of them are plain, valid box lines.
+    """
+    data = ''.join(lines).encode('utf-8')
+    if data and not data.endswith(b'\n'):
+        data += b'\n'
+    wordstr = (WORDSTR + ' ').encode('ascii')
+    if data.startswith(wordstr) or b'\n' + wordstr in data:
+        return None
+    buf = np.frombuffer(data, dtype=np.uint8)
+    ends = np.flatnonzero(buf == ord('\n'))
+    if len(ends) != len(lines):
+        return None
+    if not len(ends):
+        return [], None
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    # The space before the coordinates is the fifth last one of each line.
+    spaces = np.flatnonzero(buf == ord(' '))
+    first = np.searchsorted(spaces, ends) - len(COLUMNS)
+    if first.min() < 0 or (spaces[first] < starts).any():
+        return None
+    cuts = spaces[first]
+
+    # Mark the coordinates of every line and its newline.
+    step = np.zeros(len(buf) + 1, dtype=np.int8)
+    step[cuts + 1] = 1
+    step[ends + 1] = -1
+    in_numbers = np.cumsum(step[:-1], dtype=np.int8).astype(bool)
+    numbers = buf[in_numbers]
+    # Only digits, single spaces and signs are read the same as by
+    # _parse_lines, which reports errors.
+    digit = (numbers >= ord('0')) & (numbers <= ord('9'))
+    space = numbers == ord(' ')
+    minus = numbers == ord('-')
+    end = numbers == ord('\n')
+    cr = numbers == ord('\r')
+    if not (digit | space | minus | end | cr).all():
+        return None
+    # A sign starts a number, after a space or the previous line.
+    if (minus & ~np.concatenate(([True], (space | end)[:-1]))).any():
+        return None
+    if (cr & ~np.concatenate((end[1:], [False]))).any():
+        return None
+    numbers[end | cr] = ord(' ')
+    with warnings.catch_warnings():
+        # Raised for data which cannot be read to its end.
+        warnings.simplefilter('ignore', DeprecationWarning)
+        coords = np.fromstring(numbers.tobytes(), dtype=np.int64, sep=' ')
+    if (
+        len(coords) != len(COLUMNS) * len(ends)
+        or (coords != coords.astype(np.int32)).any()
+    ):
+        return None
+
+    in_text = ~in_numbers
+    in_text[cuts] = False
+    in_text[ends] = True
+    text = buf[in_text].tobytes().decode('utf-8')
+    return text.split('\n')[:-1], coords
+
+
+def read_boxes(f, chunk_lines=CHUNK_LINES):
+    """
+    Generate the lines of the box file `f` as `Boxes` of up to `chunk_lines`
+    lines each, so that files of any size can be processed in constant
+    memory.
+    """
+    lineno = 1
+    while True:
+        chunk = list(itertools.islice(f, chunk_lines))
+        if not chunk:
+            return
+        yield Boxes.parse(chunk, lineno)
+        lineno += len(chunk)
+
+
+def read_box_file(filename):
+    """
+    Return all lines of the box file `filename`.
+    """
+    with open(filename, encoding='utf-8') as f:
+        return Boxes.concatenate(read_boxes(f))
+
+
+def write_box_file(filename, boxes):
+    with open(filename, 'w', encoding='utf-8') as f:
+        boxes.write(f)
+
+
+def line_boxes(symbols, width, height, page=0, end_line=True):
+    """
+    Return a box spanning the whole line image for every symbol, followed by
+    a tab box ending the line if `end_line` is set.
+    """
+    symbols = list(symbols)
+    if end_line:
+        symbols.append(TAB)
+    coords = np.zeros((len(symbols), len(COLUMNS)), dtype=np.int32)
+    coords[:, 2] = width
+    coords[:, 3] = height
+    coords[:, 4] = page
+    return Boxes(symbols, coords)
+
+
+def symbol_boxes(symbols, widths, heights, page=0):
+    """
+    Return boxes for symbols placed next to each other from the left edge,
+    bottom-aligned, with the given widths and heights.
+    """
+    widths = np.asarray(widths, dtype=np.int32)
+    coords = np.zeros((len(widths), len(COLUMNS)), dtype=np.int32)
+    coords[:, 2] = np.cumsum(widths)
+    coords[:, 0] = coords[:, 2] - widths
+    coords[:, 3] = heights
+    coords[:, 4] = page
+    return Boxes(symbols, coords)
+
+
+def wordstr_boxes(line, width, height, page=0):
+    """
+    Return a `WordStr` box with the text of a whole line image, followed by a
+    tab box ending the line.
+    """
+    boxes = line_boxes([WORDSTR], width, height, page)
+    boxes.comments = [line, None]
+    return boxes
@@ -0,0 +1,221 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Persistent caches which can be shared between training runs.
+"""
+
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import pathlib
+import queue
+import shutil
+import tempfile
+
+log = logging.getLogger(__name__)
+
+# Files produced by text2image for a single font/exposure combination.
+RENDER_SUFFIXES = ('.tif', '.box', '.fontinfo')
+
+
+def hash_file(filename, chunk_size=1 << 20):
+    """
+    Return the SHA-256 hex digest of the contents of the given file.
+    """
+    digest = hashlib.sha256()
+    with pathlib.Path(filename).open('rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_json(value):
+    """
+    Return the SHA-256 hex digest of a JSON-serializable value.
+    """
+    encoded = json.dumps(value, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def fonts_dir_fingerprint(fonts_dir):
+    """
+    Fingerprint the font files below `fonts_dir` by their paths, sizes and
+    modification times.
+
+    Adding, removing, replacing or touching any font file changes the result.
+    """
+    entries = []
+    for root, dirs, files in os.walk(str(fonts_dir), followlinks=True):
+        dirs.sort()
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append(
+                (
+                    os.path.relpath(path, str(fonts_dir)),
+                    st.st_size,
+                    st.st_mtime_ns,
+                )
+            )
+    return hash_json(entries)
+
+
+def fontconfig_cache_path(cache_dir, fonts_dir):
+    """
+    Return the shared fontconfig cache directory below `cache_dir` for the
+    current contents of `fonts_dir`.
+    """
+    fonts_dir = os.path.abspath(str(fonts_dir))
+    key = hash_json([fonts_dir, fonts_dir_fingerprint(fonts_dir)])
+    return pathlib.Path(cache_dir) / key[:16]
+
+
+def link_or_copy(src, dst):
+    """
+    Hardlink `src` to `dst` if possible, otherwise copy it.
+    """
+    try:
+        os.link(str(src), str(dst))
+    except OSError:
+        shutil.copy2(str(src), str(dst))
+
+
+def clone_fontconfig_cache(src, dst):
+    """
+    Copy an initialized font cache directory.
+
+    The fontconfig cache files are replaced atomically when they are updated,
+    so they are hardlinked where possible. All other files, like the
+    `fonts.conf` which text2image rewrites in place, are copied.
+    """
+
+    def copy_function(src_file, dst_file):
+        if '.cache-' in os.path.basename(src_file):
+            link_or_copy(src_file, dst_file)
+        else:
+            shutil.copy2(src_file, dst_file)
+
+    shutil.copytree(str(src), str(dst), copy_function=copy_function)
+
+
+class FontconfigPool:
+    """
+    A set of private font cache directories, one per concurrent worker.
+
+    Each text2image process checks out a directory for its whole runtime, so
+    no two processes ever share fontconfig cache files or locks.
+    """
+
+    def __init__(self, directories):
+        self._free = queue.Queue()
+        for directory in directories:
+            self._free.put(str(directory))
+
+    @classmethod
+    def clone(cls, font_config_cache, workers_dir, workers):
+        """
+        Seed `workers` copies of `font_config_cache` below `workers_dir`.
+        """
+        workers_dir = pathlib.Path(workers_dir)
+        if workers_dir.exists():
+            shutil.rmtree(str(workers_dir))
+        workers_dir.mkdir(parents=True)
+        directories = []
+        for worker in range(workers):
+            directory = workers_dir / f'worker{worker}'
+            clone_fontconfig_cache(font_config_cache, directory)
+            directories.append(directory)
+        return cls(directories)
+
+    @contextlib.contextmanager
+    def acquire(self):
+        """
+        Check out a font cache directory for exclusive use.
+        """
+        directory = self._free.get()
+        try:
+            yield directory
+        finally:
+            self._free.put(directory)
+
+
+class RenderCache:
+    """
+    Content-addressed on-disk cache of text2image outputs.
+
+    Each entry is a directory named after the key, holding the `.tif`, `.box`
+    and (optionally) `.fontinfo` files of a single render. Entries are published
+    with an atomic rename, so concurrent runs sharing the same cache directory
+    never observe partial entries.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = pathlib.Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _entry(self, key):
+        return self.cache_dir / key[:2] / key
+
+    def restore(self, key, outbase):
+        """
+        Restore the files of the entry `key` next to `outbase`.
+
+        Returns False if there is no such entry.
+        """
+        entry = self._entry(key)
+        try:
+            files = json.loads(
+                (entry / 'files.json').read_text(encoding='utf-8')
+            )
+        except (OSError, ValueError):
+            return False
+        for suffix in files:
+            dst = pathlib.Path(str(outbase) + suffix)
+            if dst.exists():
+                dst.unlink()
+            try:
+                link_or_copy(entry / f'render{suffix}', dst)
+            except OSError as e:
+                log.warning(f'Render cache entry {key} is unusable: {e}')
+                return False
+        return True
+
+    def store(self, key, outbase):
+        """
+        Store the render outputs found next to `outbase` under `key`.
+        """
+        entry = self._entry(key)
+        if entry.exists():
+            return
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        tmp_entry = pathlib.Path(
+            tempfile.mkdtemp(prefix=f'.{key}.', dir=str(entry.parent))
+        )
+        try:
+            files = []
+            for suffix in RENDER_SUFFIXES:
+                src = pathlib.Path(str(outbase) + suffix)
+                if src.exists():
+                    link_or_copy(src, tmp_entry / f'render{suffix}')
+                    files.append(suffix)
+            (tmp_entry / 'files.json').write_text(
+                json.dumps(files), encoding='utf-8'
+            )
+            os.rename(str(tmp_entry), str(entry))
+        except OSError:
+            # Another run published the same entry first, or the cache is not
+            # writable. Either way the render itself succeeded.
+            shutil.rmtree(str(tmp_entry), ignore_errors=True)
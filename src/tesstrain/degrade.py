@@ -0,0 +1,136 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Synthesizing the exposures of a render instead of rendering each of them.
+
+text2image renders every exposure from scratch, although they only differ in
+the degradation applied to the same page images. With
+`--synthesize_exposures`, every font is rendered once without degradation,
+and each exposure is derived from it here, following the steps of
+Tesseract's `DegradeImage`: a 3x3 grey erosion for exposures of 2 and more,
+a 3x3 blur, a brightness offset depending on the exposure, salt and pepper
+noise and a slight brightness ramp across the page.
+
+The text does not move, so the box file of the render is used for all
+exposures. Unlike text2image, the pages are not rotated randomly, and the
+noise comes from a different random generator.
+
+Pages are read, degraded and written one at a time.
+"""
+
+import os
+import pathlib
+import zlib
+
+import numpy as np
+from PIL import Image, ImageSequence, TiffImagePlugin
+
+# Grey level change per exposure step, see `kExposureFactor` in Tesseract.
+EXPOSURE_FACTOR = 16
+
+# Maximum change of a pixel by noise.
+SALT_AND_PEPPER = 5
+
+# Pages at least this large (width plus height) get a brightness ramp.
+MIN_RAMP_SIZE = 1000
+
+
+def iter_pages(tif_file):
+    """
+    Generate the pages of a multi-page TIFF as 8 bit grey arrays, reading one
+    page at a time.
+    """
+    with Image.open(str(tif_file)) as image:
+        for page in ImageSequence.Iterator(image):
+            yield np.asarray(page.convert('L'))
+
+
+def write_pages(tif_file, pages):
+    """
+    Write the 8 bit grey arrays `pages` as a multi-page TIFF, one page at a
+    time, replacing it atomically.
+    """
+    tmp_file = pathlib.Path(f'{tif_file}.tmp')
+    try:
+        with TiffImagePlugin.AppendingTiffWriter(str(tmp_file), True) as tf:
+            for page in pages:
+                Image.fromarray(page, mode='L').save(
+                    tf, format='TIFF', compression='tiff_lzw'
+                )
+                tf.newFrame()
+        os.replace(str(tmp_file), str(tif_file))
+    finally:
+        if tmp_file.exists():
+            tmp_file.unlink()
+
+
+def _neighbourhood(pages, reduce):
+    """
+    Combine every pixel of the `(pages, height, width)` array with its 3x3
+    neighbourhood, replicating the borders.
+    """
+    padded = np.pad(pages, ((0, 0), (1, 1), (1, 1)), mode='edge')
+    rows = reduce(reduce(padded[:, :-2], padded[:, 1:-1]), padded[:, 2:])
+    return reduce(reduce(rows[:, :, :-2], rows[:, :, 1:-1]), rows[:, :, 2:])
+
+
+def blur(pages):
+    """
+    Return the mean of the 3x3 neighbourhood of every pixel.
+    """
+    return _neighbourhood(pages.astype(np.int16), np.add) // 9
+
+
+def degrade(pages, exposure, rng):
+    """
+    Degrade a `(pages, height, width)` array of undegraded grey pages as
+    text2image does for `exposure`. Returns a new `uint8` array.
+    """
+    if exposure >= 2:
+        # Spreads the dark text, as a dark copy would.
+        pages = _neighbourhood(pages, np.minimum)
+    pages = blur(pages)
+
+    # Without erosion, compensate for the blur with a darkening bias.
+    offset = -3 * EXPOSURE_FACTOR if exposure <= 0 else 0
+    offset -= exposure * EXPOSURE_FACTOR
+    pages = pages + offset
+    pages += rng.integers(
+        -SALT_AND_PEPPER,
+        SALT_AND_PEPPER + 1,
+        size=pages.shape,
+        dtype=np.int16,
+    )
+    _, height, width = pages.shape
+    if height + width > MIN_RAMP_SIZE:
+        y, x = np.ogrid[:height, :width]
+        pages -= ((2 * x + y) * 32 // (height + width)).astype(np.int16)
+    return np.clip(pages, 0, 255).astype(np.uint8)
+
+
+def synthesize_exposure(base_tif, tif_file, exposure):
+    """
+    Write the pages of the undegraded render `base_tif` to `tif_file` as
+    rendered with `exposure`.
+
+    The noise is seeded with the name of `tif_file`, so a variant is the
+    same every time it is synthesized.
+    """
+    rng = np.random.default_rng(
+        zlib.crc32(pathlib.Path(tif_file).name.encode())
+    )
+    write_pages(
+        tif_file,
+        (
+            degrade(page[np.newaxis], exposure, rng)[0]
+            for page in iter_pages(base_tif)
+        ),
+    )
@@ -0,0 +1,106 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Limiting the disk usage of the training directory.
+"""
+
+import argparse
+import logging
+import threading
+import time
+
+from tesstrain.plan import format_size
+from tesstrain.report import directory_size
+
+log = logging.getLogger(__name__)
+
+SIZE_UNITS = {'': 1, 'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30, 'T': 1 << 40}
+
+# Seconds for which a measured disk usage is reused.
+USAGE_INTERVAL = 0.5
+
+
+def parse_size(text):
+    """
+    Parse a size in bytes with an optional unit, e.g. `500M` or `20G`.
+    """
+    text = str(text).strip().upper()
+    if text.endswith('IB'):
+        text = text[:-2]
+    elif text.endswith('B'):
+        text = text[:-1]
+    unit = text[-1:] if text[-1:] in SIZE_UNITS else ''
+    try:
+        size = float(text[: len(text) - len(unit)]) * SIZE_UNITS[unit]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'invalid size: {text!r}') from None
+    if size <= 0:
+        raise argparse.ArgumentTypeError(f'size must be positive: {text!r}')
+    return int(size)
+
+
+class DiskBudget:
+    """
+    Admission control keeping the size of `directory` below `limit` bytes.
+
+    Jobs of `pool` are only started while the current usage plus the
+    expected output of the running and the new job fit into the limit. The
+    expected output starts at `job_bytes` and grows to the largest output
+    reported with `observe`. The scheduler starts a job regardless if nothing
+    else is running, so a budget which is too small slows a run down but
+    does not stop it.
+    """
+
+    def __init__(self, directory, limit, job_bytes, pool='render'):
+        self.directory = directory
+        self.limit = limit
+        self.job_bytes = job_bytes
+        self.pool = pool
+        self._lock = threading.Lock()
+        self._usage = None
+        self._measured = 0.0
+        self._throttled = False
+
+    def usage(self):
+        """
+        Return the size of `directory`, measured at most every
+        `USAGE_INTERVAL` seconds.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self._usage is None or now - self._measured > USAGE_INTERVAL:
+                self._usage = directory_size(self.directory)
+                self._measured = now
+            return self._usage
+
+    def observe(self, nbytes):
+        """
+        Record the size of the output of a finished job.
+        """
+        with self._lock:
+            self.job_bytes = max(self.job_bytes, nbytes)
+
+    def admit(self, task, running):
+        """
+        Return whether `task` may start while `running` jobs of its pool are
+        running.
+        """
+        if task.pool != self.pool:
+            return True
+        expected = self.usage() + (running + 1) * self.job_bytes
+        admitted = expected <= self.limit
+        if not admitted and not self._throttled:
+            log.info(
+                f'Disk budget of {format_size(self.limit)} nearly used, '
+                'delaying new renders'
+            )
+        self._throttled = not admitted
+        return admitted
@@ -0,0 +1,296 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Execution of the jobs of a training run on an asyncio event loop.
+"""
+
+import asyncio
+import collections
+import concurrent.futures
+import contextvars
+import functools
+import heapq
+import inspect
+import itertools
+import logging
+import pathlib
+import subprocess
+import time
+
+from tesstrain.runner import (
+    CommandFailed,
+    JobCancelled,
+    current_job,
+    runner,
+)
+from tesstrain.scheduler import JobsFailed
+
+log = logging.getLogger(__name__)
+
+# Programs with their own concurrency limit; all others share the 'other'
+# limit.
+TOOL_CLASSES = ('text2image', 'tesseract')
+
+# Number of admitted jobs per program slot. Admitted jobs wait for a free slot
+# of the program they run, so this bounds how far the engine runs ahead.
+PENDING_JOBS_PER_SLOT = 4
+
+# Threads running the code of jobs between their programs.
+STEP_WORKERS = 4
+
+
+def tool_class(cmd):
+    name = pathlib.Path(cmd).name
+    return name if name in TOOL_CLASSES else 'other'
+
+
+def _advance(steps, method, value):
+    """
+    Resume the job `steps` with `method` (`send` or `throw`) and `value`.
+
+    Returns whether the job finished and its next `Command` or its result,
+    as StopIteration cannot be passed through a future.
+    """
+    try:
+        return False, getattr(steps, method)(value)
+    except StopIteration as stop:
+        return True, stop.value
+
+
+class AsyncEngine:
+    """
+    Runs a `TaskGraph` on an event loop instead of a thread per job.
+
+    Jobs written as generators of `Command`s run their programs with
+    `asyncio.create_subprocess_exec`, which are awaited by the loop's child
+    watcher. The code between their programs, which may block on files, runs
+    in a pool of `step_workers` threads. Other jobs run in a thread of
+    `executor`. Every program waits for a slot of its tool class (see
+    `TOOL_CLASSES`), while the number of admitted jobs is bounded by
+    `max_pending` and by the pool limits of the graph, so that runnable jobs
+    of a higher priority are not starved by a backlog of others.
+
+    When a job fails, the other jobs are cancelled and their programs are
+    terminated. `JobsFailed` is raised with all failures.
+
+    Programs are reaped by the loop, so only their wall time is recorded;
+    CPU time and peak memory are left to the per-phase totals of the report.
+    """
+
+    def __init__(
+        self,
+        limits,
+        max_pending=None,
+        command_runner=None,
+        executor=None,
+        step_workers=STEP_WORKERS,
+    ):
+        self.limits = dict(limits)
+        self.max_pending = max_pending or PENDING_JOBS_PER_SLOT * sum(
+            self.limits.values()
+        )
+        self.runner = command_runner or runner
+        # Thread pool of jobs which are plain functions, the loop's default
+        # if None.
+        self.executor = executor
+        self.step_workers = step_workers
+        self._semaphores = None
+        self._step_executor = None
+
+    def run(self, graph, pool_limits=None, progress=None, admit=None):
+        """
+        Run all jobs of `graph`, see `TaskGraph.run`.
+        """
+        return asyncio.run(
+            self._run_graph(graph, pool_limits, progress, admit)
+        )
+
+    async def _run_graph(self, graph, pool_limits, progress, admit):
+        self._semaphores = {
+            tool: asyncio.Semaphore(limit)
+            for tool, limit in self.limits.items()
+        }
+        # Steps must not wait for each other: a step waiting for a font
+        # cache directory never blocks, as the render pool limit is the
+        # number of directories.
+        self._step_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.step_workers, thread_name_prefix='tesstrain-step'
+        )
+        try:
+            await self._schedule(graph, pool_limits, progress, admit)
+        finally:
+            self._step_executor.shutdown()
+
+    async def _schedule(self, graph, pool_limits, progress, admit):
+        pool_limits = pool_limits or {}
+        counter = itertools.count()
+        ready = []
+
+        def make_ready(task):
+            heapq.heappush(ready, (-task.priority, next(counter), task))
+
+        for task in graph.tasks.values():
+            if task.waiting == 0:
+                make_ready(task)
+
+        running = {}
+        pool_running = collections.Counter()
+        failures = []
+        finished = 0
+        stopping = False
+        try:
+            while (ready and not stopping) or running:
+                deferred = []
+                while (
+                    ready and not stopping and len(running) < self.max_pending
+                ):
+                    item = heapq.heappop(ready)
+                    task = item[-1]
+                    limit = pool_limits.get(task.pool)
+                    if limit is not None and pool_running[task.pool] >= limit:
+                        deferred.append(item)
+                        continue
+                    if (
+                        admit
+                        and running
+                        and not admit(task, pool_running[task.pool])
+                    ):
+                        deferred.append(item)
+                        continue
+                    running[asyncio.ensure_future(self._run_task(task))] = task
+                    pool_running[task.pool] += 1
+                for item in deferred:
+                    heapq.heappush(ready, item)
+
+                done, _ = await asyncio.wait(
+                    running, return_when=asyncio.FIRST_COMPLETED
+                )
+                for future in done:
+                    task = running.pop(future)
+                    pool_running[task.pool] -= 1
+                    exc = (
+                        JobCancelled()
+                        if future.cancelled()
+                        else future.exception()
+                    )
+                    if exc is not None:
+                        if not isinstance(exc, JobCancelled):
+                            failures.append((task.name, exc))
+                        if not stopping:
+                            stopping = True
+                            log.error('Cancelling the remaining jobs')
+                            for other in running:
+                                other.cancel()
+                        continue
+                    finished += 1
+                    log.debug(f'Finished {task.name}')
+                    if progress:
+                        progress(task.name)
+                    for dependent in task.dependents:
+                        dependent.waiting -= 1
+                        if dependent.waiting == 0:
+                            make_ready(dependent)
+        finally:
+            for future in running:
+                future.cancel()
+            if running:
+                await asyncio.wait(running)
+
+        if finished < len(graph.tasks):
+            raise JobsFailed(
+                failures, len(graph.tasks) - finished - len(failures)
+            )
+
+    async def _run_task(self, task):
+        # Every asyncio task has its own context.
+        current_job.set(task.name)
+        try:
+            if inspect.isgeneratorfunction(task.fn):
+                return await self._run_steps(
+                    task.fn(*task.args, **task.kwargs)
+                )
+            loop = asyncio.get_event_loop()
+            return await loop.run_in_executor(
+                self.executor,
+                functools.partial(
+                    contextvars.copy_context().run,
+                    task.fn,
+                    *task.args,
+                    **task.kwargs,
+                ),
+            )
+        except asyncio.CancelledError:
+            raise JobCancelled(f'{task.name} was cancelled')
+
+    async def _step(self, steps, method, value=None):
+        """
+        Run the code of the job `steps` up to its next `Command` in the step
+        pool, see `_advance`.
+        """
+        loop = asyncio.get_event_loop()
+        future = loop.run_in_executor(
+            self._step_executor, _advance, steps, method, value
+        )
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            # A running step cannot be interrupted. Let it finish, so that
+            # the job can be closed and release what it holds.
+            await asyncio.wait([future])
+            raise
+
+    async def _run_steps(self, steps):
+        """
+        Run a job written as a generator of `Command`s, see `run_steps`.
+        """
+        try:
+            done, value = await self._step(steps, 'send')
+            while not done:
+                try:
+                    stats = await self._run_command(value)
+                    if stats.returncode != 0:
+                        raise CommandFailed(stats)
+                except Exception as exc:
+                    done, value = await self._step(steps, 'throw', exc)
+                else:
+                    done, value = await self._step(steps, 'send', stats)
+            return value
+        finally:
+            steps.close()
+
+    async def _run_command(self, command):
+        program, args = self.runner.prepare(command.cmd, command.args)
+        async with self._semaphores[tool_class(command.cmd)]:
+            job, log_file, output = self.runner.open_log(command.cmd)
+            with output:
+                start = time.monotonic()
+                proc = await asyncio.create_subprocess_exec(
+                    program,
+                    *args,
+                    stdout=output,
+                    stderr=subprocess.STDOUT,
+                    env=command.env,
+                )
+                try:
+                    returncode = await proc.wait()
+                except asyncio.CancelledError:
+                    try:
+                        proc.terminate()
+                    except ProcessLookupError:
+                        pass
+                    await proc.wait()
+                    raise
+                wall_time = time.monotonic() - start
+                if returncode != 0:
+                    self.runner.log_failure(program, log_file, output)
+        return self.runner.record(
+            program, args, returncode, wall_time, None, log_file
+        )
@@ -0,0 +1,39 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Errors raised by a training run.
+"""
+
+
+class TesstrainError(Exception):
+    """
+    Base class of all errors which end a training run.
+    """
+
+
+class ConfigurationError(TesstrainError, ValueError):
+    """
+    The arguments of a run are missing or invalid.
+
+    It is a ValueError as well, which was raised for unknown languages before.
+    """
+
+
+class InputError(TesstrainError):
+    """
+    An input file or font of a run is missing or unreadable.
+    """
+
+
+class JobError(TesstrainError):
+    """
+    A training program is missing, failed or produced invalid output.
+    """
@@ -0,0 +1,259 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Index of the fonts available to text2image.
+"""
+
+import logging
+import os
+import pathlib
+import re
+import shutil
+import subprocess
+import tempfile
+
+from tesstrain.cache import fonts_dir_fingerprint
+from tesstrain.exceptions import InputError, JobError
+from tesstrain.generate import err_exit
+from tesstrain.manifest import write_atomic
+from tesstrain.runner import resolve_command
+
+log = logging.getLogger(__name__)
+
+# Name of the font index file in a font cache directory.
+FONT_INDEX_FILE = 'available_fonts.txt'
+
+_LISTING_RE = re.compile(r'^\s*\d+:\s*(.+?)\s*$')
+
+# Fields printed by fc-list and fc-scan for every font file.
+FC_FORMAT = '%{family}\t%{style}\t%{file}\n'
+
+# Styles which Pango leaves out of font names, e.g. `Arial` for Arial Regular.
+DEFAULT_STYLES = {'regular', 'normal', 'book', 'roman'}
+
+
+def normalize_font_name(font):
+    """
+    Normalize a font name for lookups.
+
+    text2image lists some fonts with a trailing comma (e.g. `Times New Roman,`)
+    and fontconfig matches family names case-insensitively, so neither commas,
+    case nor repeated whitespace are significant.
+    """
+    return ' '.join(font.replace(',', ' ').split()).casefold()
+
+
+class FontIndex:
+    """
+    Set of font names available to text2image with O(1) lookups.
+    """
+
+    def __init__(self, fonts):
+        self.fonts = list(fonts)
+        self._names = {normalize_font_name(font) for font in self.fonts}
+
+    def __contains__(self, font):
+        return normalize_font_name(font) in self._names
+
+    def __len__(self):
+        return len(self.fonts)
+
+    def missing(self, fonts):
+        """
+        Return the fonts from `fonts` which are not available, in order.
+        """
+        return [font for font in dict.fromkeys(fonts) if font not in self]
+
+    @classmethod
+    def from_listing(cls, text):
+        """
+        Parse the output of `text2image --list_available_fonts`.
+        """
+        fonts = []
+        for line in text.splitlines():
+            match = _LISTING_RE.match(line)
+            if match:
+                fonts.append(match.group(1))
+        return cls(fonts)
+
+
+def list_available_fonts(fonts_dir, fontconfig_tmpdir):
+    """
+    Return the output of a single `text2image --list_available_fonts` call.
+    """
+    cmd = resolve_command('text2image')
+    if not cmd:
+        err_exit('text2image not found', JobError)
+    proc = subprocess.run(
+        [
+            cmd,
+            '--list_available_fonts',
+            f'--fonts_dir={fonts_dir}',
+            f'--fontconfig_tmpdir={fontconfig_tmpdir}',
+        ],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+    )
+    if proc.returncode != 0:
+        err_exit(
+            f'Listing the fonts in {fonts_dir} failed with return code '
+            f'{proc.returncode}',
+            JobError,
+        )
+    return proc.stdout.decode('utf-8', errors='replace')
+
+
+def list_font_files(ctx):
+    """
+    Return the font files in `ctx.fonts_dir` by normalized font name.
+
+    The fonts are listed from the font cache if text2image has initialized
+    it, and scanned otherwise. Returns an empty dict if fontconfig's tools
+    are not available.
+    """
+    fonts_conf = pathlib.Path(ctx.font_config_cache) / 'fonts.conf'
+    if fonts_conf.exists():
+        cmd = [resolve_command('fc-list'), '--format', FC_FORMAT]
+        env = dict(os.environ, FONTCONFIG_FILE=str(fonts_conf))
+    else:
+        cmd = [resolve_command('fc-scan'), '--format', FC_FORMAT]
+        cmd.append(str(ctx.fonts_dir))
+        env = None
+    if not cmd[0]:
+        return {}
+    proc = subprocess.run(
+        cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, env=env
+    )
+    if proc.returncode != 0:
+        return {}
+
+    files = {}
+    for line in proc.stdout.decode('utf-8', errors='replace').splitlines():
+        fields = line.split('\t')
+        if len(fields) != 3:
+            continue
+        families, styles, path = fields
+        for family in families.split(','):
+            for style in styles.split(','):
+                names = [f'{family} {style}']
+                if style.casefold() in DEFAULT_STYLES:
+                    names.append(family)
+                for name in names:
+                    files.setdefault(normalize_font_name(name), set()).add(
+                        path
+                    )
+    return files
+
+
+def font_fingerprints(ctx, fonts):
+    """
+    Return a fingerprint of the font files each of `fonts` is rendered from,
+    by their paths, sizes and modification times.
+
+    Fonts whose files cannot be determined are fingerprinted by the whole
+    `ctx.fonts_dir` instead.
+    """
+    font_files = list_font_files(ctx)
+    fonts_dir = str(ctx.fonts_dir)
+    dir_fingerprint = None
+    fingerprints = {}
+    for font in fonts:
+        entries = []
+        for path in sorted(font_files.get(normalize_font_name(font), ())):
+            try:
+                st = os.stat(path)
+            except OSError:
+                entries = []
+                break
+            entries.append(
+                (os.path.relpath(path, fonts_dir), st.st_size, st.st_mtime_ns)
+            )
+        if entries:
+            fingerprints[font] = {'files': entries}
+            continue
+        log.debug(f'No font file found for {font}, using all of {fonts_dir}')
+        if dir_fingerprint is None:
+            dir_fingerprint = fonts_dir_fingerprint(fonts_dir)
+        fingerprints[font] = {'fonts_dir': dir_fingerprint}
+    return fingerprints
+
+
+def font_index_path(ctx):
+    """
+    Return where the font index belonging to the font cache is stored.
+    """
+    cache = pathlib.Path(ctx.font_config_cache)
+    if ctx.fontconfig_cache_dir:
+        # A shared font cache may only be populated by its initialization,
+        # so keep the index next to it.
+        return cache.with_name(f'{cache.name}.{FONT_INDEX_FILE}')
+    return cache / FONT_INDEX_FILE
+
+
+def load_font_index(ctx):
+    """
+    Return the font index for `ctx.fonts_dir`, listing the fonts only if no
+    index has been stored with the font cache yet.
+
+    The index starts with a fingerprint of the font files, so it is listed
+    again if fonts were added, removed or changed since, e.g. in a persistent
+    work directory.
+    """
+    if ctx.font_index is not None:
+        return ctx.font_index
+
+    index_file = font_index_path(ctx)
+    header = f'# {fonts_dir_fingerprint(ctx.fonts_dir)}\n'
+    try:
+        listing = index_file.read_text(encoding='utf-8')
+    except FileNotFoundError:
+        listing = None
+    if listing is None or not listing.startswith(header):
+        log.info(f'Indexing available fonts in {ctx.fonts_dir}')
+        if ctx.fontconfig_cache_dir:
+            tmpdir = tempfile.mkdtemp(prefix='font_index')
+            try:
+                listing = list_available_fonts(ctx.fonts_dir, tmpdir)
+            finally:
+                shutil.rmtree(tmpdir, ignore_errors=True)
+        else:
+            listing = list_available_fonts(
+                ctx.fonts_dir, ctx.font_config_cache
+            )
+        listing = header + listing
+        index_file.parent.mkdir(parents=True, exist_ok=True)
+        write_atomic(index_file, listing)
+
+    ctx.font_index = FontIndex.from_listing(listing)
+    log.debug(f'{len(ctx.font_index)} fonts available')
+    return ctx.font_index
+
+
+def check_fonts(ctx, fonts):
+    """
+    Abort if any of `fonts` is not available in `ctx.fonts_dir`, naming all of
+    the missing fonts at once.
+    """
+    if not ctx.check_fonts or not fonts:
+        return
+    font_index = load_font_index(ctx)
+    if not font_index:
+        log.warning(f'Found no fonts in {ctx.fonts_dir}, skipping font check')
+        return
+    missing = font_index.missing(fonts)
+    if missing:
+        err_exit(
+            f'Fonts not available in {ctx.fonts_dir}: '
+            + ', '.join(repr(font) for font in missing)
+            + '. Run text2image --list_available_fonts '
+            f'--fonts_dir={ctx.fonts_dir} to list the available fonts.',
+            InputError,
+        )
@@ -17,63 +17,131 @@ For a detailed description of the phases, see
 https://tesseract-ocr.github.io/tessdoc/Training-Tesseract.html.
 """
 
-import concurrent.futures
+import contextlib
+import json
 import logging
 import os
 import pathlib
 import shutil
 import subprocess
-import sys
-from operator import itemgetter
+import tempfile
+from functools import lru_cache
 
 from tqdm import tqdm
 
-from tesstrain.language_specific import VERTICAL_FONTS
+from tesstrain.cache import (
+    RENDER_SUFFIXES,
+    FontconfigPool,
+    fonts_dir_fingerprint,
+    hash_file,
+    hash_json,
+    link_or_copy,
+)
+from tesstrain.exceptions import InputError, JobError, TesstrainError
+from tesstrain.manifest import file_signature, write_atomic
+from tesstrain.ngrams import write_train_ngrams
+from tesstrain.runner import (
+    Command,
+    CommandFailed,
+    resolve_command,
+    run_steps,
+    runner,
+)
+from tesstrain.scheduler import JobsFailed, TaskGraph
+from tesstrain.verify import require_outputs, verify_outputs
 
 log = logging.getLogger(__name__)
 
+# Marker file of a completely initialized shared font cache.
+FONTCONFIG_READY = '.initialized'
 
-def err_exit(msg):
+# Maximum number of unicharsets merged by one merge_unicharsets invocation.
+MERGE_CHUNK_SIZE = 64
+
+
+def err_exit(msg, error=TesstrainError):
+    """
+    Log `msg` and end the run by raising `error`, a `TesstrainError`.
+    """
     log.critical(msg)
-    sys.exit(1)
+    raise error(msg)
 
 
 def run_command(cmd, *args, env=None):
     """
-    Helper function to run a command and append its output to a log. Aborts early if
-    the program file is not found.
-    """
-    for d in ('', 'api/', 'training/'):
-        testcmd = shutil.which(f'{d}{cmd}')
-        if shutil.which(testcmd):
-            cmd = testcmd
-            break
-    if not shutil.which(cmd):
-        err_exit(f'{cmd} not found')
-
-    log.debug(f'Running {cmd}')
-    args = list(args)
-    for idx, arg in enumerate(args):
-        log.debug(arg)
-        # Workaround for https://bugs.python.org/issue33617
-        # TypeError: argument of type 'WindowsPath' is not iterable
-        if isinstance(arg, pathlib.WindowsPath):
-            args[idx] = str(arg)
-
-    proc = subprocess.run(
-        [cmd, *args], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, env=env
-    )
-    proclog = logging.getLogger(cmd)
-    if proc.returncode == 0:
-        proclog.debug(proc.stdout.decode('utf-8', errors='replace'))
-    else:
+    Helper function to run a command and log its output to a per-job log file. Aborts
+    early if the program file is not found and raises CommandFailed if the program
+    fails.
+    """
+    try:
+        stats = runner.run(cmd, *args, env=env)
+    except FileNotFoundError as e:
+        err_exit(str(e), JobError)
+    if stats.returncode != 0:
+        raise CommandFailed(stats)
+    return stats
+
+
+def run_jobs(ctx, graph, description, max_workers, pool_limits):
+    """
+    Run the jobs of `graph` with the engine selected by `ctx.engine`.
+
+    The first failure cancels the pending jobs and terminates running programs;
+    all failures are then reported together. With a disk budget, renders are
+    only started while the training directory has room for their output.
+    """
+    admit = ctx.disk_admission.admit if ctx.disk_admission else None
+    with tqdm(total=len(graph)) as pbar:
+
+        def progress(name):
+            pbar.update(1)
+
         try:
-            proclog.error(proc.stdout.decode('utf-8', errors='replace'))
-        except Exception as e:
-            proclog.error(e)
-        err_exit(
-            f'Program {cmd} failed with return code {proc.returncode}. Abort.'
+            if ctx.engine == 'asyncio':
+                # asyncio is only imported when it is used.
+                from tesstrain.engine import AsyncEngine
+
+                engine = AsyncEngine(
+                    {
+                        'text2image': ctx.render_jobs,
+                        'tesseract': ctx.extract_jobs,
+                        'other': ctx.jobs,
+                    },
+                    executor=ctx.executor,
+                )
+                engine.run(graph, pool_limits, progress=progress, admit=admit)
+            else:
+                graph.run(
+                    max_workers,
+                    pool_limits,
+                    progress=progress,
+                    on_failure=runner.cancel,
+                    admit=admit,
+                    executor=ctx.executor,
+                )
+        except JobsFailed as exc:
+            err_exit(f'Failed while {description}: {exc}', JobError)
+        finally:
+            runner.reset()
+
+
+@lru_cache(maxsize=None)
+def text2image_version():
+    """
+    Return the version string reported by text2image, or an empty string.
+    """
+    cmd = resolve_command('text2image')
+    if not cmd:
+        return ''
+    try:
+        proc = subprocess.run(
+            [cmd, '--version'],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
         )
+    except OSError:
+        return ''
+    return proc.stdout.decode('utf-8', errors='replace').strip()
 
 
 def check_file_readable(*filenames):
@@ -89,109 +157,647 @@ def check_file_readable(*filenames):
             with pathlib.Path(filename).open():
                 pass
         except FileNotFoundError:
-            err_exit(f"Required/expected file '{filename}' does not exist")
+            err_exit(
+                f"Required/expected file '{filename}' does not exist",
+                InputError,
+            )
         except PermissionError:
-            err_exit(f'{filename} is not readable')
+            err_exit(f'{filename} is not readable', InputError)
         except IOError as e:
-            err_exit(f'{filename} IO Error: {str(e)}')
+            err_exit(f'{filename} IO Error: {str(e)}', InputError)
     return True
 
 
+def check_outputs(filenames, description):
+    """
+    Check all the files produced by a phase at once, or exit listing every
+    problem found.
+    """
+    problems = verify_outputs(filenames)
+    if problems:
+        err_exit(
+            f'{len(problems)} problem(s) with the {description}:\n  '
+            + '\n  '.join(problems),
+            JobError,
+        )
+
+
+def record_outputs(ctx, *filenames):
+    """
+    Count the sizes of files written by a job in the performance report.
+    """
+    if ctx.report:
+        ctx.report.add_written(
+            sum(os.path.getsize(str(filename)) for filename in filenames)
+        )
+
+
 def cleanup(ctx):
-    if os.path.exists(ctx.log_file):
+    if ctx.manifest:
+        ctx.manifest.close()
+    if os.path.exists(ctx.log_file) and os.path.isdir(ctx.output_dir):
         shutil.copy(ctx.log_file, ctx.output_dir)
-    shutil.rmtree(ctx.training_dir)
+    if ctx.work_dir:
+        # The work directory is kept so that later runs can resume from it.
+        return
+    shutil.rmtree(ctx.training_dir, ignore_errors=True)
+
+
+def initialize_shared_fontconfig(ctx):
+    """
+    Initialize a font cache directory which is shared between runs.
+
+    The cache is built in a private directory and then published with an atomic
+    rename, so parallel runs never use a partially initialized cache. If
+    another run publishes the same cache first, ours is discarded.
+    """
+    cache = pathlib.Path(ctx.font_config_cache)
+    if (cache / FONTCONFIG_READY).exists():
+        log.info(f'Using initialized font cache {cache}')
+        return
+    cache.parent.mkdir(parents=True, exist_ok=True)
+    tmp_cache = pathlib.Path(
+        tempfile.mkdtemp(prefix=f'.{cache.name}.', dir=str(cache.parent))
+    )
+    try:
+        sample_path = tmp_cache / 'sample_text.txt'
+        sample_path.write_text('Text\n')
+        log.info(f'Testing font: {ctx.fonts[0]}')
+        run_command(
+            'text2image',
+            f'--fonts_dir={ctx.fonts_dir}',
+            f'--font={ctx.fonts[0]}',
+            f'--outputbase={sample_path}',
+            f'--text={sample_path}',
+            f'--fontconfig_tmpdir={tmp_cache}',
+            f'--ptsize={ctx.ptsize}',
+        )
+        (tmp_cache / FONTCONFIG_READY).touch()
+        os.rename(str(tmp_cache), str(cache))
+        log.info(f'Initialized font cache {cache}')
+    except OSError:
+        if not (cache / FONTCONFIG_READY).exists():
+            raise
+    finally:
+        shutil.rmtree(str(tmp_cache), ignore_errors=True)
 
 
 def initialize_fontconfig(ctx):
     """
     Initialize the font configuration with a unique font cache directory.
     """
+    if ctx.fontconfig_cache_dir:
+        initialize_shared_fontconfig(ctx)
+        return
+
     sample_path = pathlib.Path(ctx.font_config_cache) / 'sample_text.txt'
-    pathlib.Path(sample_path).write_text('Text\n')
-    log.info(f'Testing font: {ctx.fonts[0]}')
-    run_command(
-        'text2image',
+    args = [
         f'--fonts_dir={ctx.fonts_dir}',
         f'--font={ctx.fonts[0]}',
         f'--outputbase={sample_path}',
         f'--text={sample_path}',
         f'--fontconfig_tmpdir={ctx.font_config_cache}',
         f'--ptsize={ctx.ptsize}',
+    ]
+    inputs_hash = None
+    if ctx.manifest:
+        inputs_hash = hash_json(
+            {'args': args, 'fonts': fonts_dir_fingerprint(ctx.fonts_dir)}
+        )
+        if ctx.manifest.is_complete('fontconfig', inputs_hash):
+            log.info('Font configuration already initialized')
+            return
+
+    pathlib.Path(sample_path).write_text('Text\n')
+    log.info(f'Testing font: {ctx.fonts[0]}')
+    run_command('text2image', *args)
+    record_outputs(ctx, str(sample_path) + '.tif')
+
+    if ctx.manifest:
+        ctx.manifest.record(
+            'fontconfig', inputs_hash, [str(sample_path) + '.tif']
+        )
+
+
+def prepare_fontconfig_workers(ctx):
+    """
+    Seed a private copy of the initialized font cache for every rendering
+    worker, if requested.
+    """
+    if not ctx.fontconfig_per_worker:
+        return
+    workers_dir = pathlib.Path(ctx.training_dir) / 'fontconfig_workers'
+    ctx.fontconfig_pool = FontconfigPool.clone(
+        ctx.font_config_cache, workers_dir, ctx.render_jobs
     )
+    log.info(f'Seeded {ctx.render_jobs} font caches in {workers_dir}')
+
+
+@contextlib.contextmanager
+def fontconfig_slot(ctx):
+    """
+    Yield the font cache directory to use for one text2image invocation.
+    """
+    if ctx.fontconfig_pool:
+        with ctx.fontconfig_pool.acquire() as font_config_cache:
+            yield font_config_cache
+    else:
+        yield ctx.font_config_cache
 
 
 def make_fontname(font):
     return font.replace(' ', '_').replace(',', '')
 
 
-def make_outbase(ctx, fontname, exposure):
-    return (
+def shard_fonts(ctx, exposure):
+    """
+    Return the fonts to render with `exposure`: all of them, or with
+    `--shard` only those assigned to this shard.
+    """
+    if ctx.shard_jobs is None:
+        return ctx.fonts
+    return [
+        font for font in ctx.fonts if (font, str(exposure)) in ctx.shard_jobs
+    ]
+
+
+def make_outbase(ctx, fontname, exposure, shard=None):
+    outbase = (
         pathlib.Path(ctx.training_dir)
         / f'{ctx.lang_code}.{fontname}.exp{exposure}'
     )
+    if shard is not None:
+        outbase = outbase.with_name(f'{outbase.name}.shard{shard}')
+    return outbase
+
+
+def base_outbase(ctx, fontname, shard=None):
+    """
+    Return the output base of the undegraded render of a font, from which its
+    exposures are synthesized. It is kept in a subdirectory so that it is not
+    mistaken for a rendered exposure.
+    """
+    outbase = (
+        pathlib.Path(ctx.training_dir)
+        / 'base'
+        / f'{ctx.lang_code}.{fontname}.base'
+    )
+    if shard is not None:
+        outbase = outbase.with_name(f'{outbase.name}.shard{shard}')
+    return outbase
 
 
-def generate_font_image(ctx, font, exposure, char_spacing):
+def split_training_text(ctx):
+    """
+    Split the training text into `ctx.render_shards` line-aligned parts of
+    similar size, which can be rendered concurrently.
+
+    Returns a list of `(shard, text file)` pairs. Without sharding the only
+    entry is `(None, ctx.training_text)`.
+    """
+    if not ctx.render_shards or ctx.render_shards <= 1:
+        return [(None, ctx.training_text)]
+
+    lines = (
+        pathlib.Path(ctx.training_text)
+        .read_text(encoding='utf-8')
+        .splitlines(keepends=True)
+    )
+    num_shards = min(ctx.render_shards, len(lines))
+    target = sum(map(len, lines)) / num_shards
+    parts = [[] for _ in range(num_shards)]
+    shard = 0
+    size = 0
+    for idx, line in enumerate(lines):
+        # Move on once the current part is full, but leave at least one line
+        # for every remaining part.
+        remaining_lines = len(lines) - idx
+        remaining_parts = num_shards - shard - 1
+        if parts[shard] and (
+            size >= target or remaining_lines <= remaining_parts
+        ):
+            shard += 1
+            size = 0
+        parts[shard].append(line)
+        size += len(line)
+
+    shards = []
+    for shard, part in enumerate(parts):
+        text = (
+            pathlib.Path(ctx.training_dir)
+            / f'{ctx.lang_code}.training_text.shard{shard}'
+        )
+        text.write_text(''.join(part), encoding='utf-8')
+        shards.append((shard, text))
+    log.info(f'Rendering the training text in {len(shards)} shards')
+    return shards
+
+
+def render_cache_inputs(ctx):
+    """
+    Collect the inputs of the render cache keys once per phase.
+
+    Each font is keyed on the font files it is rendered from (see
+    `render_cache_key`), so adding or updating other fonts in the fonts
+    directory keeps its cached renders valid.
+    """
+    from tesstrain.fonts import font_fingerprints
+
+    use_ngrams = (
+        ctx.extract_font_properties
+        and pathlib.Path(ctx.train_ngrams_file).exists()
+    )
+    return {
+        'text2image': text2image_version(),
+        'fonts': font_fingerprints(ctx, ctx.fonts),
+        'training_text': hash_file(ctx.training_text),
+        'train_ngrams': (
+            hash_file(ctx.train_ngrams_file) if use_ngrams else None
+        ),
+    }
+
+
+def render_cache_key(cache_inputs, font, args):
+    """
+    Compute the render cache key of a text2image invocation with `font`.
+
+    Arguments naming run-specific locations are left out; the contents of the
+    text files are part of `cache_inputs` instead. Of the fonts, only the
+    fingerprint of `font` is part of the key.
+    """
+    run_specific = ('--outputbase=', '--fontconfig_tmpdir=', '--text=')
+    stable_args = [
+        arg for arg in map(str, args) if not arg.startswith(run_specific)
+    ]
+    inputs = dict(cache_inputs, fonts=cache_inputs['fonts'][font])
+    return hash_json({'inputs': inputs, 'args': stable_args})
+
+
+def generate_font_image(
+    ctx,
+    font,
+    exposure,
+    char_spacing,
+    cache_inputs=None,
+    shard=None,
+    text=None,
+    base=False,
+):
     """
     Helper function for `phaseI_generate_image`.
 
-    Generates the image for a single language/font combination in a way that can be run
-    in parallel.
+    Generates the image for a single language/font combination, see
+    `font_image_steps`.
+    """
+    return run_steps(
+        font_image_steps(
+            ctx, font, exposure, char_spacing, cache_inputs, shard, text, base
+        )
+    )
+
+
+def font_image_steps(
+    ctx,
+    font,
+    exposure,
+    char_spacing,
+    cache_inputs=None,
+    shard=None,
+    text=None,
+    base=False,
+):
+    """
+    Job generating the image for a single language/font combination in a way that can be run
+    in parallel. If a render cache is configured and `cache_inputs` is given, an
+    identical earlier render is restored instead of invoking text2image. In a
+    resumable run, renders already completed in the work directory are skipped.
+
+    If `shard` is given, only the part of the training text in `text` is
+    rendered, and font properties are extracted for the first shard only.
+
+    With `base`, the font is rendered without any degradation, as the source
+    of the exposures synthesized by `synthesize_image`.
     """
-    log.info(f'Rendering using {font}')
     fontname = make_fontname(font)
-    outbase = make_outbase(ctx, fontname, exposure)
+    outbase = make_outbase(ctx, fontname, exposure, shard)
+    if base:
+        outbase = base_outbase(ctx, fontname, shard)
+        outbase.parent.mkdir(exist_ok=True)
+    max_pages = ctx.max_pages
+    if shard is None:
+        text = ctx.training_text
+    elif max_pages > 0:
+        max_pages = -(-max_pages // len(ctx.render_shard_texts))
+    label = f'{font} (exposure {exposure})'
+    if shard is not None:
+        label = f'{font} (exposure {exposure}, shard {shard})'
+    if base:
+        label = label.replace(f'exposure {exposure}', 'undegraded')
 
     common_args = [
-        f'--fontconfig_tmpdir={ctx.font_config_cache}',
         f'--fonts_dir={ctx.fonts_dir}',
         f'--strip_unrenderable_words',
         f'--leading={ctx.leading}',
         f'--char_spacing={char_spacing}',
         f'--exposure={exposure}',
         f'--outputbase={outbase}',
-        f'--max_pages={ctx.max_pages}',
+        f'--max_pages={max_pages}',
     ]
 
+    if base:
+        common_args.append('--degrade_image=false')
     if ctx.distort_image:
         common_args.append('--distort_image')
 
+    from tesstrain.font_tables import VERTICAL_FONTS
+
     # add --writing_mode=vertical-upright to common_args if the font is
     # specified to be rendered vertically.
     vertical_fonts = ctx.vertical_fonts or VERTICAL_FONTS
     if font in vertical_fonts:
         common_args.append('--writing_mode=vertical-upright')
 
-    run_command(
-        'text2image',
+    render_args = [
         *common_args,
         f'--font={font}',
-        f'--text={ctx.training_text}',
+        f'--text={text}',
         f'--ptsize={ctx.ptsize}',
         *ctx.text2image_extra_args,
-    )
+    ]
 
-    check_file_readable(str(outbase) + '.box', str(outbase) + '.tif')
+    cache_key = None
+    if cache_inputs is not None:
+        if shard is not None:
+            cache_inputs = {**cache_inputs, 'training_text': hash_file(text)}
+        cache_key = render_cache_key(cache_inputs, font, render_args)
+    job = outbase.name
+    # The images made from this render, whose features are extracted.
+    images = [outbase]
+    if base:
+        images = [
+            make_outbase(ctx, fontname, other, shard)
+            for other in ctx.exposures
+            if font in shard_fonts(ctx, other)
+        ]
+    if ctx.manifest and render_complete(ctx, cache_key, job, images):
+        log.info(f'Skipping {label}, already rendered')
+        return f'{font}-{exposure}'
+    if ctx.render_cache and cache_key:
+        if ctx.render_cache.restore(cache_key, outbase):
+            log.info(f'Restored {label} from cache')
+            require_outputs(str(outbase) + '.box', str(outbase) + '.tif')
+            record_outputs(
+                ctx,
+                *(
+                    str(outbase) + suffix
+                    for suffix in ('.box', '.tif', '.fontinfo')
+                    if os.path.exists(str(outbase) + suffix)
+                ),
+            )
+            record_render(ctx, cache_key, job, outbase)
+            return f'{font}-{exposure}'
+
+    log.info(f'Rendering using {label}')
+    with fontconfig_slot(ctx) as font_config_cache:
+        yield Command(
+            'text2image',
+            (f'--fontconfig_tmpdir={font_config_cache}', *render_args),
+        )
+
+    require_outputs(str(outbase) + '.box', str(outbase) + '.tif')
+    record_outputs(ctx, str(outbase) + '.box', str(outbase) + '.tif')
+    if ctx.disk_admission:
+        ctx.disk_admission.observe(
+            sum(
+                os.path.getsize(str(outbase) + suffix)
+                for suffix in ('.box', '.tif')
+            )
+        )
 
     if (
         ctx.extract_font_properties
+        and not shard
         and pathlib.Path(ctx.train_ngrams_file).exists()
     ):
         log.info(f'Extracting font properties of {font}')
-        run_command(
-            'text2image',
-            *common_args,
-            f'--font={font}',
-            f'--ligatures=false',
-            f'--text={ctx.train_ngrams_file}',
-            f'--only_extract_font_properties',
-            f'--ptsize=32',
+        with fontconfig_slot(ctx) as font_config_cache:
+            yield Command(
+                'text2image',
+                (
+                    f'--fontconfig_tmpdir={font_config_cache}',
+                    *common_args,
+                    f'--font={font}',
+                    f'--ligatures=false',
+                    f'--text={ctx.train_ngrams_file}',
+                    f'--only_extract_font_properties',
+                    f'--ptsize=32',
+                ),
+            )
+        require_outputs(str(outbase) + '.fontinfo')
+        record_outputs(ctx, str(outbase) + '.fontinfo')
+
+    if ctx.render_cache and cache_key:
+        ctx.render_cache.store(cache_key, outbase)
+    record_render(ctx, cache_key, job, outbase)
+    return f'{font}-{exposure}'
+
+
+def synthesize_image(ctx, font, exposure, shard=None):
+    """
+    Job deriving the image of `font` with `exposure` from the undegraded
+    render of the font, see `tesstrain.degrade`. The box and font properties
+    files of the render are shared by all exposures.
+    """
+    # NumPy and Pillow are only needed with --synthesize_exposures.
+    from tesstrain.degrade import synthesize_exposure
+
+    fontname = make_fontname(font)
+    base = base_outbase(ctx, fontname, shard)
+    outbase = make_outbase(ctx, fontname, exposure, shard)
+    if (
+        ctx.manifest
+        and not os.path.exists(str(base) + '.tif')
+        and extracted(ctx, outbase)
+    ):
+        # The render was removed after an earlier extraction.
+        log.info(f'Skipping {font} (exposure {exposure}), already extracted')
+        return f'{font}-{exposure}'
+    log.info(f'Synthesizing {font} (exposure {exposure})')
+    synthesize_exposure(str(base) + '.tif', str(outbase) + '.tif', exposure)
+    record_outputs(ctx, str(outbase) + '.tif')
+    for suffix in ('.box', '.fontinfo'):
+        src = pathlib.Path(str(base) + suffix)
+        dst = pathlib.Path(str(outbase) + suffix)
+        if src.exists():
+            if dst.exists():
+                dst.unlink()
+            link_or_copy(src, dst)
+
+    require_outputs(str(outbase) + '.box', str(outbase) + '.tif')
+    if ctx.disk_admission:
+        ctx.disk_admission.observe(
+            sum(
+                os.path.getsize(str(outbase) + suffix)
+                for suffix in ('.box', '.tif')
+            )
         )
-        check_file_readable(str(outbase) + '.fontinfo')
     return f'{font}-{exposure}'
 
 
+def add_render_job(
+    graph,
+    prefix,
+    ctx,
+    font,
+    exposure,
+    char_spacing,
+    cache_inputs,
+    shard,
+    text,
+    bases,
+):
+    """
+    Add the job producing the image of `font` with `exposure` to `graph` and
+    return its name, which is the output base prefixed with `prefix`.
+
+    With `--synthesize_exposures`, the image is synthesized from the
+    undegraded render of the font, which is added to the graph once. `bases`
+    maps the font and shard to the job of the render and the jobs
+    synthesized from it, see `add_free_base_jobs`.
+    """
+    fontname = make_fontname(font)
+    outbase = make_outbase(ctx, fontname, exposure, shard)
+    if not ctx.synthesize_exposures:
+        return graph.add(
+            prefix + outbase.name,
+            font_image_steps,
+            ctx,
+            font,
+            exposure,
+            char_spacing,
+            cache_inputs,
+            shard,
+            text,
+            pool='render',
+        )
+    if (font, shard) not in bases:
+        base = graph.add(
+            prefix + base_outbase(ctx, fontname, shard).name,
+            font_image_steps,
+            ctx,
+            font,
+            0,
+            char_spacing,
+            cache_inputs,
+            shard,
+            text,
+            base=True,
+            pool='render',
+        )
+        bases[font, shard] = (base, [])
+    base, synthesized = bases[font, shard]
+    synthesized.append(
+        graph.add(
+            prefix + outbase.name,
+            synthesize_image,
+            ctx,
+            font,
+            exposure,
+            shard,
+            deps=[base],
+            pool='render',
+        )
+    )
+    return synthesized[-1]
+
+
+def add_free_base_jobs(graph, ctx, bases):
+    """
+    In bounded-disk mode, add jobs removing each undegraded render as soon as
+    all exposures of `bases` (see `add_render_job`) were synthesized from it.
+    """
+    if not ctx.bounded_disk:
+        return
+    for (font, shard), (base, synthesized) in bases.items():
+        graph.add(
+            f'free:{base}', remove_base, ctx, font, shard, deps=synthesized
+        )
+
+
+def remove_base(ctx, font, shard=None):
+    """
+    Remove the files of the undegraded render of `font`. The exposures keep
+    their links to its box and font properties files.
+    """
+    base = base_outbase(ctx, make_fontname(font), shard)
+    files = [str(base) + suffix for suffix in RENDER_SUFFIXES]
+    for f in files:
+        try:
+            os.remove(f)
+        except FileNotFoundError:
+            pass
+    if ctx.manifest:
+        ctx.manifest.mark_removed('phase_I', files, base.name)
+
+
+def extracted(ctx, outbase):
+    """
+    Return whether the features of the image of `outbase` were extracted by
+    an earlier attempt of a resumable run and are still intact.
+    """
+    image = pathlib.Path(str(outbase) + '.tif').name
+    inputs_hash = ctx.manifest.recorded_inputs('phase_E', image)
+    return inputs_hash is not None and ctx.manifest.is_complete(
+        'phase_E', inputs_hash, image
+    )
+
+
+def render_complete(ctx, cache_key, job, images):
+    """
+    Return whether the render `job` was completed by an earlier attempt of a
+    resumable run.
+
+    In bounded-disk mode, a render is removed once the features of the
+    `images` made from it were extracted. It then only counts as complete
+    while all of their features are intact.
+    """
+    if not ctx.manifest.is_complete('phase_I', cache_key, job):
+        return False
+    if not ctx.manifest.removed('phase_I', job):
+        return True
+    return all(extracted(ctx, image) for image in images)
+
+
+def record_render(ctx, cache_key, job, outbase):
+    """
+    Record a completed render in the manifest of a resumable run.
+    """
+    if not ctx.manifest:
+        return
+    files = [
+        str(outbase) + suffix
+        for suffix in ('.tif', '.box', '.fontinfo')
+        if pathlib.Path(str(outbase) + suffix).exists()
+    ]
+    ctx.manifest.record('phase_I', cache_key, files, job)
+
+
+def generate_train_ngrams(ctx):
+    """
+    Compose the `.train_ngrams` file used to extract font properties.
+    """
+    if (
+        ctx.extract_font_properties
+        and pathlib.Path(ctx.bigram_freqs_file).exists()
+    ):
+        # Compose a .train_ngrams file with text for tesseract to recognize
+        # during training from the .bigram_freqs file. Take only the ngrams
+        # whose combined weight accounts for 99% of all the bigrams in the
+        # language.
+        write_train_ngrams(ctx.bigram_freqs_file, ctx.train_ngrams_file)
+        check_file_readable(ctx.train_ngrams_file)
+
+
 def phase_I_generate_image(ctx, par_factor=None):
     """
     Phase I: Generate (I)mages from training text for each font.
@@ -202,116 +808,356 @@ def phase_I_generate_image(ctx, par_factor=None):
     log.info('=== Phase I: Generating training images ===')
     check_file_readable(ctx.training_text)
     char_spacing = 0.0
+    ctx.render_shard_texts = split_training_text(ctx)
+    generate_train_ngrams(ctx)
+    cache_inputs = None
+    if ctx.render_cache or ctx.manifest:
+        cache_inputs = render_cache_inputs(ctx)
 
-    for exposure in ctx.exposures:
-        if (
-            ctx.extract_font_properties
-            and pathlib.Path(ctx.bigram_freqs_file).exists()
-        ):
-            # Parse .bigram_freqs file and compose a .train_ngrams file with text
-            # for tesseract to recognize during training. Take only the ngrams whose
-            # combined weight accounts for 95% of all the bigrams in the language.
-            lines = (
-                pathlib.Path(ctx.bigram_freqs_file)
-                .read_text(encoding='utf-8')
-                .split('\n')
-            )
-            records = (line.split() for line in lines)
-            p = 0.99
-            ngram_frac = p * sum(
-                int(rec[1]) for rec in records if len(rec) >= 2
-            )
+    outbases = []
+    # Exposures are rendered one after another, unless they are synthesized
+    # from a single render of each font.
+    batches = [[exposure] for exposure in ctx.exposures]
+    if ctx.synthesize_exposures:
+        batches = [ctx.exposures]
+    for exposures in batches:
+        graph = TaskGraph()
+        bases = {}
+        for exposure in exposures:
+            for font in shard_fonts(ctx, exposure):
+                for shard, text in ctx.render_shard_texts:
+                    outbases.append(
+                        make_outbase(ctx, make_fontname(font), exposure, shard)
+                    )
+                    add_render_job(
+                        graph,
+                        '',
+                        ctx,
+                        font,
+                        exposure,
+                        char_spacing,
+                        cache_inputs,
+                        shard,
+                        text,
+                        bases,
+                    )
+        add_free_base_jobs(graph, ctx, bases)
+        run_jobs(
+            ctx,
+            graph,
+            'generating images',
+            max_workers=par_factor,
+            pool_limits={'render': par_factor},
+        )
 
-            with pathlib.Path(ctx.train_ngrams_file).open(
-                'w', encoding='utf-8'
-            ) as f:
-                cumsum = 0
-                for bigram, count in sorted(
-                    records, key=itemgetter(1), reverse=True
-                ):
-                    if cumsum > ngram_frac:
-                        break
-                    f.write(bigram + ' ')
-                    cumsum += count
-
-            check_file_readable(ctx.train_ngrams_file)
-
-        with tqdm(
-            total=len(ctx.fonts)
-        ) as pbar, concurrent.futures.ThreadPoolExecutor(
-            max_workers=par_factor
-        ) as executor:
-            futures = [
-                executor.submit(
-                    generate_font_image, ctx, font, exposure, char_spacing
-                )
-                for font in ctx.fonts
-            ]
-            for future in concurrent.futures.as_completed(futures):
-                try:
-                    future.result()
-                except Exception as exc:
-                    err_exit('Failed while generating images ' + str(exc))
-                else:
-                    pbar.update(1)
-
-        # Check that each process was successful.
-        for font in ctx.fonts:
-            fontname = make_fontname(font)
-            outbase = make_outbase(ctx, fontname, exposure)
-            check_file_readable(str(outbase) + '.box', str(outbase) + '.tif')
-    return
+    ctx.render_outbases = outbases
+    # Check that each process was successful. Renders removed after an
+    # earlier extraction in bounded-disk mode are not needed any more.
+    check_outputs(
+        [
+            str(outbase) + suffix
+            for outbase in outbases
+            if not (ctx.manifest and extracted(ctx, outbase))
+            for suffix in ('.box', '.tif')
+        ],
+        'rendered images',
+    )
 
 
 def phase_UP_generate_unicharset(ctx):
     """
     Phase UP: Generate (U)nicharset and (P)roperties file.
+
+    The unicharsets of the box files are extracted in parallel and then
+    merged.
+    """
+    box_files = sorted(pathlib.Path(ctx.training_dir).glob('*.box'))
+    if ctx.render_outbases is not None:
+        # Box files may have been removed in bounded-disk mode, see
+        # `box_unicharset_steps`.
+        box_files = [
+            pathlib.Path(str(outbase) + '.box')
+            for outbase in ctx.render_outbases
+        ]
+    graph = TaskGraph()
+    for box_file in box_files:
+        graph.add(box_file.name, box_unicharset_steps, ctx, box_file)
+    run_jobs(
+        ctx,
+        graph,
+        'extracting unicharsets',
+        max_workers=ctx.jobs,
+        pool_limits={},
+    )
+    run_steps(unicharset_steps(ctx, box_files))
+
+
+def box_unicharset_file(ctx, box_file):
+    return (
+        pathlib.Path(ctx.training_dir)
+        / 'unicharsets'
+        / f'{pathlib.Path(box_file).name}.unicharset'
+    )
+
+
+def box_unicharset_steps(ctx, box_file):
+    """
+    Job extracting the unicharset of a single box file.
+
+    The result is kept next to a key file with the hash of the box file, and
+    reused as long as the contents of the box file are unchanged. The key also
+    records the size and modification time of the box file, so that unchanged
+    files need not be hashed again.
+    """
+    box_file = pathlib.Path(box_file)
+    unicharset_file = box_unicharset_file(ctx, box_file)
+    key_file = unicharset_file.with_name(unicharset_file.name + '.key')
+    if ctx.bounded_disk and not box_file.exists():
+        # Removed after its features were extracted, see remove_intermediates.
+        require_outputs(unicharset_file)
+        return unicharset_file
+    signature = file_signature(box_file)
+    try:
+        key = json.loads(key_file.read_text())
+    except (FileNotFoundError, ValueError):
+        key = None
+    if key and unicharset_file.exists() and key['norm_mode'] == ctx.norm_mode:
+        if key['box'] == signature:
+            return unicharset_file
+        digest = hash_file(box_file)
+        if key['sha256'] == digest:
+            key['box'] = signature
+            write_atomic(key_file, json.dumps(key))
+            return unicharset_file
+    else:
+        digest = hash_file(box_file)
+
+    unicharset_file.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_file = tempfile.mkstemp(
+        prefix=f'.{unicharset_file.name}.', dir=str(unicharset_file.parent)
+    )
+    os.close(fd)
+    try:
+        yield Command(
+            'unicharset_extractor',
+            (
+                '--output_unicharset',
+                tmp_file,
+                '--norm_mode',
+                f'{ctx.norm_mode}',
+                box_file,
+            ),
+        )
+        require_outputs(tmp_file)
+        os.replace(tmp_file, str(unicharset_file))
+        record_outputs(ctx, unicharset_file)
+    finally:
+        if os.path.exists(tmp_file):
+            os.unlink(tmp_file)
+    write_atomic(
+        key_file,
+        json.dumps(
+            {'box': signature, 'sha256': digest, 'norm_mode': ctx.norm_mode}
+        ),
+    )
+    return unicharset_file
+
+
+def merge_unicharsets_steps(unicharset_files, output_file):
+    """
+    Job merging `unicharset_files` into `output_file`.
+
+    Merges at most `MERGE_CHUNK_SIZE` files at a time, so that the command
+    lines stay short for any number of files.
+    """
+    output_file = pathlib.Path(output_file)
+    files = list(unicharset_files)
+    if not files:
+        err_exit(f'No unicharsets to merge into {output_file}', InputError)
+    level = 0
+    while len(files) > MERGE_CHUNK_SIZE:
+        merged = []
+        for start in range(0, len(files), MERGE_CHUNK_SIZE):
+            chunk = files[start : start + MERGE_CHUNK_SIZE]
+            partial = output_file.with_name(
+                f'{output_file.name}.merge{level}.{len(merged)}'
+            )
+            yield Command('merge_unicharsets', (*chunk, partial))
+            merged.append(partial)
+        files = merged
+        level += 1
+    if len(files) == 1:
+        shutil.copyfile(str(files[0]), str(output_file))
+    else:
+        yield Command('merge_unicharsets', (*files, output_file))
+    if level:
+        for partial in output_file.parent.glob(f'{output_file.name}.merge*'):
+            partial.unlink()
+
+
+def unicharset_properties_command(ctx):
+    """
+    Return the command adding the character properties to
+    `ctx.unicharset_file` and writing `ctx.xheights_file`.
+    """
+    return Command(
+        'set_unicharset_properties',
+        (
+            '-U',
+            f'{ctx.unicharset_file}',
+            '-O',
+            f'{ctx.unicharset_file}',
+            '-X',
+            f'{ctx.xheights_file}',
+            f'--script_dir={ctx.langdata_dir}',
+        ),
+    )
+
+
+def unicharset_steps(ctx, box_files=None):
+    """
+    Job of Phase UP, see `phase_UP_generate_unicharset`.
+
+    Extracts the unicharsets of `box_files` (default: all box files of the
+    training directory) which are not up to date yet, then merges all of them.
     """
     log.info(
         '=== Phase UP: Generating unicharset and unichar properties files ==='
     )
 
-    box_files = pathlib.Path(ctx.training_dir).glob('*.box')
+    if box_files is None:
+        box_files = pathlib.Path(ctx.training_dir).glob('*.box')
+    box_files = sorted(map(pathlib.Path, box_files))
 
     ctx.unicharset_file = (
         pathlib.Path(ctx.training_dir) / f'{ctx.lang_code}.unicharset'
     )
-
-    run_command(
-        'unicharset_extractor',
-        '--output_unicharset',
-        f'{ctx.unicharset_file}',
-        '--norm_mode',
-        f'{ctx.norm_mode}',
-        *box_files,
+    ctx.xheights_file = (
+        pathlib.Path(ctx.training_dir) / f'{ctx.lang_code}.xheights'
     )
+
+    inputs_hash = None
+    if ctx.manifest:
+        inputs_hash = hash_json(
+            {
+                'boxes': [
+                    (f.name, file_signature(f))
+                    for f in box_files
+                    if f.exists()
+                ],
+                'norm_mode': ctx.norm_mode,
+                'langdata_dir': ctx.langdata_dir,
+            }
+        )
+        if ctx.manifest.is_complete('phase_UP', inputs_hash):
+            log.info('Unicharset is up to date')
+            return
+
+    unicharset_files = []
+    for box_file in box_files:
+        unicharset_file = yield from box_unicharset_steps(ctx, box_file)
+        unicharset_files.append(unicharset_file)
+    yield from merge_unicharsets_steps(unicharset_files, ctx.unicharset_file)
     check_file_readable(ctx.unicharset_file)
 
-    ctx.xheights_file = (
-        pathlib.Path(ctx.training_dir) / f'{ctx.lang_code}.xheights'
+    yield unicharset_properties_command(ctx)
+    check_file_readable(ctx.xheights_file)
+    record_outputs(ctx, ctx.unicharset_file, ctx.xheights_file)
+
+    if ctx.manifest:
+        ctx.manifest.record(
+            'phase_UP',
+            inputs_hash,
+            [ctx.unicharset_file, ctx.xheights_file],
+        )
+
+
+def extract_features(ctx, img_file, box_config, config, ext, env):
+    """
+    Helper function for `phase_E_extract_features`.
+
+    Runs tesseract on a single image, see `extract_features_steps`.
+    """
+    run_steps(
+        extract_features_steps(ctx, img_file, box_config, config, ext, env)
     )
-    run_command(
-        'set_unicharset_properties',
-        '-U',
-        f'{ctx.unicharset_file}',
-        '-O',
-        f'{ctx.unicharset_file}',
-        '-X',
-        f'{ctx.xheights_file}',
-        f'--script_dir={ctx.langdata_dir}',
+
+
+def extract_features_steps(ctx, img_file, box_config, config, ext, env):
+    """
+    Job running tesseract on a single image. In a resumable run, images whose output
+    is already complete are skipped.
+    """
+    img_file = pathlib.Path(img_file)
+    inputs_hash = None
+    if ctx.manifest and not img_file.exists():
+        # Removed after an earlier extraction, see remove_intermediates.
+        inputs_hash = ctx.manifest.recorded_inputs('phase_E', img_file.name)
+    elif ctx.manifest:
+        inputs_hash = hash_json(
+            {
+                'image': file_signature(img_file),
+                'box': file_signature(img_file.with_suffix('.box')),
+                'box_config': box_config,
+                'config': config,
+                'tessdata_dir': ctx.tessdata_dir,
+            }
+        )
+    if ctx.manifest and ctx.manifest.is_complete(
+        'phase_E', inputs_hash, img_file.name
+    ):
+        log.debug(f'Skipping {img_file.name}, already extracted')
+        if ctx.bounded_disk:
+            remove_intermediates(ctx, img_file)
+        return
+
+    yield Command(
+        'tesseract',
+        (img_file, img_file.with_suffix(''), *box_config, config),
+        env,
     )
-    check_file_readable(ctx.xheights_file)
+    require_outputs(img_file.with_suffix('.' + ext))
+    record_outputs(ctx, img_file.with_suffix('.' + ext))
 
+    if ctx.manifest:
+        ctx.manifest.record(
+            'phase_E',
+            inputs_hash,
+            [img_file.with_suffix('.' + ext)],
+            img_file.name,
+        )
+    if ctx.bounded_disk:
+        remove_intermediates(ctx, img_file)
 
-def phase_E_extract_features(ctx, box_config, ext):
+
+def remove_intermediates(ctx, img_file):
     """
-    Phase E: (E)xtract .tr feature files from .tif/.box files.
+    Free the space of an image and its box file once its features have been
+    extracted. With `ctx.save_box_tiff` the pair is moved to the output
+    directory instead of being deleted.
     """
-    log.info(f'=== Phase E: Generating {ext} files ===')
+    files = [img_file, img_file.with_suffix('.box')]
+    if ctx.save_box_tiff:
+        output_dir = pathlib.Path(ctx.output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+    for f in files:
+        if not f.exists():
+            # Removed by an earlier attempt of a resumable run.
+            continue
+        if ctx.save_box_tiff:
+            shutil.move(str(f), str(output_dir / f.name))
+        else:
+            log.debug(f'Removing {f}')
+            f.unlink()
+    if ctx.manifest:
+        ctx.manifest.mark_removed('phase_I', files, img_file.stem)
 
-    img_files = list(pathlib.Path(ctx.training_dir).glob('*.exp*.tif'))
-    log.debug(img_files)
 
+def feature_extraction_setup(ctx):
+    """
+    Return the language-specific config (if any) and the environment for
+    running tesseract during feature extraction.
+    """
     # Use any available language-specific configs.
     config = ''
     testconfig = (
@@ -327,37 +1173,142 @@ def phase_E_extract_features(ctx, box_config, ext):
     tessdata_environ['TESSDATA_PREFIX'] = str(ctx.tessdata_dir)
 
     log.info(f"Using TESSDATA_PREFIX={tessdata_environ['TESSDATA_PREFIX']}")
+    return config, tessdata_environ
 
-    with tqdm(
-        total=len(img_files)
-    ) as pbar, concurrent.futures.ThreadPoolExecutor(
-        max_workers=2
-    ) as executor:
-        futures = []
-        for img_file in img_files:
-            future = executor.submit(
-                run_command,
-                'tesseract',
-                img_file,
-                pathlib.Path(img_file).with_suffix(''),
-                *box_config,
-                config,
-                env=tessdata_environ,
-            )
-            futures.append(future)
 
-        for future in concurrent.futures.as_completed(futures):
-            try:
-                future.result()
-            except Exception as exc:
-                err_exit('Failed while extracting features: ' + str(exc))
-            else:
-                pbar.update(1)
-    # Check that all the output files were produced.
+def phase_E_extract_features(ctx, box_config, ext):
+    """
+    Phase E: (E)xtract .tr feature files from .tif/.box files.
+    """
+    log.info(f'=== Phase E: Generating {ext} files ===')
+
+    img_files = list(pathlib.Path(ctx.training_dir).glob('*.exp*.tif'))
+    log.debug(img_files)
+
+    config, tessdata_environ = feature_extraction_setup(ctx)
+
+    graph = TaskGraph()
     for img_file in img_files:
-        check_file_readable(pathlib.Path(img_file.with_suffix('.' + ext)))
+        graph.add(
+            img_file.stem,
+            extract_features_steps,
+            ctx,
+            img_file,
+            box_config,
+            config,
+            ext,
+            tessdata_environ,
+            pool='extract',
+        )
+    run_jobs(
+        ctx,
+        graph,
+        'extracting features',
+        max_workers=ctx.extract_jobs,
+        pool_limits={'extract': ctx.extract_jobs},
+    )
+    # Check that all the output files were produced.
+    check_outputs(
+        [img_file.with_suffix('.' + ext) for img_file in img_files],
+        f'{ext} files',
+    )
+
+
+def phase_IE_pipelined(ctx, box_config, ext):
+    """
+    Phases I, UP and E as a single task graph.
+
+    The features of every font/exposure are extracted as soon as its image has
+    been rendered, instead of waiting for all renders of all exposures. The
+    same goes for the unicharset of each box file; only the final merge of
+    Phase UP waits for all renders, and runs alongside the remaining
+    extractions.
+    """
+    log.info('=== Phases I, UP and E: Rendering and extracting features ===')
+    check_file_readable(ctx.training_text)
+    char_spacing = 0.0
+
+    ctx.render_shard_texts = split_training_text(ctx)
+    generate_train_ngrams(ctx)
+    cache_inputs = None
+    if ctx.render_cache or ctx.manifest:
+        cache_inputs = render_cache_inputs(ctx)
+    config, tessdata_environ = feature_extraction_setup(ctx)
+
+    graph = TaskGraph()
+    bases = {}
+    unicharsets = []
+    outbases = []
+    jobs = [
+        (exposure, font, shard_text)
+        for exposure in ctx.exposures
+        for font in shard_fonts(ctx, exposure)
+        for shard_text in ctx.render_shard_texts
+    ]
+    for exposure, font, (shard, text) in jobs:
+        outbase = make_outbase(ctx, make_fontname(font), exposure, shard)
+        render = add_render_job(
+            graph,
+            'render:',
+            ctx,
+            font,
+            exposure,
+            char_spacing,
+            cache_inputs,
+            shard,
+            text,
+            bases,
+        )
+        # Extraction finishes a font, so prefer it over new renders.
+        unicharset = graph.add(
+            f'unicharset:{outbase.name}',
+            box_unicharset_steps,
+            ctx,
+            str(outbase) + '.box',
+            deps=[render],
+            priority=1,
+        )
+        unicharsets.append(unicharset)
+        graph.add(
+            f'extract:{outbase.name}',
+            extract_features_steps,
+            ctx,
+            pathlib.Path(str(outbase) + '.tif'),
+            box_config,
+            config,
+            ext,
+            tessdata_environ,
+            # The box file is removed after extraction in bounded-disk mode.
+            deps=[render, unicharset] if ctx.bounded_disk else [render],
+            pool='extract',
+            priority=1,
+        )
+        outbases.append(outbase)
+    add_free_base_jobs(graph, ctx, bases)
+    graph.add(
+        'unicharset',
+        unicharset_steps,
+        ctx,
+        [str(outbase) + '.box' for outbase in outbases],
+        deps=unicharsets,
+        priority=2,
+    )
+
+    run_jobs(
+        ctx,
+        graph,
+        'rendering and extracting features',
+        max_workers=max(ctx.render_jobs, ctx.extract_jobs),
+        pool_limits={
+            'render': ctx.render_jobs,
+            'extract': ctx.extract_jobs,
+        },
+    )
 
-    return
+    # Check that all the output files were produced.
+    check_outputs(
+        [str(outbase) + '.' + ext for outbase in outbases], f'{ext} files'
+    )
 
 
 def make_lstmdata(ctx):
@@ -374,25 +1325,31 @@ def make_lstmdata(ctx):
     if ctx.norm_mode >= 2:
         args.append('--pass_through_recoder')
 
-    # Build the starter traineddata from the inputs.
-    run_command(
-        'combine_lang_model',
-        '--input_unicharset',
-        f'{ctx.training_dir}/{ctx.lang_code}.unicharset',
-        '--script_dir',
-        f'{ctx.langdata_dir}',
-        '--words',
-        f'{lang_prefix}.wordlist',
-        '--numbers',
-        f'{lang_prefix}.numbers',
-        '--puncs',
-        f'{lang_prefix}.punc',
-        '--output_dir',
-        f'{ctx.output_dir}',
-        '--lang',
-        f'{ctx.lang_code}',
-        *args,
-    )
+    # Build the starter traineddata from the inputs. Shards of a run only
+    # produce part of them, it is built when they are merged.
+    if not ctx.shard:
+        run_command(
+            'combine_lang_model',
+            '--input_unicharset',
+            f'{ctx.training_dir}/{ctx.lang_code}.unicharset',
+            '--script_dir',
+            f'{ctx.langdata_dir}',
+            '--words',
+            f'{lang_prefix}.wordlist',
+            '--numbers',
+            f'{lang_prefix}.numbers',
+            '--puncs',
+            f'{lang_prefix}.punc',
+            '--output_dir',
+            f'{ctx.output_dir}',
+            '--lang',
+            f'{ctx.lang_code}',
+            *args,
+        )
+        record_outputs(
+            ctx,
+            f'{ctx.output_dir}/{ctx.lang_code}/{ctx.lang_code}.traineddata',
+        )
 
     def get_file_list():
         training_path = pathlib.Path(ctx.training_dir)
@@ -404,14 +1361,20 @@ def make_lstmdata(ctx):
         yield from training_path.glob(f'{ctx.lang_code}.*.lstmf')
 
     for f in get_file_list():
-        log.debug(f'Moving {f} to {path_output / f.name}')
-        shutil.move(str(f), path_output / f.name)
+        dst = path_output / f.name
+        if ctx.work_dir:
+            # Keep the work directory complete so that the run can resume.
+            log.debug(f'Copying {f} to {dst}')
+            if dst.exists():
+                dst.unlink()
+            link_or_copy(f, dst)
+        else:
+            log.debug(f'Moving {f} to {dst}')
+            shutil.move(str(f), dst)
 
     lstm_list = f'{ctx.output_dir}/{ctx.lang_code}.training_files.txt'
     dir_listing = (
         str(p) for p in path_output.glob(f'{ctx.lang_code}.*.lstmf')
     )
-    with pathlib.Path(lstm_list).open(
-        mode='w', encoding='utf-8', newline='\n'
-    ) as f:
-        f.write('\n'.join(dir_listing))
+    write_atomic(lstm_list, '\n'.join(dir_listing))
+    record_outputs(ctx, lstm_list)
@@ -0,0 +1,179 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Bookkeeping of completed phases and jobs for resumable runs.
+"""
+
+import json
+import logging
+import os
+import pathlib
+import threading
+
+log = logging.getLogger(__name__)
+
+
+def file_signature(filename):
+    """
+    Return a cheap signature (size, modification time) of the given file.
+    """
+    st = os.stat(str(filename))
+    return [st.st_size, st.st_mtime_ns]
+
+
+def write_atomic(filename, text):
+    """
+    Write `text` to `filename` so that readers see either the old or the new
+    contents, never a partially written file.
+    """
+    filename = pathlib.Path(filename)
+    tmp = filename.with_name(f'.{filename.name}.{os.getpid()}.tmp')
+    with tmp.open('w', encoding='utf-8', newline='\n') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(str(tmp), str(filename))
+
+
+class Manifest:
+    """
+    Persistent record of the phases and individual jobs of a run.
+
+    Every entry stores a hash of the inputs it was produced from and the sizes
+    of the files it produced. An entry only counts as complete if the inputs
+    hash matches and all of its files are still present with the recorded
+    sizes, so interrupted jobs and changed inputs are always redone. Files
+    removed on purpose (see `mark_removed`) are no longer checked.
+
+    The manifest is a journal with one JSON line per recorded entry, so
+    recording a job appends a line instead of rewriting the file. Later lines
+    replace earlier ones of the same entry. The journal is compacted when it
+    is loaded; a line cut short by a crash is dropped, which only means that
+    its job is done again.
+    """
+
+    def __init__(self, filename):
+        self.filename = pathlib.Path(filename)
+        self._lock = threading.Lock()
+        self._entries = {}
+        try:
+            with self.filename.open(encoding='utf-8') as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            lines = []
+        skipped = 0
+        for line in lines:
+            try:
+                entry = json.loads(line)
+                self._entries[entry.pop('name')] = entry
+            except (ValueError, KeyError, AttributeError, TypeError):
+                skipped += 1
+        if skipped:
+            log.warning(
+                f'Ignoring {skipped} corrupt line(s) of manifest '
+                f'{self.filename}'
+            )
+        if skipped or len(lines) > len(self._entries):
+            write_atomic(
+                self.filename,
+                ''.join(
+                    self._line(name, entry)
+                    for name, entry in self._entries.items()
+                ),
+            )
+        self._journal = self.filename.open('a', encoding='utf-8')
+
+    @staticmethod
+    def _name(phase, job):
+        return phase if job is None else f'{phase}/{job}'
+
+    @staticmethod
+    def _line(name, entry):
+        return json.dumps({'name': name, **entry}) + '\n'
+
+    def close(self):
+        with self._lock:
+            self._journal.close()
+
+    def is_complete(self, phase, inputs_hash, job=None):
+        """
+        Check whether `phase` (or one of its jobs) was completed with the same
+        inputs and its outputs are still intact.
+        """
+        with self._lock:
+            entry = self._entries.get(self._name(phase, job))
+        if not entry or entry['inputs'] != inputs_hash:
+            return False
+        for filename, size in entry['files'].items():
+            try:
+                if os.stat(filename).st_size != size:
+                    return False
+            except OSError:
+                return False
+        return True
+
+    def recorded_inputs(self, phase, job=None):
+        """
+        Return the inputs hash recorded for `phase` (or one of its jobs), or
+        None.
+        """
+        with self._lock:
+            entry = self._entries.get(self._name(phase, job))
+        return entry['inputs'] if entry else None
+
+    def removed(self, phase, job=None):
+        """
+        Return the files of `phase` (or one of its jobs) removed on purpose.
+        """
+        with self._lock:
+            entry = self._entries.get(self._name(phase, job))
+        return entry.get('removed', []) if entry else []
+
+    def mark_removed(self, phase, files, job=None):
+        """
+        Record that `files` of a completed `phase` (or one of its jobs) were
+        removed on purpose, so that it still counts as complete.
+        """
+        name = self._name(phase, job)
+        files = {str(f) for f in files}
+        with self._lock:
+            entry = self._entries.get(name)
+            if not entry or not files & set(entry['files']):
+                return
+            entry = {
+                'inputs': entry['inputs'],
+                'files': {
+                    f: size
+                    for f, size in entry['files'].items()
+                    if f not in files
+                },
+                'removed': sorted(
+                    set(entry.get('removed', [])) | files & set(entry['files'])
+                ),
+            }
+            self._entries[name] = entry
+            self._journal.write(self._line(name, entry))
+            self._journal.flush()
+
+    def record(self, phase, inputs_hash, files, job=None):
+        """
+        Mark `phase` (or one of its jobs) as completed, producing `files`.
+        """
+        name = self._name(phase, job)
+        entry = {
+            'inputs': inputs_hash,
+            'files': {str(f): os.stat(str(f)).st_size for f in files},
+        }
+        line = self._line(name, entry)
+        with self._lock:
+            self._entries[name] = entry
+            self._journal.write(line)
+            self._journal.flush()
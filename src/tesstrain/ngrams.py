@@ -0,0 +1,118 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Selection of the most frequent ngrams used to extract font properties.
+"""
+
+import collections
+import logging
+import pathlib
+
+from tesstrain.cache import hash_file
+from tesstrain.manifest import write_atomic
+
+log = logging.getLogger(__name__)
+
+# Fraction of the total ngram weight covered by the selected ngrams.
+NGRAM_FRACTION = 0.99
+
+
+def read_ngram_counts(filename):
+    """
+    Yield the `(ngram, count)` pairs of a `.bigram_freqs` file line by line.
+
+    Lines without a numeric count are skipped.
+    """
+    with pathlib.Path(filename).open(encoding='utf-8') as f:
+        for line in f:
+            fields = line.split()
+            if len(fields) < 2:
+                continue
+            try:
+                count = int(fields[1])
+            except ValueError:
+                continue
+            yield fields[0], count
+
+
+class NgramCounts:
+    """
+    The `(ngram, count)` pairs of a `.bigram_freqs` file, read again on every
+    iteration.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+
+    def __iter__(self):
+        return read_ngram_counts(self.filename)
+
+
+def select_ngrams(records, fraction=NGRAM_FRACTION):
+    """
+    Return the most frequent ngrams, in order of decreasing count, until their
+    combined count exceeds `fraction` of the total. Ngrams with equal counts
+    keep their input order.
+
+    `records` is iterated twice, e.g. as `NgramCounts`: first to find the
+    lowest selected count from a histogram of the counts, then to collect the
+    selected ngrams. Only the distinct counts and the selected ngrams are
+    held in memory, never all records.
+    """
+    histogram = collections.Counter(count for _, count in records)
+    target = fraction * sum(count * n for count, n in histogram.items())
+    # All ngrams above `cutoff` are selected, and the first `ties` ngrams
+    # with a count of `cutoff`.
+    cutoff = None
+    ties = 0
+    cumsum = 0
+    for count in sorted(histogram, reverse=True):
+        n = histogram[count]
+        if cumsum + count * n > target:
+            cutoff = count
+            ties = int((target - cumsum) // count) + 1
+            break
+        cumsum += count * n
+
+    selected = []
+    for index, (ngram, count) in enumerate(records):
+        if cutoff is None or count > cutoff:
+            selected.append((-count, index, ngram))
+        elif count == cutoff and ties:
+            ties -= 1
+            selected.append((-count, index, ngram))
+    selected.sort()
+    return [ngram for _, _, ngram in selected]
+
+
+def write_train_ngrams(freqs_file, train_ngrams_file, fraction=NGRAM_FRACTION):
+    """
+    Compose `train_ngrams_file` from the ngrams in `freqs_file`.
+
+    The result is reused as long as the contents of `freqs_file` and the
+    `fraction` are unchanged, recorded in a `.sha256` file alongside it.
+    """
+    train_ngrams_file = pathlib.Path(train_ngrams_file)
+    key_file = train_ngrams_file.with_name(train_ngrams_file.name + '.sha256')
+
+    key = f'{hash_file(freqs_file)} {fraction}\n'
+    try:
+        if train_ngrams_file.exists() and key_file.read_text() == key:
+            log.debug(f'{train_ngrams_file} is up to date')
+            return train_ngrams_file
+    except FileNotFoundError:
+        pass
+
+    selected = select_ngrams(NgramCounts(freqs_file), fraction)
+    write_atomic(train_ngrams_file, ''.join(f'{ngram} ' for ngram in selected))
+    write_atomic(key_file, key)
+    log.info(f'Selected {len(selected)} ngrams for {train_ngrams_file.name}')
+    return train_ngrams_file
@@ -0,0 +1,428 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Estimates of the wall time and disk usage of a training run, made without
+running any of the training programs.
+
+The work of a run is measured in rendered pages. Timings and sizes per page
+are taken from the performance reports of
+earlier runs (see `tesstrain.report`), or from rough defaults if there are
+none.
+"""
+
+import heapq
+import json
+import logging
+import pathlib
+from typing import List, NamedTuple, Tuple
+
+log = logging.getLogger(__name__)
+
+# Page geometry used by text2image unless told otherwise, see its --xsize,
+# --ysize, --margin and --resolution flags.
+PAGE_WIDTH = 3600
+PAGE_HEIGHT = 4800
+PAGE_MARGIN = 100
+RESOLUTION = 300
+
+# Average advance of a character relative to the font size.
+CHAR_WIDTH_EM = 0.5
+
+# Costs used without earlier reports: seconds and bytes per rendered page,
+# except for `ngrams_seconds` per font properties job and `fixed_seconds` per
+# run.
+DEFAULT_COSTS = {
+    'render_seconds': 0.5,
+    'ngrams_seconds': 1.0,
+    'extract_seconds': 2.0,
+    'unicharset_seconds': 0.1,
+    # Deriving an exposure with --synthesize_exposures, never measured.
+    'synthesize_seconds': 0.2,
+    # An uncompressed 8 bit page and its boxes, an upper bound.
+    'bytes': PAGE_WIDTH * PAGE_HEIGHT + 300_000,
+    # The part of `bytes` kept after --bounded_disk removed the page: its
+    # features.
+    'features_bytes': PAGE_WIDTH * PAGE_HEIGHT // 10,
+    'fixed_seconds': 5.0,
+}
+
+
+class Workload(NamedTuple):
+    """
+    The jobs of a training run and the text rendered by each of them.
+    """
+
+    fonts: int
+    exposures: int
+    # Font/exposure pairs rendered, fewer than fonts x exposures in a shard.
+    jobs: int
+    shards: int
+    text_lines: int
+    text_chars: int
+    chars_per_page: int
+    chars_per_job: int
+
+    @property
+    def render_jobs(self):
+        return self.jobs * self.shards
+
+    @property
+    def pages_per_job(self):
+        return -(-self.chars_per_job // self.chars_per_page)
+
+    @property
+    def pages(self):
+        return self.render_jobs * self.pages_per_job
+
+    def as_dict(self):
+        return {
+            **self._asdict(),
+            'render_jobs': self.render_jobs,
+            'pages_per_job': self.pages_per_job,
+        }
+
+
+def page_geometry(args):
+    """
+    Return the page width, height, margin and resolution set by the
+    text2image arguments `args`, or text2image's defaults.
+    """
+    geometry = {
+        'xsize': PAGE_WIDTH,
+        'ysize': PAGE_HEIGHT,
+        'margin': PAGE_MARGIN,
+        'resolution': RESOLUTION,
+    }
+    for arg in args:
+        name, sep, value = arg.lstrip('-').partition('=')
+        if sep and name in geometry:
+            try:
+                geometry[name] = int(value)
+            except ValueError:
+                pass
+    return geometry
+
+
+def chars_per_page(ptsize, leading, args=()):
+    """
+    Estimate how many characters text2image puts on a page with the
+    text2image arguments `args`.
+    """
+    page = page_geometry(args)
+    em = ptsize * page['resolution'] / 72
+    per_line = (page['xsize'] - 2 * page['margin']) / (CHAR_WIDTH_EM * em)
+    lines = max(1, (page['ysize'] - 2 * page['margin']) // (em + leading))
+    return max(1, int(per_line * lines))
+
+
+def count_text(filename):
+    """
+    Return the number of non-empty lines and their characters in `filename`.
+    """
+    lines = 0
+    chars = 0
+    with open(filename, encoding='utf-8') as f:
+        for line in f:
+            line = line.rstrip('\r\n')
+            if line:
+                lines += 1
+                chars += len(line)
+    return lines, chars
+
+
+def workload(ctx):
+    """
+    Return the `Workload` of a run with the language parameters set on `ctx`.
+    """
+    text_lines, text_chars = count_text(ctx.training_text)
+    shards = 1
+    if ctx.render_shards and ctx.render_shards > 1:
+        shards = max(1, min(ctx.render_shards, text_lines))
+    page_chars = chars_per_page(
+        ctx.ptsize, ctx.leading, ctx.text2image_extra_args
+    )
+    job_chars = -(-text_chars // shards)
+    if ctx.max_pages > 0:
+        # Every shard renders its share of the pages, see font_image_steps.
+        job_chars = min(job_chars, -(-ctx.max_pages // shards) * page_chars)
+    return Workload(
+        fonts=len(ctx.fonts),
+        exposures=len(ctx.exposures),
+        jobs=(
+            len(ctx.fonts) * len(ctx.exposures)
+            if ctx.shard_jobs is None
+            else len(ctx.shard_jobs)
+        ),
+        shards=shards,
+        text_lines=text_lines,
+        text_chars=text_chars,
+        chars_per_page=page_chars,
+        chars_per_job=job_chars,
+    )
+
+
+def _job_kind(job):
+    if job['program'] == 'text2image':
+        if job['phase'] == 'fontconfig':
+            return None
+        if '--only_extract_font_properties' in job['args']:
+            return 'ngrams_seconds'
+        return 'render_seconds'
+    if job['program'] == 'tesseract':
+        return 'extract_seconds'
+    if job['program'] == 'unicharset_extractor':
+        return 'unicharset_seconds'
+    return None
+
+
+def costs_from_report(report):
+    """
+    Return the costs per rendered page recorded in `report`, a parsed
+    performance report, or None if it cannot be used.
+    """
+    inputs = report.get('inputs')
+    if report.get('status') != 'succeeded' or not inputs:
+        return None
+    pages = inputs['render_jobs'] * inputs['pages_per_job']
+    if not pages:
+        return None
+
+    seconds = {}
+    counts = {}
+    for job in report['jobs']:
+        kind = _job_kind(job)
+        if kind:
+            seconds[kind] = seconds.get(kind, 0.0) + job['wall_time']
+            counts[kind] = counts.get(kind, 0) + 1
+    if not counts.get('render_seconds'):
+        # Everything was restored from caches.
+        return None
+
+    # Seconds of a job per page rendered by it.
+    costs = {
+        kind: total / counts[kind] / inputs['pages_per_job']
+        for kind, total in seconds.items()
+        if kind != 'ngrams_seconds'
+    }
+    if 'ngrams_seconds' in seconds:
+        costs['ngrams_seconds'] = (
+            seconds['ngrams_seconds'] / counts['ngrams_seconds']
+        )
+    costs['bytes'] = report['totals']['bytes_written'] / pages
+    for phase in report['phases']:
+        if phase['name'] == 'phase_E':
+            costs['features_bytes'] = phase['bytes_written'] / pages
+    costs['fixed_seconds'] = sum(
+        phase['wall_time']
+        for phase in report['phases']
+        if phase['name'] in ('fontconfig', 'lstmdata')
+    )
+    return costs
+
+
+def load_costs(report_files):
+    """
+    Return the average costs of the usable reports among `report_files` and
+    how many of them were used. Costs missing from all reports are taken
+    from `DEFAULT_COSTS`.
+    """
+    collected = []
+    for report_file in report_files:
+        try:
+            report = json.loads(pathlib.Path(report_file).read_text())
+        except (OSError, ValueError) as e:
+            log.warning(f'Ignoring report {report_file}: {e}')
+            continue
+        costs = costs_from_report(report)
+        if costs is None:
+            log.warning(
+                f'Ignoring report {report_file}: not a successful run '
+                'with recorded inputs'
+            )
+            continue
+        collected.append(costs)
+
+    costs = dict(DEFAULT_COSTS)
+    for name in costs:
+        values = [c[name] for c in collected if name in c]
+        if values:
+            costs[name] = sum(values) / len(values)
+    return costs, len(collected)
+
+
+def makespan(durations, workers):
+    """
+    Return the wall time of running jobs of the given `durations` on
+    `workers` parallel slots, longest jobs first.
+    """
+    slots = [0.0] * max(1, min(workers, len(durations)))
+    for duration in sorted(durations, reverse=True):
+        heapq.heapreplace(slots, slots[0] + duration)
+    return max(slots) if durations else 0.0
+
+
+class Plan(NamedTuple):
+    workload: Workload
+    reports: int
+    # (name, jobs, workers, wall time) of the phases.
+    phases: List[Tuple[str, int, int, float]]
+    wall_time: float
+    disk_bytes: int
+
+
+def make_plan(ctx, report_files=()):
+    """
+    Estimate the wall time and peak disk usage of the run described by `ctx`
+    with its parallelism, using the costs recorded in `report_files`.
+    """
+    work = workload(ctx)
+    costs, reports = load_costs(report_files)
+    job_pages = work.pages_per_job
+    # Exposures are rendered one after another in batches, unless every font
+    # is rendered once and its exposures are derived from that.
+    batches = work.exposures
+    renders = work.render_jobs
+    synthesize = []
+    if ctx.synthesize_exposures:
+        batches = 1
+        renders = -(-work.render_jobs // work.exposures)
+        synthesize = work.render_jobs * [
+            costs['synthesize_seconds'] * job_pages
+        ]
+    render = renders * [costs['render_seconds'] * job_pages]
+    ngrams = []
+    if ctx.extract_font_properties:
+        # Font properties are extracted once per render without text shards.
+        ngrams = (renders // work.shards) * [costs['ngrams_seconds']]
+    extract = work.render_jobs * [costs['extract_seconds'] * job_pages]
+    unicharset = work.render_jobs * [costs['unicharset_seconds'] * job_pages]
+
+    # The font cache and the final data files do not depend on the text.
+    phases = [('other', 0, 1, costs['fixed_seconds'])]
+    if ctx.pipeline:
+        # Extraction overlaps with rendering and only the last one waits.
+        render += ngrams + synthesize
+        wall_time = max(
+            makespan(render, ctx.render_jobs),
+            makespan(extract, ctx.extract_jobs),
+        ) + (extract[0] if extract else 0.0)
+        phases.append(
+            ('pipeline', len(render) + len(extract), ctx.jobs, wall_time)
+        )
+    else:
+        batch = [
+            *render[: len(render) // batches],
+            *ngrams[: len(ngrams) // batches],
+            *synthesize,
+        ]
+        phases += [
+            (
+                'phase_I',
+                len(render) + len(ngrams) + len(synthesize),
+                ctx.render_jobs,
+                batches * makespan(batch, ctx.render_jobs),
+            ),
+            (
+                'phase_UP',
+                len(unicharset),
+                ctx.jobs,
+                makespan(unicharset, ctx.jobs),
+            ),
+            (
+                'phase_E',
+                len(extract),
+                ctx.extract_jobs,
+                makespan(extract, ctx.extract_jobs),
+            ),
+        ]
+    disk_bytes = int(costs['bytes'] * work.pages)
+    if ctx.bounded_disk and ctx.pipeline:
+        # Pages are removed once extracted, so only the renders running or
+        # waiting for an extraction hold their pages at the same time.
+        held_pages = min(
+            work.pages, (ctx.render_jobs + ctx.extract_jobs) * job_pages
+        )
+        disk_bytes = int(
+            costs['bytes'] * held_pages
+            + costs['features_bytes'] * (work.pages - held_pages)
+        )
+    if ctx.disk_budget:
+        disk_bytes = min(disk_bytes, ctx.disk_budget)
+    return Plan(
+        workload=work,
+        reports=reports,
+        phases=phases,
+        wall_time=sum(phase[3] for phase in phases),
+        disk_bytes=disk_bytes,
+    )
+
+
+def format_duration(seconds):
+    seconds = int(round(seconds))
+    hours, seconds = divmod(seconds, 3600)
+    minutes, seconds = divmod(seconds, 60)
+    if hours:
+        return f'{hours}h {minutes:02d}m'
+    if minutes:
+        return f'{minutes}m {seconds:02d}s'
+    return f'{seconds}s'
+
+
+def format_size(size):
+    for unit in ('B', 'KiB', 'MiB', 'GiB'):
+        if size < 1024:
+            break
+        size /= 1024
+    else:
+        unit = 'TiB'
+    return f'{size:.1f} {unit}' if unit != 'B' else f'{size} B'
+
+
+def format_plan(ctx, plan):
+    work = plan.workload
+    lines = [
+        f'Plan for {ctx.lang_code}: {work.fonts} fonts x {work.exposures} '
+        f'exposures x {work.shards} text shards = '
+        f'{work.fonts * work.exposures * work.shards} renders',
+    ]
+    if ctx.shard:
+        lines.append(
+            f'Shard {ctx.shard[0]}/{ctx.shard[1]}: {work.render_jobs} of '
+            'these renders'
+        )
+    lines += [
+        f'Training text: {work.text_lines} lines, {work.text_chars} '
+        f'characters, about {work.pages_per_job} page(s) per render',
+        (
+            f'Costs from {plan.reports} earlier run(s)'
+            if plan.reports
+            else 'No earlier reports, using rough default costs'
+        ),
+        '',
+        f'{"phase":<10} {"jobs":>6} {"workers":>8} {"wall time":>10}',
+    ]
+    for name, jobs, workers, wall_time in plan.phases:
+        lines.append(
+            f'{name:<10} {jobs:>6} {workers:>8} '
+            f'{format_duration(wall_time):>10}'
+        )
+    lines += [
+        '',
+        f'Estimated wall time: {format_duration(plan.wall_time)}',
+        f'Estimated peak disk usage of the training directory: '
+        f'{format_size(plan.disk_bytes)}',
+    ]
+    if ctx.bounded_disk and not ctx.pipeline:
+        lines.append(
+            'All pages are rendered before their features are extracted; '
+            'use --pipeline to remove them along the way'
+        )
+    return '\n'.join(lines)
@@ -0,0 +1,193 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Machine-readable performance report of a training run.
+"""
+
+import contextlib
+import datetime
+import json
+import logging
+import os
+import pathlib
+import sys
+import threading
+import time
+
+from tesstrain.manifest import write_atomic
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+log = logging.getLogger(__name__)
+
+REPORT_VERSION = 1
+
+REPORT_FILE = 'tesstrain_report.json'
+
+
+def directory_size(directory):
+    """
+    Return the total size in bytes of all files below `directory`.
+    """
+    total = 0
+    for root, _, files in os.walk(str(directory)):
+        for name in files:
+            try:
+                total += os.stat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+def _children_cpu_time():
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _own_max_rss():
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss * (1 if sys.platform == 'darwin' else 1024)
+
+
+class RunReport:
+    """
+    Collects timings and resource usage of the phases and jobs of a run.
+
+    Jobs are taken from the `CommandStats` recorded by `runner` while a phase
+    is active. The bytes written by a phase are the sizes of the files its jobs
+    report with `add_written`, so files removed or moved later still count.
+    """
+
+    def __init__(self, runner):
+        self.runner = runner
+        self.started = datetime.datetime.now().astimezone()
+        self.start_time = time.monotonic()
+        self.cpu_count = os.cpu_count() or 1
+        self.phases = []
+        self.jobs = []
+        self.status = 'running'
+        # Size of the work of the run, see `tesstrain.plan.Workload`.
+        self.inputs = None
+        self.bytes_written = 0
+        self._lock = threading.Lock()
+
+    def add_written(self, size):
+        """
+        Count `size` bytes of files written by a job of the current phase.
+        """
+        with self._lock:
+            self.bytes_written += size
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """
+        Measure the code run inside the `with` block as phase `name`.
+        """
+        first_job = len(self.runner.stats)
+        start = time.monotonic()
+        cpu_start = _children_cpu_time()
+        written_start = self.bytes_written
+        try:
+            yield
+        finally:
+            wall_time = time.monotonic() - start
+            cpu_end = _children_cpu_time()
+            jobs = [
+                self._job_entry(stats, name)
+                for stats in self.runner.stats[first_job:]
+            ]
+            self.jobs.extend(jobs)
+            self.phases.append(
+                self._summary(
+                    name,
+                    wall_time,
+                    None if cpu_start is None else cpu_end - cpu_start,
+                    jobs,
+                    bytes_written=self.bytes_written - written_start,
+                )
+            )
+
+    @staticmethod
+    def _job_entry(stats, phase):
+        return {
+            'phase': phase,
+            'job': stats.job,
+            'program': pathlib.Path(stats.program).name,
+            'args': stats.args,
+            'returncode': stats.returncode,
+            'wall_time': stats.wall_time,
+            'cpu_time': stats.cpu_time,
+            'max_rss': stats.max_rss,
+            'log_file': stats.log_file,
+        }
+
+    def _summary(self, name, wall_time, cpu_time, jobs, bytes_written):
+        max_rss = [job['max_rss'] for job in jobs if job['max_rss']]
+        utilization = None
+        if cpu_time is not None and wall_time > 0:
+            utilization = cpu_time / (wall_time * self.cpu_count)
+        return {
+            'name': name,
+            'wall_time': wall_time,
+            'cpu_time': cpu_time,
+            'cpu_utilization': utilization,
+            'peak_job_rss': max(max_rss) if max_rss else None,
+            'bytes_written': bytes_written,
+            'jobs': len(jobs),
+            'failed_jobs': sum(1 for job in jobs if job['returncode'] != 0),
+        }
+
+    def as_dict(self, output_dir=None):
+        wall_time = time.monotonic() - self.start_time
+        cpu_time = None
+        if all(phase['cpu_time'] is not None for phase in self.phases):
+            cpu_time = sum(phase['cpu_time'] for phase in self.phases)
+        totals = self._summary(
+            'total',
+            wall_time,
+            cpu_time,
+            self.jobs,
+            bytes_written=sum(phase['bytes_written'] for phase in self.phases),
+        )
+        totals['peak_rss'] = _own_max_rss()
+        if output_dir and pathlib.Path(output_dir).is_dir():
+            totals['output_bytes'] = directory_size(output_dir)
+        return {
+            'version': REPORT_VERSION,
+            'status': self.status,
+            'started': self.started.isoformat(timespec='seconds'),
+            'cpu_count': self.cpu_count,
+            'inputs': self.inputs,
+            'totals': totals,
+            'phases': self.phases,
+            'failures': [job for job in self.jobs if job['returncode'] != 0],
+            'jobs': self.jobs,
+        }
+
+    def write(self, output_dir, filename=REPORT_FILE):
+        """
+        Write the report as JSON to `output_dir` and return its path.
+        """
+        path = pathlib.Path(output_dir)
+        path.mkdir(parents=True, exist_ok=True)
+        report_file = path / filename
+        write_atomic(
+            report_file, json.dumps(self.as_dict(output_dir), indent=1) + '\n'
+        )
+        log.info(f'Performance report written to {report_file}')
+        return report_file
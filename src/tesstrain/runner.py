@@ -0,0 +1,344 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Execution of external programs with per-job logs and resource accounting.
+"""
+
+import collections
+import contextvars
+import itertools
+import logging
+import os
+import pathlib
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from tesstrain.exceptions import JobError
+
+log = logging.getLogger(__name__)
+
+# Number of trailing output lines of a failed program copied to the main log.
+FAILURE_LOG_LINES = 50
+
+# Name of the job whose programs are run, set by the schedulers.
+current_job = contextvars.ContextVar('current_job', default=None)
+
+
+class CommandStats(NamedTuple):
+    """
+    Outcome and resource usage of a single program invocation.
+    """
+
+    program: str
+    args: List[str]
+    returncode: int
+    wall_time: float
+    cpu_time: Optional[float]
+    max_rss: Optional[int]
+    log_file: Optional[str]
+    job: Optional[str] = None
+
+
+class Command(NamedTuple):
+    """
+    A program invocation requested by a job.
+    """
+
+    cmd: str
+    args: Tuple[Any, ...]
+    env: Optional[Dict[str, str]] = None
+
+
+class CommandFailed(JobError):
+    """
+    A program exited with a non-zero return code.
+    """
+
+    def __init__(self, stats):
+        self.stats = stats
+        message = (
+            f'Program {stats.program} failed with return code '
+            f'{stats.returncode}'
+        )
+        if stats.log_file:
+            message += f' (see {stats.log_file})'
+        super().__init__(message)
+
+
+class JobCancelled(Exception):
+    """
+    A program was not started or was terminated because the runner has been
+    cancelled.
+    """
+
+
+@lru_cache(maxsize=None)
+def resolve_command(cmd):
+    """
+    Find the program file for `cmd`, also looking in the `api/` and `training/`
+    directories of a Tesseract build tree. Returns None if it is not found.
+    """
+    for d in ('', 'api/', 'training/'):
+        path = shutil.which(f'{d}{cmd}')
+        if path:
+            return path
+    return None
+
+
+def _wait_exited(proc):
+    """
+    Wait until `proc` has exited without reaping it, so that its pid cannot be
+    reused while it may still be signalled.
+    """
+    if hasattr(os, 'waitid') and hasattr(os, 'WNOWAIT'):
+        try:
+            os.waitid(os.P_PID, proc.pid, os.WEXITED | os.WNOWAIT)
+        except ChildProcessError:
+            pass
+
+
+def _wait(proc):
+    """
+    Wait for `proc` and return its resource usage if the platform reports it.
+    """
+    if hasattr(os, 'wait4'):
+        try:
+            _, status, rusage = os.wait4(proc.pid, 0)
+        except ChildProcessError:
+            # Already reaped elsewhere, e.g. by Popen.poll().
+            proc.wait()
+            return None
+        if os.WIFSIGNALED(status):
+            proc.returncode = -os.WTERMSIG(status)
+        else:
+            proc.returncode = os.WEXITSTATUS(status)
+        return rusage
+    proc.wait()
+    return None
+
+
+def tail(filename, lines=FAILURE_LOG_LINES, block_size=8192):
+    """
+    Return the last `lines` lines of a text file without reading all of it.
+    """
+    with open(filename, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        end = f.tell()
+        data = b''
+        while end > 0 and data.count(b'\n') <= lines:
+            start = max(0, end - block_size)
+            f.seek(start)
+            data = f.read(end - start) + data
+            end = start
+    text = data.decode('utf-8', errors='replace')
+    return '\n'.join(text.splitlines()[-lines:])
+
+
+class CommandRunner:
+    """
+    Runs external programs, streaming their output to a log file per job.
+
+    The output of a program is never held in memory: it goes straight to a
+    file in `log_dir` (or to a temporary file if no directory is set). Wall
+    time, CPU time and peak memory of every invocation are recorded in
+    `stats`.
+
+    After `cancel()`, running programs are terminated and no new ones are
+    started until `reset()` is called.
+    """
+
+    def __init__(self, log_dir=None):
+        self.log_dir = None
+        self.stats = []
+        self._lock = threading.Lock()
+        self._counter = itertools.count(1)
+        self._active = {}
+        self._cancelled = threading.Event()
+        self.set_log_dir(log_dir)
+
+    def set_log_dir(self, log_dir):
+        if log_dir:
+            pathlib.Path(log_dir).mkdir(parents=True, exist_ok=True)
+        self.log_dir = log_dir
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        """
+        Terminate all running programs and refuse to start new ones.
+        """
+        with self._lock:
+            self._cancelled.set()
+            active = list(self._active.values())
+            for proc in active:
+                try:
+                    os.kill(proc.pid, signal.SIGTERM)
+                except OSError:
+                    pass
+        if active:
+            log.info(f'Terminated {len(active)} running job(s)')
+
+    def reset(self):
+        """
+        Allow programs to be started again after `cancel()`.
+        """
+        self._cancelled.clear()
+
+    def prepare(self, cmd, args):
+        """
+        Resolve `cmd` and convert `args` to strings for running them.
+
+        Raises FileNotFoundError if the program cannot be found and
+        JobCancelled if the runner has been cancelled.
+        """
+        if self.cancelled:
+            raise JobCancelled(f'{cmd} was not started')
+        program = resolve_command(cmd)
+        if not program:
+            raise FileNotFoundError(f'{cmd} not found')
+        # Workaround for https://bugs.python.org/issue33617
+        # TypeError: argument of type 'WindowsPath' is not iterable
+        args = [str(arg) for arg in args]
+        log.debug(f'Running {program} {" ".join(args)}')
+        return program, args
+
+    def open_log(self, cmd):
+        """
+        Return a new job number, its log file (or None) and the open file
+        receiving the output of the job.
+        """
+        job = next(self._counter)
+        if self.log_dir:
+            log_file = (
+                pathlib.Path(self.log_dir)
+                / f'{job:06d}-{pathlib.Path(cmd).name}.log'
+            )
+            return job, log_file, log_file.open('wb')
+        return job, None, tempfile.TemporaryFile()
+
+    @staticmethod
+    def log_failure(program, log_file, output):
+        """
+        Copy the last lines of the output of a failed program to the log.
+        """
+        output.flush()
+        if log_file:
+            log.error(f'Output of {program} ({log_file}):')
+            log.error(tail(log_file))
+        else:
+            output.seek(0)
+            last_lines = collections.deque(output, FAILURE_LOG_LINES)
+            log.error(b''.join(last_lines).decode('utf-8', errors='replace'))
+
+    def record(self, program, args, returncode, wall_time, rusage, log_file):
+        """
+        Record the `CommandStats` of a finished program and return them.
+        """
+        cpu_time = max_rss = None
+        if rusage is not None:
+            cpu_time = rusage.ru_utime + rusage.ru_stime
+            # ru_maxrss is in bytes on macOS and in kilobytes elsewhere.
+            max_rss = rusage.ru_maxrss * (
+                1 if sys.platform == 'darwin' else 1024
+            )
+        stats = CommandStats(
+            program=program,
+            args=args,
+            returncode=returncode,
+            wall_time=wall_time,
+            cpu_time=cpu_time,
+            max_rss=max_rss,
+            log_file=str(log_file) if log_file else None,
+            job=current_job.get(),
+        )
+        with self._lock:
+            self.stats.append(stats)
+        log.debug(
+            f'{pathlib.Path(program).name} finished in {wall_time:.2f}s '
+            f'with return code {returncode}'
+        )
+        return stats
+
+    def run(self, cmd, *args, env=None):
+        """
+        Run `cmd` with `args` and return its `CommandStats`.
+
+        Raises FileNotFoundError if the program cannot be found and
+        JobCancelled if the runner has been cancelled.
+        """
+        program, args = self.prepare(cmd, args)
+        job, log_file, output = self.open_log(cmd)
+        with output:
+            start = time.monotonic()
+            with self._lock:
+                if self.cancelled:
+                    raise JobCancelled(f'{cmd} was not started')
+                proc = subprocess.Popen(
+                    [program, *args],
+                    stdout=output,
+                    stderr=subprocess.STDOUT,
+                    env=env,
+                )
+                self._active[job] = proc
+            _wait_exited(proc)
+            with self._lock:
+                del self._active[job]
+            rusage = _wait(proc)
+            wall_time = time.monotonic() - start
+            terminated = self.cancelled and proc.returncode == -signal.SIGTERM
+            if proc.returncode != 0 and not terminated:
+                self.log_failure(program, log_file, output)
+
+        stats = self.record(
+            program, args, proc.returncode, wall_time, rusage, log_file
+        )
+        if terminated:
+            raise JobCancelled(f'{cmd} was terminated')
+        return stats
+
+
+def run_steps(steps, command_runner=None):
+    """
+    Run a job written as a generator of `Command`s.
+
+    Every command is run when it is yielded and its `CommandStats` are sent
+    back into the generator. A failed command raises CommandFailed inside the
+    generator. Returns the return value of the generator.
+    """
+    command_runner = command_runner or runner
+    try:
+        command = next(steps)
+        while True:
+            try:
+                stats = command_runner.run(
+                    command.cmd, *command.args, env=command.env
+                )
+                if stats.returncode != 0:
+                    raise CommandFailed(stats)
+            except Exception as exc:
+                command = steps.throw(exc)
+            else:
+                command = steps.send(stats)
+    except StopIteration as stop:
+        return stop.value
+
+
+# Runner used by the training phases.
+runner = CommandRunner()
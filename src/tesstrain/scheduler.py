@@ -0,0 +1,259 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Dependency-driven scheduling of the jobs of a training run.
+"""
+
+import collections
+import concurrent.futures
+import contextlib
+import heapq
+import inspect
+import itertools
+import logging
+
+from tesstrain.exceptions import JobError
+from tesstrain.runner import JobCancelled, current_job, run_steps
+
+log = logging.getLogger(__name__)
+
+
+class JobsFailed(JobError):
+    """
+    One or more jobs failed.
+
+    `failures` lists the `(name, exception)` pairs of all failed jobs. Jobs
+    which were cancelled because of them are only counted in `cancelled`.
+    """
+
+    def __init__(self, failures, cancelled=0):
+        self.failures = failures
+        self.cancelled = cancelled
+        summary = f'{len(failures)} job(s) failed'
+        if cancelled:
+            summary += f', {cancelled} cancelled'
+        lines = [summary]
+        for name, exc in failures:
+            lines.append(f'  {name}: {exc}')
+        super().__init__('\n'.join(lines))
+
+
+def _failure(future):
+    """
+    Return the exception of a finished `future`, or None if it succeeded.
+    """
+    if future.cancelled():
+        return JobCancelled()
+    return future.exception()
+
+
+def call_job(task):
+    """
+    Call the function of `task`, running its commands if it is a generator of
+    `Command`s.
+    """
+    token = current_job.set(task.name)
+    try:
+        result = task.fn(*task.args, **task.kwargs)
+        if inspect.isgenerator(result):
+            return run_steps(result)
+        return result
+    finally:
+        current_job.reset(token)
+
+
+class Task:
+    __slots__ = (
+        'name',
+        'fn',
+        'args',
+        'kwargs',
+        'pool',
+        'priority',
+        'waiting',
+        'dependents',
+    )
+
+    def __init__(self, name, fn, args, kwargs, pool, priority):
+        self.name = name
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.pool = pool
+        self.priority = priority
+        self.waiting = 0
+        self.dependents = []
+
+
+class TaskGraph:
+    """
+    A set of jobs with dependencies between them.
+
+    A job is a function, or a generator function yielding the `Command`s to
+    run (see `run_steps`).
+
+    Each job is started as soon as all the jobs it depends on have finished,
+    so independent chains of work (e.g. rendering and feature extraction of
+    one font) proceed without waiting for each other. Jobs belong to a named
+    pool, whose concurrency can be limited separately from the total number of
+    workers.
+    """
+
+    def __init__(self):
+        self.tasks = {}
+
+    def __len__(self):
+        return len(self.tasks)
+
+    def add(self, name, fn, *args, deps=(), pool=None, priority=0, **kwargs):
+        """
+        Add job `name` running `fn(*args, **kwargs)` after all jobs in `deps`.
+
+        Among runnable jobs, those with a higher `priority` are started first.
+        """
+        if name in self.tasks:
+            raise ValueError(f'Duplicate task {name}')
+        task = Task(name, fn, args, kwargs, pool, priority)
+        for dep in deps:
+            self.tasks[dep].dependents.append(task)
+            task.waiting += 1
+        self.tasks[name] = task
+        return name
+
+    def run(
+        self,
+        max_workers,
+        pool_limits=None,
+        progress=None,
+        on_failure=None,
+        admit=None,
+        executor=None,
+    ):
+        """
+        Run all jobs with at most `max_workers` of them at the same time.
+
+        When a job fails, no further jobs are started and `on_failure` is
+        called, e.g. to terminate running programs. JobsFailed with all
+        failures is raised once the running jobs have ended.
+
+        :param pool_limits: Maximum number of concurrent jobs per pool.
+        :param progress: Called with the name of every finished job.
+        :param on_failure: Called once when the first job fails.
+        :param admit: Called with a ready job and the number of running jobs of
+                      its pool; the job is only started if it returns true or
+                      no job is running at all.
+        :param executor: Thread pool to run the jobs in, which is left running
+                         afterwards. A new one is used by default.
+        """
+        pool_limits = pool_limits or {}
+        counter = itertools.count()
+        ready = []
+
+        def make_ready(task):
+            heapq.heappush(ready, (-task.priority, next(counter), task))
+
+        for task in self.tasks.values():
+            if task.waiting == 0:
+                make_ready(task)
+
+        running = {}
+        pool_running = collections.Counter()
+        failures = []
+        finished = 0
+        stopping = False
+        if executor is None:
+            executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=max_workers
+            )
+        else:
+            executor = contextlib.nullcontext(executor)
+        with executor as executor:
+            try:
+                while (ready and not stopping) or running:
+                    if not stopping:
+                        self._submit(
+                            executor,
+                            ready,
+                            running,
+                            pool_running,
+                            max_workers,
+                            pool_limits,
+                            admit,
+                        )
+                    done, _ = concurrent.futures.wait(
+                        running,
+                        return_when=concurrent.futures.FIRST_COMPLETED,
+                    )
+                    for future in done:
+                        task = running.pop(future)
+                        pool_running[task.pool] -= 1
+                        exc = _failure(future)
+                        if exc is not None:
+                            if not isinstance(exc, JobCancelled):
+                                failures.append((task.name, exc))
+                            stopping = True
+                            continue
+                        finished += 1
+                        log.debug(f'Finished {task.name}')
+                        if progress:
+                            progress(task.name)
+                        for dependent in task.dependents:
+                            dependent.waiting -= 1
+                            if dependent.waiting == 0:
+                                make_ready(dependent)
+                    if stopping and on_failure:
+                        log.error('Cancelling the remaining jobs')
+                        on_failure()
+                        on_failure = None
+            except BaseException:
+                # E.g. KeyboardInterrupt: do not leave programs running.
+                if on_failure:
+                    on_failure()
+                raise
+
+        if finished < len(self.tasks):
+            raise JobsFailed(
+                failures, len(self.tasks) - finished - len(failures)
+            )
+
+    @staticmethod
+    def _submit(
+        executor,
+        ready,
+        running,
+        pool_running,
+        max_workers,
+        pool_limits,
+        admit=None,
+    ):
+        """
+        Start ready jobs until all workers are busy or pool limits are
+        reached.
+        """
+        deferred = []
+        while ready and len(running) < max_workers:
+            item = heapq.heappop(ready)
+            task = item[-1]
+            limit = pool_limits.get(task.pool)
+            if limit is not None and pool_running[task.pool] >= limit:
+                deferred.append(item)
+                continue
+            if admit and running and not admit(task, pool_running[task.pool]):
+                deferred.append(item)
+                continue
+            future = executor.submit(call_job, task)
+            running[future] = task
+            pool_running[task.pool] += 1
+        for item in deferred:
+            heapq.heappush(ready, item)
+
+        if not running:
+            raise RuntimeError('Pool limits prevent any task from running')
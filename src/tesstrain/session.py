@@ -0,0 +1,154 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Running several trainings in one process.
+
+A `Session` keeps the font cache, the render cache, the font listings and a
+worker pool between runs, and returns the results of each run as a
+`TrainingResult`. Failed runs raise a `tesstrain.exceptions.TesstrainError`
+instead of exiting the process.
+"""
+
+import concurrent.futures
+import inspect
+import json
+import logging
+import pathlib
+import time
+from tempfile import TemporaryDirectory
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from tesstrain.arguments import (
+    default_jobs,
+    verify_parameters_and_handle_defaults,
+)
+from tesstrain.cache import RenderCache
+from tesstrain.generate import cleanup
+from tesstrain.report import REPORT_FILE
+from tesstrain.wrapper import make_context, run, run_from_context
+
+log = logging.getLogger(__name__)
+
+
+class TrainingResult(NamedTuple):
+    """
+    The files produced by a training run and its performance report.
+    """
+
+    output_dir: pathlib.Path
+    # Starter traineddata, None for a shard of a run.
+    traineddata: Optional[pathlib.Path]
+    training_files: pathlib.Path
+    lstmf_files: List[pathlib.Path]
+    report_file: pathlib.Path
+    report: Dict[str, Any]
+    wall_time: float
+
+
+class Session:
+    """
+    Runs trainings one after another, sharing their expensive resources.
+
+    The font cache is initialized once in `fontconfig_cache_dir`, or in a
+    temporary directory removed by `close()`. Renders are cached in
+    `render_cache_dir` if given. The fonts found in a fonts directory are
+    listed once per session, so fonts added while it is open are not seen.
+    Jobs of all runs are run by one pool of `max_workers` threads.
+    """
+
+    def __init__(
+        self,
+        fontconfig_cache_dir=None,
+        render_cache_dir=None,
+        max_workers=None,
+    ):
+        self._tmp_dir = None
+        if not fontconfig_cache_dir:
+            self._tmp_dir = TemporaryDirectory(prefix='tesstrain_session')
+            fontconfig_cache_dir = self._tmp_dir.name
+        self.fontconfig_cache_dir = fontconfig_cache_dir
+        self.render_cache_dir = render_cache_dir
+        self.render_cache = (
+            RenderCache(render_cache_dir) if render_cache_dir else None
+        )
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers or default_jobs()
+        )
+        self._font_indexes = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """
+        Stop the worker pool and remove the temporary font cache.
+        """
+        self.executor.shutdown()
+        if self._tmp_dir:
+            self._tmp_dir.cleanup()
+            self._tmp_dir = None
+
+    def run(self, **kwargs):
+        """
+        Run a training with the keyword arguments of `tesstrain.run` and
+        return its `TrainingResult`.
+
+        The cache directories of the session are used unless others are given.
+        """
+        params = inspect.signature(run).bind(**kwargs)
+        params.apply_defaults()
+        params = params.arguments
+        if not params['fontconfig_cache_directory']:
+            params['fontconfig_cache_directory'] = self.fontconfig_cache_dir
+        if not params['render_cache_directory']:
+            params['render_cache_directory'] = self.render_cache_dir
+
+        start = time.monotonic()
+        ctx = make_context(params)
+        ctx.executor = self.executor
+        if ctx.render_cache_dir == self.render_cache_dir:
+            ctx.render_cache = self.render_cache
+        index_key = (ctx.fonts_dir, ctx.fontconfig_cache_dir)
+        ctx.font_index = self._font_indexes.get(index_key)
+
+        try:
+            verify_parameters_and_handle_defaults(ctx)
+            if ctx.font_index is not None:
+                self._font_indexes[index_key] = ctx.font_index
+            run_from_context(ctx)
+        finally:
+            # Also remove the training directory of a failed run, keeping its
+            # log in the output directory.
+            if hasattr(ctx, 'log_file'):
+                cleanup(ctx)
+        wall_time = time.monotonic() - start
+        log.info(f'Finished training {ctx.lang_code} in {wall_time:.1f}s')
+        return self._result(ctx, wall_time)
+
+    @staticmethod
+    def _result(ctx, wall_time):
+        output_dir = pathlib.Path(ctx.output_dir)
+        traineddata = (
+            output_dir / ctx.lang_code / f'{ctx.lang_code}.traineddata'
+        )
+        report_file = output_dir / REPORT_FILE
+        return TrainingResult(
+            output_dir=output_dir,
+            traineddata=traineddata if traineddata.exists() else None,
+            training_files=output_dir / f'{ctx.lang_code}.training_files.txt',
+            lstmf_files=sorted(output_dir.glob(f'{ctx.lang_code}.*.lstmf')),
+            report_file=report_file,
+            report=json.loads(report_file.read_text()),
+            wall_time=wall_time,
+        )
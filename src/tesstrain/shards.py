@@ -0,0 +1,255 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Splitting the font/exposure jobs of a run over several hosts, and merging
+the partial results.
+
+Every host runs tesstrain with the same arguments plus `--shard i/n`, and
+renders and extracts only the jobs assigned to shard `i`. Its output
+directory then holds the `.lstmf` files and the unicharset of these jobs,
+described by a `<lang>.shard.json` file. `--merge_shards` combines the
+output directories of all shards into the training file list and starter
+traineddata of the whole run.
+"""
+
+import argparse
+import collections
+import json
+import logging
+import pathlib
+import shutil
+
+from tesstrain.cache import link_or_copy
+from tesstrain.exceptions import InputError
+from tesstrain.generate import (
+    check_file_readable,
+    err_exit,
+    make_fontname,
+    merge_unicharsets_steps,
+    record_outputs,
+    run_command,
+    unicharset_properties_command,
+)
+from tesstrain.manifest import write_atomic
+from tesstrain.runner import run_steps
+
+log = logging.getLogger(__name__)
+
+
+def parse_shard(text):
+    """
+    Parse a shard given as `i/n`, the `i`th of `n` shards counted from 0.
+    """
+    try:
+        index, count = (int(part) for part in text.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f'expected i/n, got {text!r}'
+        ) from None
+    if not 0 <= index < count:
+        raise argparse.ArgumentTypeError(
+            f'shard index must be in 0..{count - 1}, got {text!r}'
+        )
+    return index, count
+
+
+def shard_info_file(output_dir, lang_code):
+    return pathlib.Path(output_dir) / f'{lang_code}.shard.json'
+
+
+def job_costs(report_files):
+    """
+    Return the mean seconds of rendering each font, by font name, from the
+    performance reports `report_files`.
+    """
+    seconds = collections.defaultdict(list)
+    for report_file in report_files:
+        try:
+            report = json.loads(pathlib.Path(report_file).read_text())
+        except (OSError, ValueError) as e:
+            err_exit(f'Cannot read report {report_file}: {e}', InputError)
+        for job in report['jobs']:
+            if job['program'] != 'text2image' or job['returncode'] != 0:
+                continue
+            args = dict(
+                arg[2:].split('=', 1) for arg in job['args'] if '=' in arg
+            )
+            if 'font' in args and 'only_extract_font_properties' not in args:
+                seconds[args['font']].append(job['wall_time'])
+    return {font: sum(times) / len(times) for font, times in seconds.items()}
+
+
+def assign_jobs(jobs, count, costs=None):
+    """
+    Distribute the `(font, exposure)` `jobs` over `count` shards.
+
+    The most expensive jobs are assigned first, each to the shard with the
+    least total cost so far. Fonts without a known cost get the mean cost of
+    the others. Ties are broken by name, so every host computes the same
+    assignment from the same jobs and costs. Returns a list of job sets.
+    """
+    costs = costs or {}
+    default = sum(costs.values()) / len(costs) if costs else 1.0
+    ordered = sorted(
+        jobs, key=lambda job: (-costs.get(job[0], default), job[0], job[1])
+    )
+    shards = [set() for _ in range(count)]
+    loads = [0.0] * count
+    for job in ordered:
+        index = min(range(count), key=lambda i: (loads[i], i))
+        shards[index].add(job)
+        loads[index] += costs.get(job[0], default)
+    return shards
+
+
+def select_shard(ctx):
+    """
+    Set `ctx.shard_jobs` to the `(font, exposure)` jobs of `ctx.shard`.
+    """
+    if not ctx.shard:
+        ctx.shard_jobs = None
+        return
+    index, count = ctx.shard
+    jobs = [
+        (font, str(exposure))
+        for exposure in ctx.exposures
+        for font in ctx.fonts
+    ]
+    costs = job_costs(ctx.shard_costs or [])
+    if ctx.synthesize_exposures:
+        # All exposures of a font are derived from one render of it, so they
+        # stay together.
+        fonts = assign_jobs([(font, '') for font in ctx.fonts], count, costs)
+        ctx.shard_jobs = {
+            (font, str(exposure))
+            for font, _ in fonts[index]
+            for exposure in ctx.exposures
+        }
+    else:
+        ctx.shard_jobs = assign_jobs(jobs, count, costs)[index]
+    if not ctx.shard_jobs:
+        log.warning(
+            f'Shard {index}/{count} is empty: there are only {len(jobs)} '
+            'font/exposure jobs'
+        )
+        return
+    log.info(
+        f'Shard {index}/{count}: {len(ctx.shard_jobs)} of {len(jobs)} '
+        'font/exposure jobs'
+    )
+
+
+def finish_shard(ctx):
+    """
+    Complete the output directory of a shard with its unicharset and the
+    description read by `merge_shards`.
+
+    An empty shard has no unicharset; its description with no jobs marks it
+    as finished.
+    """
+    index, count = ctx.shard
+    output_dir = pathlib.Path(ctx.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    unicharset = output_dir / f'{ctx.lang_code}.unicharset'
+    if ctx.shard_jobs:
+        shutil.copyfile(str(ctx.unicharset_file), str(unicharset))
+    elif unicharset.exists():
+        # Left over from an earlier split of the run.
+        unicharset.unlink()
+    write_atomic(
+        shard_info_file(output_dir, ctx.lang_code),
+        json.dumps(
+            {
+                'lang': ctx.lang_code,
+                'shard': index,
+                'shards': count,
+                'jobs': sorted(
+                    make_fontname(font) + f'.exp{exposure}'
+                    for font, exposure in ctx.shard_jobs
+                ),
+            },
+            indent=1,
+        )
+        + '\n',
+    )
+
+
+def read_shards(ctx):
+    """
+    Return the descriptions of the shards in `ctx.merge_shards`, checking that
+    they are complete.
+    """
+    infos = {}
+    for directory in ctx.merge_shards:
+        info_file = shard_info_file(directory, ctx.lang_code)
+        try:
+            info = json.loads(info_file.read_text())
+        except (OSError, ValueError) as e:
+            err_exit(
+                f'{directory} is not a finished {ctx.lang_code} shard: {e}',
+                InputError,
+            )
+        if info['shard'] in infos:
+            err_exit(
+                f'Shard {info["shard"]} given twice: '
+                f'{infos[info["shard"]][0]} and {directory}',
+                InputError,
+            )
+        infos[info['shard']] = (pathlib.Path(directory), info)
+
+    counts = {info['shards'] for _, info in infos.values()}
+    if len(counts) != 1:
+        err_exit(f'Shards of different splits: {sorted(counts)}', InputError)
+    count = counts.pop()
+    missing = sorted(set(range(count)) - set(infos))
+    if missing:
+        err_exit(
+            f'Missing shards {", ".join(map(str, missing))} of {count}',
+            InputError,
+        )
+    return [infos[index] for index in range(count)]
+
+
+def merge_shards(ctx):
+    """
+    Collect the `.lstmf` files and unicharsets of all shards in the training
+    directory, as if all jobs had run here. Empty shards are skipped.
+    """
+    log.info(f'=== Merging {len(ctx.merge_shards)} shards ===')
+    training_dir = pathlib.Path(ctx.training_dir)
+    unicharsets = []
+    for directory, info in read_shards(ctx):
+        if not info['jobs']:
+            log.info(f'Shard {info["shard"]}: empty')
+            continue
+        lstmf_files = sorted(directory.glob(f'{ctx.lang_code}.*.lstmf'))
+        log.info(
+            f'Shard {info["shard"]}: {len(lstmf_files)} lstmf files '
+            f'from {directory}'
+        )
+        for lstmf_file in lstmf_files:
+            dst = training_dir / lstmf_file.name
+            if dst.exists():
+                dst.unlink()
+            link_or_copy(lstmf_file, dst)
+        unicharset = directory / f'{ctx.lang_code}.unicharset'
+        check_file_readable(unicharset)
+        unicharsets.append(unicharset)
+    if not unicharsets:
+        err_exit('All shards are empty', InputError)
+
+    ctx.unicharset_file = training_dir / f'{ctx.lang_code}.unicharset'
+    ctx.xheights_file = training_dir / f'{ctx.lang_code}.xheights'
+    run_steps(merge_unicharsets_steps(unicharsets, ctx.unicharset_file))
+    command = unicharset_properties_command(ctx)
+    run_command(command.cmd, *command.args)
+    check_file_readable(ctx.unicharset_file, ctx.xheights_file)
+    record_outputs(ctx, ctx.unicharset_file, ctx.xheights_file)
@@ -0,0 +1,140 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Sanity checks of the files produced by the training phases.
+"""
+
+import collections
+import os
+import pathlib
+
+from tesstrain.exceptions import JobError
+
+TIFF_MAGIC = (b'II*\0', b'MM\0*')
+PNG_MAGIC = b'\x89PNG\r\n\x1a\n'
+
+# Bytes read from the end of a box file to find its last line.
+BOX_TAIL_BYTES = 4096
+
+# Up to this many files of a directory are checked with a stat() call each
+# instead of listing the directory.
+MAX_STAT_FILES = 8
+
+
+class OutputError(JobError):
+    """
+    Produced files are missing or malformed.
+    """
+
+    def __init__(self, problems):
+        self.problems = problems
+        super().__init__('; '.join(problems))
+
+
+def _check_image(path, size):
+    with open(path, 'rb') as f:
+        header = f.read(len(PNG_MAGIC))
+    if header[:4] in TIFF_MAGIC or header == PNG_MAGIC:
+        return None
+    return f'{path} is not a TIFF or PNG image'
+
+
+def _check_box(path, size):
+    # text2image ends every text line, and thus the file, with a tab box.
+    with open(path, 'rb') as f:
+        f.seek(max(0, size - BOX_TAIL_BYTES))
+        last_line = f.read().rstrip(b'\r\n').rsplit(b'\n', 1)[-1]
+    if last_line.startswith(b'\t'):
+        return None
+    return f'{path} does not end with a tab line'
+
+
+CHECKS = {
+    '.tif': _check_image,
+    '.png': _check_image,
+    '.box': _check_box,
+}
+
+
+def check_output(path, size):
+    """
+    Return the problem with produced file `path` of `size` bytes, or None.
+    """
+    if size == 0:
+        return f'{path} is empty'
+    check = CHECKS.get(pathlib.Path(path).suffix)
+    if check:
+        try:
+            return check(path, size)
+        except OSError as e:
+            return f'{path} IO Error: {e}'
+    return None
+
+
+def _sizes(directory, paths):
+    """
+    Return the sizes of the existing files among `paths` in `directory`.
+    """
+    sizes = {}
+    if len(paths) <= MAX_STAT_FILES:
+        for path in paths:
+            try:
+                sizes[path.name] = path.stat().st_size
+            except OSError:
+                pass
+        return sizes
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_file():
+                        sizes[entry.name] = entry.stat().st_size
+                except OSError:
+                    pass
+    except FileNotFoundError:
+        pass
+    return sizes
+
+
+def verify_outputs(filenames):
+    """
+    Check that all `filenames` exist and look valid.
+
+    Every directory is listed once instead of opening each file, and only
+    files with a format check (see `CHECKS`) are read. Returns a list of all
+    problems found, which is empty if there are none.
+    """
+    by_directory = collections.defaultdict(list)
+    for filename in filenames:
+        path = pathlib.Path(filename)
+        by_directory[path.parent].append(path)
+
+    problems = []
+    for directory, paths in by_directory.items():
+        sizes = _sizes(directory, paths)
+        for path in paths:
+            size = sizes.get(path.name)
+            if size is None:
+                problems.append(f"Expected file '{path}' does not exist")
+                continue
+            problem = check_output(path, size)
+            if problem:
+                problems.append(problem)
+    return problems
+
+
+def require_outputs(*filenames):
+    """
+    Raise OutputError with all problems of `filenames`, if there are any.
+    """
+    problems = verify_outputs(filenames)
+    if problems:
+        raise OutputError(problems)
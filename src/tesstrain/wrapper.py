@@ -14,8 +14,9 @@
 Actual execution logic.
 """
 
+import argparse
 import logging
-import sys
+import pathlib
 from typing import List, Optional
 
 from tesstrain import language_specific
@@ -23,13 +24,29 @@ from tesstrain.arguments import (
     TrainingArguments,
     verify_parameters_and_handle_defaults,
 )
+from tesstrain.fonts import check_fonts
 from tesstrain.generate import (
+    check_file_readable,
     cleanup,
+    err_exit,
     initialize_fontconfig,
     make_lstmdata,
     phase_E_extract_features,
     phase_I_generate_image,
+    phase_IE_pipelined,
     phase_UP_generate_unicharset,
+    prepare_fontconfig_workers,
+)
+from tesstrain.disk import DiskBudget
+from tesstrain.exceptions import ConfigurationError
+from tesstrain.plan import DEFAULT_COSTS, format_plan, make_plan, workload
+from tesstrain.report import REPORT_FILE, RunReport
+from tesstrain.runner import CommandFailed, runner
+from tesstrain.shards import (
+    finish_shard,
+    merge_shards,
+    parse_shard,
+    select_shard,
 )
 
 log = logging.getLogger()
@@ -37,19 +54,90 @@ log = logging.getLogger()
 
 def run_from_context(ctx):
     if not ctx.linedata:
-        log.error('--linedata_only is required since only LSTM is supported')
-        sys.exit(1)
+        err_exit(
+            '--linedata_only is required since only LSTM is supported',
+            ConfigurationError,
+        )
 
     log.info(f'=== Starting training for language {ctx.lang_code}')
     ctx = language_specific.set_lang_specific_parameters(ctx, ctx.lang_code)
+    if not ctx.merge_shards:
+        check_fonts(ctx, ctx.fonts)
+        select_shard(ctx)
+    if ctx.disk_budget:
+        check_file_readable(ctx.training_text)
+        # Until the first render is done, expect the size of a default page.
+        ctx.disk_admission = DiskBudget(
+            ctx.training_dir,
+            ctx.disk_budget,
+            workload(ctx).pages_per_job * DEFAULT_COSTS['bytes'],
+        )
+    runner.set_log_dir(pathlib.Path(ctx.training_dir) / 'logs')
+    # Only the programs of this run belong into its report.
+    runner.stats.clear()
+    report = RunReport(runner)
+    ctx.report = report
+
+    try:
+        if ctx.merge_shards:
+            with report.phase('merge'):
+                merge_shards(ctx)
+            with report.phase('lstmdata'):
+                make_lstmdata(ctx)
+        elif ctx.shard and not ctx.shard_jobs:
+            log.info('Nothing to render in this shard')
+        else:
+            run_phases(ctx, report)
+            report.inputs = workload(ctx).as_dict()
+        if ctx.shard:
+            finish_shard(ctx)
+        report.status = 'succeeded'
+    except CommandFailed as exc:
+        log.critical(str(exc))
+        raise
+    finally:
+        if report.status != 'succeeded':
+            report.status = 'failed'
+        report.write(ctx.output_dir)
+
+
+def run_phases(ctx, report):
+    with report.phase('fontconfig'):
+        initialize_fontconfig(ctx)
+        prepare_fontconfig_workers(ctx)
+    if ctx.pipeline:
+        with report.phase('pipeline'):
+            phase_IE_pipelined(ctx, ['lstm.train'], 'lstmf')
+        with report.phase('lstmdata'):
+            make_lstmdata(ctx)
+    else:
+        with report.phase('phase_I'):
+            phase_I_generate_image(ctx, par_factor=ctx.render_jobs)
+        with report.phase('phase_UP'):
+            phase_UP_generate_unicharset(ctx)
 
-    initialize_fontconfig(ctx)
-    phase_I_generate_image(ctx, par_factor=8)
-    phase_UP_generate_unicharset(ctx)
+        if ctx.linedata:
+            with report.phase('phase_E'):
+                phase_E_extract_features(ctx, ['lstm.train'], 'lstmf')
+            with report.phase('lstmdata'):
+                make_lstmdata(ctx)
 
-    if ctx.linedata:
-        phase_E_extract_features(ctx, ['lstm.train'], 'lstmf')
-        make_lstmdata(ctx)
+
+def plan_from_context(ctx):
+    """
+    Print the jobs of the run described by `ctx` with estimates of its wall
+    time and disk usage, without running any training programs.
+    """
+    ctx = language_specific.set_lang_specific_parameters(ctx, ctx.lang_code)
+    check_file_readable(ctx.training_text)
+    select_shard(ctx)
+    report_files = ctx.plan
+    if not report_files and ctx.output_dir:
+        report_file = pathlib.Path(ctx.output_dir) / REPORT_FILE
+        report_files = [report_file] if report_file.exists() else []
+    plan = make_plan(ctx, report_files)
+    print(format_plan(ctx, plan))
+    return plan
 
 
 def run(
@@ -67,9 +155,26 @@ def run(
     wordlist_file: Optional[str] = None,
     extract_font_properties: bool = True,
     distort_image: bool = False,
+    synthesize_exposures: bool = False,
     tessdata_directory: Optional[str] = None,
     exposures: Optional[List[int]] = None,
     point_size: int = 12,
+    render_cache_directory: Optional[str] = None,
+    fontconfig_cache_directory: Optional[str] = None,
+    fontconfig_per_worker: bool = False,
+    check_available_fonts: bool = True,
+    work_directory: Optional[str] = None,
+    jobs: Optional[int] = None,
+    render_jobs: Optional[int] = None,
+    extract_jobs: Optional[int] = None,
+    pipeline: bool = False,
+    engine: str = 'threads',
+    render_shards: int = 1,
+    bounded_disk: bool = False,
+    disk_budget: Optional[int] = None,
+    shard: Optional[str] = None,
+    shard_costs: Optional[List[str]] = None,
+    merge_shards: Optional[List[str]] = None,
 ):
     """
     :param fonts: A list of font names to train on. These need to be recognizable by
@@ -95,6 +200,9 @@ def run(
                                     ngrams. Renders each ngram, extracts spacing
                                     properties and records them in a `.fontinfo` file.
     :param distort_image: Degrade rendered image with noise, blur, invert.
+    :param synthesize_exposures: Render every font once without degradation and derive
+                                 all exposures from it with NumPy and Pillow, instead
+                                 of rendering each exposure.
     :param tessdata_directory: Specify location of existing traineddata files,
                                required during feature extraction. If set, it should be
                                the path to the tesseract/tessdata directory. If
@@ -103,29 +211,87 @@ def run(
     :param exposures: A list of exposure levels to use (e.g. `[-1, 0, 1]`). If
                       unspecified, language-specific ones will be used.
     :param point_size: Size of printed text.
+    :param render_cache_directory: Persistent directory for caching rendered images
+                                   between runs. Renders with identical inputs are
+                                   restored instead of being generated again.
+    :param fontconfig_cache_directory: Persistent directory for font caches, which are
+                                       reused by all runs using the same font files.
+    :param fontconfig_per_worker: Give every rendering worker its own copy of the
+                                  initialized font cache instead of sharing one.
+    :param check_available_fonts: Check that all fonts are available before rendering starts.
+    :param work_directory: Stable training directory for a resumable run. Phases and
+                           jobs completed by an earlier run with the same inputs are
+                           skipped. Overrides `temporary_directory`.
+    :param jobs: Number of parallel jobs. If unspecified, the number of CPUs limited
+                 by the available memory will be used.
+    :param render_jobs: Number of parallel text2image jobs. Defaults to `jobs`.
+    :param extract_jobs: Number of parallel tesseract jobs. Defaults to `jobs`.
+    :param pipeline: Extract the features of each font as soon as it has been rendered
+                     instead of running the phases one after another.
+    :param engine: How to run parallel jobs: `threads` for a thread per job, or
+                   `asyncio` for an event loop waiting for all programs.
+    :param render_shards: Split the training text into this many line-aligned parts,
+                          which are rendered concurrently for every font.
+    :param bounded_disk: Remove every image and box file as soon as its features have
+                         been extracted, or move them to the output directory with
+                         `save_box_tiff`.
+    :param disk_budget: Delay new renders while the training directory would grow
+                        beyond this many bytes. Implies `pipeline` and `bounded_disk`.
+    :param shard: Only run the font/exposure jobs of shard `i/n` (counted from 0), for
+                  spreading a run over several hosts with otherwise equal arguments.
+    :param shard_costs: Performance reports of earlier runs, used to balance the shards
+                        by the rendering time of each font.
+    :param merge_shards: Instead of rendering, combine the output directories of all
+                         shards of a run into one training file list and starter
+                         traineddata.
     """
-    ctx = TrainingArguments()
-    ctx.fonts = fonts
-    ctx.fonts_dir = fonts_directory if fonts_directory else ctx.fonts_dir
-    ctx.tmp_dir = temporary_directory
-    ctx.lang_code = language_code if language_code else ctx.lang_code
-    ctx.langdata_dir = langdata_directory
-    ctx.max_pages = maximum_pages
-    ctx.output_dir = output_directory
-    ctx.overwrite = overwrite
-    ctx.save_box_tiff = save_box_tiff
-    ctx.linedata = linedata_only
-    ctx.training_text = training_text
-    ctx.wordlist_file = wordlist_file
-    ctx.extract_font_properties = extract_font_properties
-    ctx.distort_image = distort_image
-    ctx.tessdata_dir = tessdata_directory
-    ctx.exposures = exposures
-    ctx.ptsize = point_size
-
+    ctx = make_context(locals())
     verify_parameters_and_handle_defaults(ctx)
 
     run_from_context(ctx)
     cleanup(ctx)
     log.info('All done!')
     return 0
+
+
+def make_context(params):
+    """
+    Return the `TrainingArguments` for the keyword arguments `params` of `run`.
+    """
+    ctx = TrainingArguments()
+    p = argparse.Namespace(**params)
+    ctx.fonts = p.fonts
+    ctx.fonts_dir = p.fonts_directory if p.fonts_directory else ctx.fonts_dir
+    ctx.tmp_dir = p.temporary_directory
+    ctx.lang_code = p.language_code if p.language_code else ctx.lang_code
+    ctx.langdata_dir = p.langdata_directory
+    ctx.max_pages = p.maximum_pages
+    ctx.output_dir = p.output_directory
+    ctx.overwrite = p.overwrite
+    ctx.save_box_tiff = p.save_box_tiff
+    ctx.linedata = p.linedata_only
+    ctx.training_text = p.training_text
+    ctx.wordlist_file = p.wordlist_file
+    ctx.extract_font_properties = p.extract_font_properties
+    ctx.distort_image = p.distort_image
+    ctx.synthesize_exposures = p.synthesize_exposures
+    ctx.tessdata_dir = p.tessdata_directory
+    ctx.exposures = p.exposures
+    ctx.ptsize = p.point_size
+    ctx.render_cache_dir = p.render_cache_directory
+    ctx.work_dir = p.work_directory
+    ctx.fontconfig_cache_dir = p.fontconfig_cache_directory
+    ctx.fontconfig_per_worker = p.fontconfig_per_worker
+    ctx.check_fonts = p.check_available_fonts
+    ctx.jobs = p.jobs
+    ctx.render_jobs = p.render_jobs
+    ctx.extract_jobs = p.extract_jobs
+    ctx.pipeline = p.pipeline
+    ctx.engine = p.engine
+    ctx.render_shards = p.render_shards
+    ctx.bounded_disk = p.bounded_disk
+    ctx.disk_budget = p.disk_budget
+    ctx.shard = parse_shard(p.shard) if p.shard else None
+    ctx.shard_costs = p.shard_costs
+    ctx.merge_shards = p.merge_shards
+    return ctx
@@ -0,0 +1,66 @@
+import tempfile
+
+import pytest
+
+from tesstrain import arguments
+from tesstrain.__main__ import parse_flags
+from tesstrain.arguments import TrainingArguments
+
+
+@pytest.fixture
+def tmp_dir(tmp_path, monkeypatch):
+    tmp_dir = tmp_path / 'tmp'
+    tmp_dir.mkdir()
+    monkeypatch.setattr(tempfile, 'tempdir', str(tmp_dir))
+    # Not worth a message at exit.
+    monkeypatch.setattr(arguments, '_training_dirs', set())
+    return tmp_dir
+
+
+def flags(tmp_path, *args):
+    return [
+        '--langdata_dir',
+        str(tmp_path),
+        '--tessdata_dir',
+        str(tmp_path),
+        '--fontlist',
+        'Arial',
+        '--no_font_check',
+        '--linedata_only',
+        *args,
+    ]
+
+
+def test_arguments_do_not_create_a_font_cache(tmp_dir):
+    assert TrainingArguments().font_config_cache is None
+    assert not list(tmp_dir.iterdir())
+
+
+def test_private_font_cache(tmp_path, tmp_dir):
+    ctx = parse_flags(flags(tmp_path))
+    assert ctx.font_config_cache.startswith(str(tmp_dir / 'font_tmp'))
+
+
+def test_shared_font_cache_has_no_private_one(tmp_path, tmp_dir):
+    ctx = parse_flags(
+        flags(tmp_path, '--fontconfig_cache_dir', str(tmp_path / 'fc'))
+    )
+    assert ctx.font_config_cache.startswith(str(tmp_path / 'fc'))
+    assert not list(tmp_dir.glob('font_tmp*'))
+
+
+def test_plan_creates_no_directories(tmp_path, tmp_dir):
+    ctx = parse_flags(
+        flags(
+            tmp_path,
+            '--plan',
+            '--output_dir',
+            str(tmp_path / 'out'),
+            '--work_dir',
+            str(tmp_path / 'work'),
+        )
+    )
+    assert ctx.plan == []
+    assert not list(tmp_dir.iterdir())
+    assert not (tmp_path / 'out').exists()
+    assert not (tmp_path / 'work').exists()
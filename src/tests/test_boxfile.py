@@ -0,0 +1,102 @@
+import io
+import random
+
+import pytest
+
+from tesstrain.boxfile import (
+    Boxes,
+    _parse_columns,
+    line_boxes,
+    read_box_file,
+    read_boxes,
+    symbol_boxes,
+    wordstr_boxes,
+)
+
+
+def random_lines(count, seed=0):
+    rng = random.Random(seed)
+    symbols = ['a', 'B', ' ', '\t', 'ä', '1', 'x y', '#', '-', 'WordS']
+    return [
+        f'{rng.choice(symbols)} {rng.randint(-5, 4000)} '
+        f'{rng.randint(0, 4000)} {rng.randint(0, 4000)} '
+        f'{rng.randint(0, 4000)} {rng.randint(0, 3)}\n'
+        for _ in range(count)
+    ]
+
+
+def test_line_boxes_format():
+    # The lines printed by generate_line_box.py before tesstrain.boxfile.
+    expected = ''.join(
+        '%s 0 0 %d %d 0\n' % (symbol, 640, 48) for symbol in ('a', 'ö', 'b')
+    ) + '\t 0 0 %d %d 0\n' % (640, 48)
+    assert str(line_boxes(['a', 'ö', 'b'], 640, 48)) == expected
+
+
+def test_symbol_and_wordstr_boxes():
+    assert str(symbol_boxes(['a', 'b'], [3, 4], [5, 6])) == (
+        'a 0 0 3 5 0\nb 3 0 7 6 0\n'
+    )
+    assert str(wordstr_boxes('a b', 10, 20)) == (
+        'WordStr 0 0 10 20 0 #a b\n\t 0 0 10 20 0\n'
+    )
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_bulk_parse_matches_line_parser(seed):
+    lines = random_lines(1000, seed)
+    assert _parse_columns(lines) is not None
+    boxes = Boxes.parse(lines)
+    expected = Boxes._parse_lines(lines, 1)
+    assert boxes.text == expected.text
+    assert boxes.coords.tolist() == expected.coords.tolist()
+    assert boxes.comments is None
+    assert str(boxes) == ''.join(lines)
+
+
+def test_parse_mixed_lines():
+    lines = [
+        'a 1 2 3 4 5\r\n',
+        '\n',
+        'WordStr 0 0 9 9 0 #x 1 2\n',
+        'b -1 2 3 4 5',
+    ]
+    boxes = Boxes.parse(lines)
+    assert boxes.text == ['a', 'WordStr', 'b']
+    assert boxes.coords.tolist() == [
+        [1, 2, 3, 4, 5],
+        [0, 0, 9, 9, 0],
+        [-1, 2, 3, 4, 5],
+    ]
+    assert boxes.comments == [None, 'x 1 2', None]
+
+
+@pytest.mark.parametrize(
+    'line',
+    ['a 1 2 3 4\n', 'a 1 2 3 x 5\n', 'a 1  2 3 4 5\n', 'a 1 2 3 4 1-5\n'],
+)
+def test_parse_rejects_invalid_lines(line):
+    with pytest.raises(ValueError):
+        Boxes.parse(['b 1 2 3 4 5\n', line])
+
+
+def test_read_boxes_in_chunks(tmp_path):
+    lines = random_lines(250)
+    box_file = tmp_path / 'line.box'
+    box_file.write_text(''.join(lines), encoding='utf-8')
+    chunks = list(read_boxes(io.StringIO(''.join(lines)), chunk_lines=100))
+    assert [len(chunk) for chunk in chunks] == [100, 100, 50]
+    assert str(read_box_file(box_file)) == ''.join(lines)
+
+
+def test_check_and_ground_truth():
+    boxes = Boxes.parse(
+        ['a 0 0 5 5 0\n', 'b 6 0 4 5 0\n', '\t 0 0 20 5 0\n', 'c 0 0 5 9 0\n']
+    )
+    assert boxes.check(width=10, height=8) == [
+        (1, 'right edge is left of left edge'),
+        (2, 'wider than 10'),
+        (3, 'higher than 8'),
+    ]
+    assert boxes.line_ends().tolist() == [2]
+    assert boxes.ground_truth() == 'ab\nc'
@@ -0,0 +1,159 @@
+import argparse
+import os
+import pathlib
+import threading
+import time
+
+import pytest
+
+from tesstrain.cache import (
+    FontconfigPool,
+    RenderCache,
+    fontconfig_cache_path,
+    hash_file,
+    hash_json,
+)
+from tesstrain.generate import initialize_shared_fontconfig
+from tesstrain.runner import resolve_command
+
+
+def render(outbase, text):
+    outbase = pathlib.Path(outbase)
+    outbase.parent.mkdir(parents=True, exist_ok=True)
+    for suffix in ('.tif', '.box'):
+        filename = pathlib.Path(str(outbase) + suffix)
+        # Cached files may be hardlinks, so replace them like text2image.
+        if filename.exists():
+            filename.unlink()
+        filename.write_text(text + suffix)
+    return outbase
+
+
+def test_hashes():
+    assert hash_json({'a': 1, 'b': [2]}) == hash_json({'b': [2], 'a': 1})
+    assert hash_json({'a': 1}) != hash_json({'a': 2})
+
+
+def test_render_cache_restores_stored_render(tmp_path):
+    cache = RenderCache(tmp_path / 'cache')
+    key = hash_json({'font': 'Arial', 'exposure': 0})
+    assert not cache.restore(key, tmp_path / 'run1' / 'eng.Arial.exp0')
+
+    outbase = render(tmp_path / 'run1' / 'eng.Arial.exp0', 'first')
+    cache.store(key, outbase)
+    # An entry is never replaced.
+    cache.store(key, render(outbase, 'second'))
+
+    restored = tmp_path / 'run2' / 'eng.Arial.exp0'
+    restored.parent.mkdir()
+    assert cache.restore(key, restored)
+    assert pathlib.Path(str(restored) + '.tif').read_text() == 'first.tif'
+    assert pathlib.Path(str(restored) + '.box').read_text() == 'first.box'
+    # Only the files of the render are restored.
+    assert not pathlib.Path(str(restored) + '.fontinfo').exists()
+    assert hash_file(str(restored) + '.box') == hash_file(
+        tmp_path / 'cache' / key[:2] / key / 'render.box'
+    )
+
+
+def test_render_cache_ignores_partial_entries(tmp_path):
+    cache = RenderCache(tmp_path / 'cache')
+    key = hash_json('partial')
+    # An entry without its file list, as left by an interrupted store.
+    (tmp_path / 'cache' / key[:2] / key).mkdir(parents=True)
+    assert not cache.restore(key, tmp_path / 'eng.Arial.exp0')
+
+
+@pytest.fixture
+def text2image(tmp_path, monkeypatch):
+    """
+    A fake text2image on PATH which records its calls in the returned file.
+    """
+    bin_dir = tmp_path / 'bin'
+    bin_dir.mkdir()
+    tool = bin_dir / 'text2image'
+    tool.write_text('#!/bin/sh\necho "$@" >> "$FAKE_CALLS"\n')
+    tool.chmod(0o755)
+    monkeypatch.setenv('PATH', f'{bin_dir}{os.pathsep}{os.environ["PATH"]}')
+    # Programs are looked up once per process.
+    resolve_command.cache_clear()
+    calls = tmp_path / 'calls'
+    calls.touch()
+    monkeypatch.setenv('FAKE_CALLS', str(calls))
+    return calls
+
+
+def test_fontconfig_cache_follows_the_fonts(tmp_path):
+    fonts_dir = tmp_path / 'fonts'
+    fonts_dir.mkdir()
+    (fonts_dir / 'arial.ttf').write_bytes(b'font')
+    cache = fontconfig_cache_path(tmp_path / 'cache', fonts_dir)
+    assert cache.parent == tmp_path / 'cache'
+    assert fontconfig_cache_path(tmp_path / 'cache', fonts_dir) == cache
+    (fonts_dir / 'courier.ttf').write_bytes(b'font')
+    assert fontconfig_cache_path(tmp_path / 'cache', fonts_dir) != cache
+
+
+def test_shared_fontconfig_cache_is_initialized_once(tmp_path, text2image):
+    fonts_dir = tmp_path / 'fonts'
+    fonts_dir.mkdir()
+    ctx = argparse.Namespace(
+        font_config_cache=str(
+            fontconfig_cache_path(tmp_path / 'cache', fonts_dir)
+        ),
+        fonts_dir=str(fonts_dir),
+        fonts=['Arial'],
+        ptsize=12,
+    )
+    initialize_shared_fontconfig(ctx)
+    assert '--font=Arial' in text2image.read_text()
+    assert pathlib.Path(ctx.font_config_cache).is_dir()
+    # Only the published cache is left.
+    assert list((tmp_path / 'cache').iterdir()) == [
+        pathlib.Path(ctx.font_config_cache)
+    ]
+    initialize_shared_fontconfig(ctx)
+    assert len(text2image.read_text().splitlines()) == 1
+
+
+def test_fontconfig_pool_seeds_a_cache_per_worker(tmp_path):
+    font_config_cache = tmp_path / 'fc'
+    font_config_cache.mkdir()
+    (font_config_cache / 'fonts.conf').write_text('conf')
+    (font_config_cache / 'abc.cache-7').write_text('cache')
+    workers_dir = tmp_path / 'workers'
+    (workers_dir / 'stale').mkdir(parents=True)
+    pool = FontconfigPool.clone(font_config_cache, workers_dir, 3)
+    assert sorted(p.name for p in workers_dir.iterdir()) == [
+        'worker0',
+        'worker1',
+        'worker2',
+    ]
+    for directory in workers_dir.iterdir():
+        assert (directory / 'abc.cache-7').read_text() == 'cache'
+        # text2image rewrites fonts.conf in place, so it is not shared.
+        assert not (directory / 'fonts.conf').samefile(
+            font_config_cache / 'fonts.conf'
+        )
+
+    lock = threading.Lock()
+    in_use = set()
+    shared = []
+
+    def worker():
+        with pool.acquire() as directory:
+            with lock:
+                if directory in in_use:
+                    shared.append(directory)
+                in_use.add(directory)
+            time.sleep(0.01)
+            with lock:
+                in_use.remove(directory)
+
+    threads = [threading.Thread(target=worker) for _ in range(12)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # No two workers ever used the same directory at the same time.
+    assert not shared
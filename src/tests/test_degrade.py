@@ -0,0 +1,59 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('PIL')
+
+from tesstrain.degrade import (  # noqa: E402
+    iter_pages,
+    synthesize_exposure,
+    write_pages,
+)
+
+
+@pytest.fixture
+def base_tif(tmp_path):
+    pages = []
+    for i in range(2):
+        page = np.full((60, 200), 255, dtype=np.uint8)
+        page[20:40, 30 + 50 * i : 60 + 50 * i] = 0
+        pages.append(page)
+    base_tif = tmp_path / 'eng.Arial.base.tif'
+    write_pages(base_tif, pages)
+    return base_tif
+
+
+def dark(page):
+    return np.argwhere(page < 128)
+
+
+def test_exposures_are_synthesized_from_one_render(tmp_path, base_tif):
+    base = list(iter_pages(base_tif))
+    pages = {}
+    for exposure in (-1, 0, 1, 2):
+        tif_file = tmp_path / f'eng.Arial.exp{exposure}.tif'
+        synthesize_exposure(base_tif, tif_file, exposure)
+        pages[exposure] = list(iter_pages(tif_file))
+        assert len(pages[exposure]) == 2
+        for page, base_page in zip(pages[exposure], base):
+            assert page.shape == base_page.shape
+            # The text stays in place, so the box file still applies.
+            assert np.allclose(
+                dark(page).mean(axis=0), dark(base_page).mean(axis=0), atol=1
+            )
+    # Erosion spreads the text of high exposures.
+    assert len(dark(pages[2][0])) > len(dark(pages[1][0]))
+    # Higher exposures of the same base are darker.
+    assert pages[2][0].mean() < pages[1][0].mean()
+
+
+def test_synthesized_exposures_are_reproducible(tmp_path, base_tif):
+    first = tmp_path / 'eng.Arial.exp1.tif'
+    synthesize_exposure(base_tif, first, 1)
+    pages = list(iter_pages(first))
+    synthesize_exposure(base_tif, first, 1)
+    for page, again in zip(pages, iter_pages(first)):
+        assert np.array_equal(page, again)
+    # Other variants get other noise.
+    other = tmp_path / 'eng.Courier.exp1.tif'
+    synthesize_exposure(base_tif, other, 1)
+    assert not np.array_equal(pages[0], next(iter_pages(other)))
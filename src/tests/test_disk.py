@@ -0,0 +1,31 @@
+import argparse
+
+import pytest
+
+from tesstrain.disk import DiskBudget, parse_size
+
+
+def test_parse_size():
+    assert parse_size('500') == 500
+    assert parse_size('1.5k') == 1536
+    assert parse_size('20G') == 20 << 30
+    assert parse_size('2MiB') == parse_size('2MB') == 2 << 20
+    for text in ('', 'G', 'x1', '-1M', '0'):
+        with pytest.raises(argparse.ArgumentTypeError):
+            parse_size(text)
+
+
+def test_disk_budget_delays_renders(tmp_path):
+    (tmp_path / 'eng.Arial.exp0.tif').write_bytes(b'x' * 1000)
+    budget = DiskBudget(tmp_path, limit=4000, job_bytes=1000)
+    render = argparse.Namespace(pool='render')
+    extract = argparse.Namespace(pool='extract')
+    assert budget.admit(render, 0)
+    assert budget.admit(render, 2)
+    assert not budget.admit(render, 3)
+    # Other jobs free space and are never delayed.
+    assert budget.admit(extract, 10)
+    # Renders turned out to be larger.
+    budget.observe(2000)
+    assert budget.admit(render, 0)
+    assert not budget.admit(render, 1)
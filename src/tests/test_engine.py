@@ -0,0 +1,86 @@
+import sys
+import time
+
+import pytest
+
+from tesstrain.engine import AsyncEngine, tool_class
+from tesstrain.runner import Command, CommandRunner
+from tesstrain.scheduler import JobsFailed, TaskGraph
+
+# Fails if another instance holds the lock file, i.e. runs at the same time.
+EXCLUSIVE = '''
+import os, sys, time
+fd = os.open(sys.argv[1], os.O_CREAT | os.O_EXCL)
+time.sleep(0.05)
+os.close(fd)
+os.unlink(sys.argv[1])
+print(sys.argv[2])
+'''
+
+
+def python(*args):
+    return Command(sys.executable, args)
+
+
+def engine(**limits):
+    limits = {'text2image': 2, 'tesseract': 2, 'other': 2, **limits}
+    return AsyncEngine(limits, command_runner=CommandRunner())
+
+
+def test_tool_class():
+    assert tool_class('/usr/bin/text2image') == 'text2image'
+    assert tool_class('tesseract') == 'tesseract'
+    assert tool_class('unicharset_extractor') == 'other'
+
+
+def test_jobs_run_their_commands(tmp_path):
+    def render(name):
+        stats = yield python('-c', 'print(1)')
+        with open(tmp_path / name, 'w') as f:
+            f.write(str(stats.returncode))
+
+    merged = []
+
+    def merge():
+        merged.append(sorted(p.name for p in tmp_path.iterdir()))
+
+    graph = TaskGraph()
+    graph.add('render0', render, 'a')
+    graph.add('render1', render, 'b')
+    graph.add('merge', merge, deps=['render0', 'render1'])
+    finished = []
+    engine().run(graph, progress=finished.append)
+    assert sorted(finished) == ['merge', 'render0', 'render1']
+    assert (tmp_path / 'a').read_text() == '0'
+    assert merged == [['a', 'b']]
+
+
+def test_programs_respect_the_limit_of_their_tool(tmp_path):
+    def job(i):
+        yield python('-c', EXCLUSIVE, tmp_path / 'lock', i)
+
+    graph = TaskGraph()
+    for i in range(4):
+        graph.add(f'job{i}', job, i)
+    engine(other=1).run(graph)
+
+
+def test_failed_program_cancels_the_other_jobs(tmp_path):
+    def slow():
+        yield python('-c', 'import time; time.sleep(30)')
+
+    def fail():
+        time.sleep(0.2)
+        yield python('-c', 'raise SystemExit(2)')
+
+    graph = TaskGraph()
+    graph.add('slow', slow)
+    graph.add('fail', fail)
+    graph.add('after', print, deps=['fail'])
+    start = time.monotonic()
+    with pytest.raises(JobsFailed) as excinfo:
+        engine().run(graph)
+    # The sleeping program was terminated.
+    assert time.monotonic() - start < 10
+    assert [name for name, _ in excinfo.value.failures] == ['fail']
+    assert excinfo.value.cancelled == 2
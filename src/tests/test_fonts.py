@@ -0,0 +1,92 @@
+import argparse
+import os
+
+import pytest
+
+from tesstrain.fonts import (
+    FontIndex,
+    check_fonts,
+    load_font_index,
+    normalize_font_name,
+)
+from tesstrain.runner import resolve_command
+
+LISTING = '  0: Arial\n  1: Times New Roman,\n  2: DejaVu  Sans Bold\n'
+
+
+@pytest.fixture
+def text2image(tmp_path, monkeypatch):
+    """
+    A fake text2image on PATH which lists fonts and records its calls in the
+    returned file.
+    """
+    bin_dir = tmp_path / 'bin'
+    bin_dir.mkdir()
+    listing = tmp_path / 'listing'
+    listing.write_text(LISTING)
+    tool = bin_dir / 'text2image'
+    tool.write_text(
+        f'#!/bin/sh\necho "$@" >> "$FAKE_CALLS"\ncat "{listing}"\n'
+    )
+    tool.chmod(0o755)
+    monkeypatch.setenv('PATH', f'{bin_dir}{os.pathsep}{os.environ["PATH"]}')
+    # Programs are looked up once per process.
+    resolve_command.cache_clear()
+    calls = tmp_path / 'calls'
+    calls.touch()
+    monkeypatch.setenv('FAKE_CALLS', str(calls))
+    return calls
+
+
+@pytest.fixture
+def ctx(tmp_path):
+    fonts_dir = tmp_path / 'fonts'
+    fonts_dir.mkdir()
+    (fonts_dir / 'arial.ttf').write_bytes(b'font')
+    font_config_cache = tmp_path / 'font_tmp'
+    font_config_cache.mkdir()
+    return argparse.Namespace(
+        fonts_dir=str(fonts_dir),
+        font_config_cache=str(font_config_cache),
+        fontconfig_cache_dir=None,
+        font_index=None,
+        check_fonts=True,
+    )
+
+
+def test_normalize_font_name():
+    assert normalize_font_name('Times New Roman,') == 'times new roman'
+    assert normalize_font_name(' DejaVu  Sans,Bold ') == 'dejavu sans bold'
+
+
+def test_font_index_from_listing():
+    index = FontIndex.from_listing(LISTING + 'Some other output\n')
+    assert len(index) == 3
+    assert 'arial' in index
+    assert 'Times New Roman' in index
+    assert 'DejaVu Sans Bold' in index
+    assert index.missing(['Courier', 'Arial', 'Courier', 'Verdana']) == [
+        'Courier',
+        'Verdana',
+    ]
+
+
+def test_fonts_are_listed_once(ctx, text2image):
+    index = load_font_index(ctx)
+    assert 'Times New Roman' in index
+    assert load_font_index(ctx) is index
+    check_fonts(ctx, ['Arial', 'Times New Roman'])
+
+    # A later run with the same font cache reuses the stored index.
+    ctx.font_index = None
+    assert 'Arial' in load_font_index(ctx)
+    assert len(text2image.read_text().splitlines()) == 1
+
+
+def test_fonts_are_listed_again_when_the_fonts_changed(ctx, text2image):
+    load_font_index(ctx)
+    with open(os.path.join(ctx.fonts_dir, 'courier.ttf'), 'wb') as f:
+        f.write(b'font')
+    ctx.font_index = None
+    load_font_index(ctx)
+    assert len(text2image.read_text().splitlines()) == 2
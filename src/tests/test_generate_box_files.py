@@ -0,0 +1,70 @@
+import os
+import pathlib
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip('PIL')
+from PIL import Image  # noqa: E402
+
+ROOT = pathlib.Path(__file__).resolve().parents[2]
+
+
+def script(name, *args):
+    """
+    Run the script `name` from the top of the repository.
+    """
+    env = dict(os.environ, PYTHONPATH=str(ROOT / 'src'))
+    return subprocess.run(
+        [sys.executable, str(ROOT / name), *map(str, args)],
+        cwd=str(ROOT),
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+
+
+@pytest.fixture
+def gt_dir(tmp_path):
+    gt_dir = tmp_path / 'gt'
+    gt_dir.mkdir()
+    lines = {'line1': 'Hello wörld', 'line2': 'café au lait', 'line3': ''}
+    for i, (stem, text) in enumerate(lines.items()):
+        Image.new('L', (100 + 10 * i, 30), 255).save(gt_dir / f'{stem}.png')
+        (gt_dir / f'{stem}.gt.txt').write_text(text + '\n')
+    (gt_dir / 'orphan.gt.txt').write_text('no image\n')
+    return gt_dir
+
+
+@pytest.mark.parametrize(
+    'generator', ['generate_line_box.py', 'generate_line_syllable_box.py']
+)
+def test_box_files_match_the_script(gt_dir, generator):
+    proc = script('generate_box_files.py', '-j', 2, '-g', generator, gt_dir)
+    assert 'Created 3 box files, 0 failed' in proc.stderr
+    assert f'no line image for {gt_dir / "orphan.gt.txt"}' in proc.stderr
+    for stem in ('line1', 'line2', 'line3'):
+        expected = script(
+            generator,
+            '-i',
+            gt_dir / f'{stem}.png',
+            '-t',
+            gt_dir / f'{stem}.gt.txt',
+        ).stdout
+        assert (gt_dir / f'{stem}.box').read_text() == expected
+
+
+def test_only_outdated_box_files_are_created(gt_dir):
+    script('generate_box_files.py', gt_dir)
+    proc = script('generate_box_files.py', gt_dir)
+    assert 'Created 0 box files' in proc.stderr
+    gt_file = gt_dir / 'line2.gt.txt'
+    gt_file.write_text('changed\n')
+    later = (gt_dir / 'line2.box').stat().st_mtime_ns + 10**9
+    os.utime(gt_file, ns=(later, later))
+    proc = script('generate_box_files.py', gt_dir)
+    assert 'Created 1 box files' in proc.stderr
+    assert (gt_dir / 'line2.box').read_text().startswith('c 0 0 110 30 0')
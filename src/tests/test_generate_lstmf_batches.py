@@ -0,0 +1,112 @@
+import os
+import pathlib
+import subprocess
+import sys
+
+import pytest
+
+ROOT = pathlib.Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+from generate_lstmf_batches import assign_batches, split_lines  # noqa: E402
+
+
+def lines(count, start=0):
+    return [
+        (f'gt/line{i}.png', f'gt/line{i}.box')
+        for i in range(start, start + count)
+    ]
+
+
+def test_split_is_stable():
+    train, evaluation = split_lines(lines(1000), 0.9)
+    assert 850 < len(train) < 950
+    assert sorted(train + evaluation) == sorted(lines(1000))
+    # Lines keep their side when others are added.
+    more_train, more_evaluation = split_lines(lines(1100), 0.9)
+    assert set(train) <= set(more_train)
+    assert set(evaluation) <= set(more_evaluation)
+    # There is always an evaluation line.
+    assert split_lines(lines(2), 0.99)[1]
+    assert split_lines(lines(2), 1.0)[1] == []
+
+
+def test_batches_only_change_where_lines_were_added():
+    batches = assign_batches(lines(1000), 100, 'train')
+    assert len(batches) == 16
+    assert all(name.startswith('train') for name in batches)
+    assert sum(map(len, batches.values())) == 1000
+    assert assign_batches(lines(1000)[::-1], 100, 'train') == batches
+
+    more = assign_batches(lines(1000) + lines(5, 5000), 100, 'train')
+    changed = [name for name in batches if batches[name] != more[name]]
+    assert 0 < len(changed) <= 5
+    # Too many lines for the batches double their number.
+    assert len(assign_batches(lines(1700), 100, 'train')) == 32
+
+
+@pytest.fixture
+def tesseract(tmp_path):
+    """
+    A fake tesseract writing the box files of the pages of a list to the
+    .lstmf file, and recording its calls.
+    """
+    tool = tmp_path / 'tesseract'
+    tool.write_text(
+        '#!/bin/sh\n'
+        f'echo "$2" >> "{tmp_path / "calls"}"\n'
+        'for image in $(cat "$1"); do cat "${image%.*}.box"; done'
+        ' > "$2.lstmf"\n'
+    )
+    tool.chmod(0o755)
+    return tool
+
+
+def build(tmp_path, tesseract, *args):
+    return subprocess.run(
+        [
+            sys.executable,
+            str(ROOT / 'generate_lstmf_batches.py'),
+            '--tesseract',
+            str(tesseract),
+            '-o',
+            str(tmp_path / 'out'),
+            '--list',
+            str(tmp_path / 'all.txt'),
+            *args,
+            str(tmp_path / 'gt'),
+        ],
+        env=dict(os.environ, PYTHONPATH=str(ROOT / 'src')),
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    ).stderr
+
+
+def test_batches_are_built_once(tmp_path, tesseract):
+    gt_dir = tmp_path / 'gt'
+    gt_dir.mkdir()
+    for i in range(6):
+        (gt_dir / f'line{i}.gt.txt').write_text(f'{i}\n')
+        (gt_dir / f'line{i}.png').write_bytes(b'image')
+        (gt_dir / f'line{i}.box').write_text(f'{i} 0 0 9 9 0\n\t 0 0 9 9 0\n')
+
+    assert '6 training lines in 2 batches' in build(
+        tmp_path, tesseract, '-b', '4'
+    )
+    lstmf_files = (tmp_path / 'all.txt').read_text().split()
+    assert len(lstmf_files) == 2
+    pages = {}
+    for lstmf_file in lstmf_files:
+        boxes = pathlib.Path(lstmf_file).read_text().splitlines()
+        # Every line became a page of its batch.
+        for page, (box, tab) in enumerate(zip(boxes[::2], boxes[1::2])):
+            assert box.endswith(f' {page}')
+            assert tab.endswith(f' {page}')
+            pages[box[0]] = lstmf_file
+    assert sorted(pages) == list('012345')
+
+    assert '0 to create' in build(tmp_path, tesseract, '-b', '4')
+    os.utime(gt_dir / 'line3.box')
+    assert '1 to create' in build(tmp_path, tesseract, '-b', '4')
+    assert len((tmp_path / 'calls').read_text().splitlines()) == 3
@@ -0,0 +1,85 @@
+import os
+import pathlib
+import sys
+
+ROOT = pathlib.Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+import gt_index  # noqa: E402
+from gt_index import update_index  # noqa: E402
+
+
+def touch_later(path, seconds=10):
+    """
+    Move the modification time of `path` forward, as file systems may not
+    tell changes within the same tick apart.
+    """
+    mtime = os.stat(path).st_mtime_ns + seconds * 10**9
+    os.utime(path, ns=(mtime, mtime))
+
+
+def test_update_only_lists_changed_directories(tmp_path, monkeypatch):
+    root = tmp_path / 'gt'
+    for name in ('a', 'b'):
+        (root / name).mkdir(parents=True)
+        (root / name / f'{name}1.gt.txt').write_text(f'{name} 1\n')
+    index = str(tmp_path / 'index.jsonl')
+    scanned = []
+    scan_directory = gt_index.scan_directory
+
+    def scan(path, old_gts, rescan):
+        scanned.append(os.path.relpath(path, root))
+        return scan_directory(path, old_gts, rescan)
+
+    monkeypatch.setattr(gt_index, 'scan_directory', scan)
+
+    def update(rescan=False):
+        del scanned[:]
+        gts = update_index(index, str(root), rescan)
+        return {os.path.relpath(path, root): gts[path] for path in gts}
+
+    gts = update()
+    assert sorted(scanned) == ['.', 'a', 'b']
+    assert sorted(gts) == ['a/a1.gt.txt', 'b/b1.gt.txt']
+    assert gts['a/a1.gt.txt']['chars'] == 3
+    assert gts['a/a1.gt.txt']['image'] is None
+
+    assert update() == gts
+    assert scanned == []
+
+    (root / 'b' / 'b2.gt.txt').write_text('b 2\n')
+    touch_later(root / 'b')
+    gts = update()
+    assert scanned == ['b']
+    assert sorted(gts) == ['a/a1.gt.txt', 'b/b1.gt.txt', 'b/b2.gt.txt']
+
+    # Edited in place, which only a rescan notices.
+    (root / 'a' / 'a1.gt.txt').write_text('a 1 edited\n')
+    assert update()['a/a1.gt.txt']['chars'] == 3
+    assert update(rescan=True)['a/a1.gt.txt']['chars'] == 10
+    assert sorted(scanned) == ['.', 'a', 'b']
+
+    for path in (root / 'b').iterdir():
+        path.unlink()
+    (root / 'b').rmdir()
+    touch_later(root)
+    assert sorted(update()) == ['a/a1.gt.txt']
+    assert scanned == ['.']
+
+
+def test_index_of_another_directory_is_replaced(tmp_path):
+    index = str(tmp_path / 'index.jsonl')
+    for name in ('one', 'two'):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / 'line.gt.txt').write_text(name)
+        gts = update_index(index, str(tmp_path / name))
+        assert list(gts) == [str(tmp_path / name / 'line.gt.txt')]
+
+
+def test_symbolic_link_loops_are_skipped(tmp_path):
+    root = tmp_path / 'gt'
+    (root / 'sub').mkdir(parents=True)
+    (root / 'sub' / 'line.gt.txt').write_text('x')
+    (root / 'sub' / 'loop').symlink_to(root)
+    gts = update_index(str(tmp_path / 'index.jsonl'), str(root))
+    assert list(gts) == [str(root / 'sub' / 'line.gt.txt')]
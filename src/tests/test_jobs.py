@@ -0,0 +1,28 @@
+import os
+
+from tesstrain import arguments
+from tesstrain.arguments import JOB_MEMORY_BYTES, default_jobs
+
+
+def test_default_jobs_follow_cpu_count(monkeypatch):
+    monkeypatch.setattr(os, 'cpu_count', lambda: 16)
+    monkeypatch.setattr(arguments, 'available_memory', lambda: None)
+    assert default_jobs() == 16
+    monkeypatch.setattr(os, 'cpu_count', lambda: None)
+    assert default_jobs() == 1
+
+
+def test_default_jobs_are_limited_by_memory(monkeypatch):
+    monkeypatch.setattr(os, 'cpu_count', lambda: 16)
+    monkeypatch.setattr(
+        arguments, 'available_memory', lambda: 3 * JOB_MEMORY_BYTES + 1
+    )
+    assert default_jobs() == 3
+    # At least one job runs, however little memory is left.
+    monkeypatch.setattr(arguments, 'available_memory', lambda: 1024)
+    assert default_jobs() == 1
+
+
+def test_available_memory():
+    available = arguments.available_memory()
+    assert available is None or available > 0
@@ -0,0 +1,58 @@
+import argparse
+import subprocess
+import sys
+
+import pytest
+
+from tesstrain import font_tables, language_specific
+from tesstrain.language_specific import (
+    register_language,
+    set_lang_specific_parameters,
+)
+
+
+def parameters(lang, fonts=None, exposures=None):
+    ctx = argparse.Namespace(fonts=fonts, exposures=exposures)
+    return set_lang_specific_parameters(ctx, lang)
+
+
+def test_defaults_and_overrides():
+    ctx = parameters('eng')
+    assert ctx.fonts == font_tables.LATIN_FONTS
+    assert ctx.exposures == [0]
+    assert ctx.text_corpus.endswith('/eng.corpus.txt')
+    assert ctx.norm_mode == 1
+
+    ctx = parameters('frm', fonts=['Arial'], exposures=[['-1', '1']])
+    assert ctx.fonts == ['Arial']
+    assert ctx.exposures == [-1, 1]
+    assert ctx.text_corpus.endswith('/fra.corpus.txt')
+    assert ctx.filter_arguments == ['--make_early_language_variant=fra']
+    assert ctx.text2image_extra_args == ['--ligatures']
+
+    assert parameters('hin').norm_mode == 2
+    with pytest.raises(ValueError):
+        parameters('xyz')
+
+
+def test_register_language(monkeypatch):
+    monkeypatch.setattr(
+        language_specific, 'LANGUAGES', dict(language_specific.LANGUAGES)
+    )
+    register_language('circuit', base='frm', fonts=['DejaVu Sans Mono'])
+    ctx = parameters('circuit')
+    assert ctx.fonts == ['DejaVu Sans Mono']
+    assert ctx.text_corpus.endswith('/fra.corpus.txt')
+    assert ctx.text2image_extra_args == ['--ligatures']
+    with pytest.raises(ValueError):
+        register_language('bad', mean_cnt=3)
+
+
+def test_font_tables_are_loaded_lazily():
+    code = (
+        'import sys, tesstrain.language_specific as ls; '
+        'assert "tesstrain.font_tables" not in sys.modules; '
+        'assert ls.LATIN_FONTS; '
+        'assert "tesstrain.font_tables" in sys.modules'
+    )
+    subprocess.run([sys.executable, '-c', code], check=True)
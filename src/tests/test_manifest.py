@@ -0,0 +1,129 @@
+import argparse
+import os
+
+import pytest
+
+from tesstrain.generate import extract_features
+from tesstrain.manifest import Manifest
+from tesstrain.runner import resolve_command
+
+
+@pytest.fixture
+def tesseract(tmp_path, monkeypatch):
+    """
+    A fake tesseract on PATH which writes a feature file and records its calls
+    in the returned file.
+    """
+    bin_dir = tmp_path / 'bin'
+    bin_dir.mkdir()
+    tool = bin_dir / 'tesseract'
+    tool.write_text(
+        '#!/bin/sh\n'
+        'echo "$1" >> "$FAKE_CALLS"\n'
+        'echo features > "$2.lstmf"\n'
+    )
+    tool.chmod(0o755)
+    monkeypatch.setenv('PATH', f'{bin_dir}{os.pathsep}{os.environ["PATH"]}')
+    # Programs are looked up once per process.
+    resolve_command.cache_clear()
+    calls = tmp_path / 'calls'
+    calls.touch()
+    monkeypatch.setenv('FAKE_CALLS', str(calls))
+    return calls
+
+
+def test_entry_is_complete_while_its_files_are_intact(tmp_path):
+    output = tmp_path / 'out.txt'
+    output.write_text('abc')
+    manifest = Manifest(tmp_path / 'manifest.jsonl')
+    assert not manifest.is_complete('phase_UP', 'hash1')
+    manifest.record('phase_UP', 'hash1', [output])
+    manifest.record('phase_E', 'hash2', [output], 'eng.Arial.exp0.tif')
+    manifest.close()
+
+    manifest = Manifest(tmp_path / 'manifest.jsonl')
+    assert manifest.is_complete('phase_UP', 'hash1')
+    assert manifest.is_complete('phase_E', 'hash2', 'eng.Arial.exp0.tif')
+    assert not manifest.is_complete('phase_E', 'hash2', 'eng.Arial.exp1.tif')
+    # Changed inputs.
+    assert not manifest.is_complete('phase_UP', 'hash0')
+    # Changed outputs.
+    output.write_text('abcd')
+    assert not manifest.is_complete('phase_UP', 'hash1')
+    output.unlink()
+    assert not manifest.is_complete('phase_UP', 'hash1')
+    manifest.close()
+
+
+def test_interrupted_journal_line_is_dropped(tmp_path):
+    output = tmp_path / 'out.txt'
+    output.write_text('abc')
+    manifest = Manifest(tmp_path / 'manifest.jsonl')
+    manifest.record('phase_UP', 'hash1', [output])
+    manifest.record('phase_UP', 'hash2', [output])
+    manifest.close()
+    with open(tmp_path / 'manifest.jsonl', 'a') as f:
+        f.write('{"name": "phase_E", "inp')
+
+    manifest = Manifest(tmp_path / 'manifest.jsonl')
+    # The later entry replaced the earlier one.
+    assert manifest.is_complete('phase_UP', 'hash2')
+    assert not manifest.is_complete('phase_UP', 'hash1')
+    manifest.close()
+    # The journal was compacted to one line per entry.
+    assert len((tmp_path / 'manifest.jsonl').read_text().splitlines()) == 1
+
+
+def test_resumed_extraction_skips_completed_images(tmp_path, tesseract):
+    image = tmp_path / 'eng.Arial.exp0.tif'
+    image.write_bytes(b'II*\0image')
+    box = tmp_path / 'eng.Arial.exp0.box'
+    box.write_text('a 0 0 1 1 0\n\t 0 0 1 1 0\n')
+    ctx = argparse.Namespace(
+        manifest=Manifest(tmp_path / 'manifest.jsonl'),
+        tessdata_dir=str(tmp_path),
+        bounded_disk=False,
+        report=None,
+    )
+
+    def extract():
+        extract_features(ctx, image, ['lstm.train'], 'config', 'lstmf', None)
+        return len(tesseract.read_text().splitlines())
+
+    assert extract() == 1
+    assert (tmp_path / 'eng.Arial.exp0.lstmf').exists()
+    ctx.manifest.close()
+
+    ctx.manifest = Manifest(tmp_path / 'manifest.jsonl')
+    assert extract() == 1
+    # Changed inputs and lost outputs are extracted again.
+    with box.open('a') as f:
+        f.write('b 0 0 1 1 0\n\t 0 0 1 1 0\n')
+    assert extract() == 2
+    (tmp_path / 'eng.Arial.exp0.lstmf').unlink()
+    assert extract() == 3
+    ctx.manifest.close()
+
+
+def test_removed_files_keep_the_entry_complete(tmp_path):
+    image = tmp_path / 'eng.Arial.exp0.tif'
+    image.write_bytes(b'II*\0image')
+    lstmf = tmp_path / 'eng.Arial.exp0.lstmf'
+    lstmf.write_text('features')
+    manifest = Manifest(tmp_path / 'manifest.jsonl')
+    manifest.record('phase_E', 'hash1', [image, lstmf], image.name)
+    image.unlink()
+    assert not manifest.is_complete('phase_E', 'hash1', image.name)
+    manifest.mark_removed('phase_E', [image], image.name)
+    assert manifest.is_complete('phase_E', 'hash1', image.name)
+    manifest.close()
+
+    manifest = Manifest(tmp_path / 'manifest.jsonl')
+    assert manifest.is_complete('phase_E', 'hash1', image.name)
+    assert manifest.removed('phase_E', image.name) == [str(image)]
+    assert manifest.recorded_inputs('phase_E', image.name) == 'hash1'
+    assert manifest.recorded_inputs('phase_E', 'other') is None
+    # The files which are kept are still checked.
+    lstmf.write_text('changed')
+    assert not manifest.is_complete('phase_E', 'hash1', image.name)
+    manifest.close()
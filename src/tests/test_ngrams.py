@@ -0,0 +1,128 @@
+import random
+
+import pytest
+
+from tesstrain import ngrams
+from tesstrain.ngrams import (
+    NgramCounts,
+    read_ngram_counts,
+    select_ngrams,
+    write_train_ngrams,
+)
+
+
+def sorted_selection(records, fraction):
+    """
+    Select ngrams by sorting all records, as a reference.
+    """
+    target = fraction * sum(count for _, count in records)
+    selected = []
+    cumsum = 0
+    for ngram, count in sorted(records, key=lambda record: -record[1]):
+        if cumsum > target:
+            break
+        selected.append(ngram)
+        cumsum += count
+    return selected
+
+
+def test_select_ngrams_orders_by_decreasing_count():
+    records = [('a', 1), ('b', 5), ('c', 3)]
+    assert select_ngrams(records, fraction=1.0) == ['b', 'c', 'a']
+
+
+def test_select_ngrams_keeps_input_order_of_ties():
+    records = [('x', 2), ('y', 7), ('z', 2), ('w', 2)]
+    assert select_ngrams(records, fraction=1.0) == ['y', 'x', 'z', 'w']
+
+
+def test_select_ngrams_stops_after_exceeding_fraction():
+    # 60 + 40 exceeds 0.99 of 101, so the last ngram is not needed.
+    records = [('c', 1), ('a', 60), ('b', 40)]
+    assert select_ngrams(records) == ['a', 'b']
+
+
+def test_select_ngrams_continues_at_exact_fraction():
+    # 99 of 100 only reaches 0.99 of the total, it does not exceed it.
+    records = [('a', 90), ('b', 9), ('c', 1)]
+    assert select_ngrams(records) == ['a', 'b', 'c']
+
+
+def test_select_ngrams_without_records():
+    assert select_ngrams([]) == []
+
+
+@pytest.mark.parametrize('fraction', [0.0, 0.5, 0.9, 0.99, 1.0])
+def test_select_ngrams_matches_sorting_all_records(fraction):
+    rng = random.Random(fraction)
+    records = [(f'n{i}', rng.choice([1, 1, 2, 3, 5, 40])) for i in range(500)]
+    assert select_ngrams(records, fraction) == sorted_selection(
+        records, fraction
+    )
+
+
+def test_ngram_counts_reads_the_file_on_every_pass(tmp_path):
+    freqs = tmp_path / 'eng.bigram_freqs'
+    freqs.write_text('th 60\nhe 40\nin 1\n', encoding='utf-8')
+    counts = NgramCounts(freqs)
+    assert list(counts) == list(counts) == [('th', 60), ('he', 40), ('in', 1)]
+    assert select_ngrams(counts) == ['th', 'he']
+
+
+def test_read_ngram_counts_skips_malformed_lines(tmp_path):
+    freqs = tmp_path / 'eng.bigram_freqs'
+    freqs.write_text(
+        'th 12\n\nlonely\nhe x\nin 3.5\nan 7 extra\n', encoding='utf-8'
+    )
+    assert list(read_ngram_counts(freqs)) == [('th', 12), ('an', 7)]
+
+
+@pytest.fixture
+def freqs(tmp_path):
+    freqs = tmp_path / 'eng.bigram_freqs'
+    freqs.write_text('th 60\nhe 40\nin 1\n', encoding='utf-8')
+    return freqs
+
+
+def test_write_train_ngrams(freqs, tmp_path):
+    out = tmp_path / 'eng.train_ngrams'
+    assert write_train_ngrams(freqs, out) == out
+    assert out.read_text(encoding='utf-8') == 'th he '
+    assert (tmp_path / 'eng.train_ngrams.sha256').exists()
+
+
+def test_write_train_ngrams_reuses_result_with_same_key(
+    freqs, tmp_path, monkeypatch
+):
+    out = tmp_path / 'eng.train_ngrams'
+    write_train_ngrams(freqs, out)
+
+    def fail(*args):
+        raise AssertionError('ngrams selected again')
+
+    monkeypatch.setattr(ngrams, 'select_ngrams', fail)
+    write_train_ngrams(freqs, out)
+    assert out.read_text(encoding='utf-8') == 'th he '
+
+
+def test_write_train_ngrams_regenerates_for_changed_input(freqs, tmp_path):
+    out = tmp_path / 'eng.train_ngrams'
+    write_train_ngrams(freqs, out)
+    freqs.write_text('th 1\nhe 40\nin 60\n', encoding='utf-8')
+    write_train_ngrams(freqs, out)
+    assert out.read_text(encoding='utf-8') == 'in he '
+
+
+def test_write_train_ngrams_regenerates_for_changed_fraction(freqs, tmp_path):
+    out = tmp_path / 'eng.train_ngrams'
+    write_train_ngrams(freqs, out)
+    write_train_ngrams(freqs, out, fraction=0.5)
+    assert out.read_text(encoding='utf-8') == 'th '
+
+
+def test_write_train_ngrams_regenerates_missing_output(freqs, tmp_path):
+    out = tmp_path / 'eng.train_ngrams'
+    write_train_ngrams(freqs, out)
+    out.unlink()
+    write_train_ngrams(freqs, out)
+    assert out.read_text(encoding='utf-8') == 'th he '
@@ -0,0 +1,165 @@
+import argparse
+import json
+
+import pytest
+
+from tesstrain.plan import (
+    DEFAULT_COSTS,
+    chars_per_page,
+    format_plan,
+    make_plan,
+    page_geometry,
+    workload,
+)
+
+
+def test_chars_per_page_of_default_page():
+    # 12pt at 300 dpi is 50 pixels: 3400 / 25 = 136 characters per line,
+    # 4600 // (50 + 32) = 56 lines on a 3600x4800 page with 100px margins.
+    assert chars_per_page(12, 32) == 136 * 56
+
+
+def test_chars_per_page_follows_text2image_args():
+    args = ['--xsize=1800', '--ysize=2400', '--margin=100', '--distort_image']
+    assert page_geometry(args)['ysize'] == 2400
+    # 1600 / 25 = 64 characters per line, 2200 // 82 = 26 lines.
+    assert chars_per_page(12, 32, args) == 64 * 26
+
+
+def test_chars_per_page_ignores_invalid_geometry():
+    assert page_geometry(['--ysize=tall'])['ysize'] == 4800
+
+
+@pytest.fixture
+def ctx(tmp_path):
+    training_text = tmp_path / 'eng.training_text'
+    # 40 lines of 500 characters.
+    training_text.write_text(('x' * 500 + '\n') * 40, encoding='utf-8')
+    return argparse.Namespace(
+        training_text=str(training_text),
+        render_shards=1,
+        ptsize=12,
+        leading=32,
+        text2image_extra_args=[],
+        max_pages=0,
+        fonts=['Arial', 'Arial Bold'],
+        exposures=[-1, 0, 1],
+        shard_jobs=None,
+        lang_code='eng',
+        shard=None,
+        synthesize_exposures=False,
+        extract_font_properties=False,
+        pipeline=False,
+        bounded_disk=False,
+        disk_budget=None,
+        jobs=2,
+        render_jobs=2,
+        extract_jobs=1,
+    )
+
+
+def test_workload_of_known_text(ctx):
+    work = workload(ctx)
+    assert (work.text_lines, work.text_chars) == (40, 20000)
+    assert work.chars_per_page == 7616
+    # 20000 characters fill 3 pages of 7616.
+    assert work.pages_per_job == 3
+    assert work.render_jobs == 6
+    assert work.pages == 18
+
+
+def test_workload_limited_by_max_pages(ctx):
+    ctx.max_pages = 2
+    assert workload(ctx).pages_per_job == 2
+    ctx.max_pages = 5
+    assert workload(ctx).pages_per_job == 3
+
+
+def test_workload_of_text_shards(ctx):
+    ctx.render_shards = 4
+    ctx.max_pages = 2
+    work = workload(ctx)
+    # Every shard renders 5000 characters, within its page of max_pages.
+    assert work.chars_per_job == 5000
+    assert work.pages_per_job == 1
+    assert work.render_jobs == 24
+
+
+def test_plan_keeps_all_pages(ctx):
+    plan = make_plan(ctx)
+    assert plan.reports == 0
+    assert [phase[0] for phase in plan.phases] == [
+        'other',
+        'phase_I',
+        'phase_UP',
+        'phase_E',
+    ]
+    # 6 extractions of 3 pages, one after another.
+    assert plan.phases[-1][3] == 6 * 3 * DEFAULT_COSTS['extract_seconds']
+    assert plan.disk_bytes == 18 * DEFAULT_COSTS['bytes']
+
+
+def test_plan_of_bounded_disk_pipeline(ctx):
+    ctx.bounded_disk = True
+    # Without a pipeline all pages are rendered before any is removed.
+    assert make_plan(ctx).disk_bytes == 18 * DEFAULT_COSTS['bytes']
+    ctx.pipeline = True
+    plan = make_plan(ctx)
+    assert [phase[0] for phase in plan.phases] == ['other', 'pipeline']
+    # 2 renders and 1 extraction of 3 pages each hold their pages, the
+    # features of the other 9 pages are kept.
+    assert plan.disk_bytes == int(
+        9 * DEFAULT_COSTS['bytes'] + 9 * DEFAULT_COSTS['features_bytes']
+    )
+    ctx.disk_budget = 1000
+    assert make_plan(ctx).disk_bytes == 1000
+
+
+def test_plan_uses_costs_of_reports(ctx, tmp_path):
+    report = {
+        'status': 'succeeded',
+        'inputs': {'render_jobs': 2, 'pages_per_job': 5},
+        'jobs': [
+            {
+                'program': 'text2image',
+                'phase': 'phase_I',
+                'args': [],
+                'wall_time': 10.0,
+            },
+            {
+                'program': 'text2image',
+                'phase': 'phase_I',
+                'args': [],
+                'wall_time': 30.0,
+            },
+        ],
+        'phases': [
+            {'name': 'phase_E', 'wall_time': 1.0, 'bytes_written': 1000}
+        ],
+        'totals': {'bytes_written': 5000},
+    }
+    report_file = tmp_path / 'report.json'
+    report_file.write_text(json.dumps(report))
+    ctx.bounded_disk = True
+    ctx.pipeline = True
+    plan = make_plan(ctx, [report_file, tmp_path / 'missing.json'])
+    assert plan.reports == 1
+    # 4 seconds and 500 bytes per page, 100 bytes of features. 6 renders of
+    # 12s on 2 workers take as long as 6 extractions of 6s on 1 worker, and
+    # the last extraction follows the last render.
+    assert plan.phases[1][3] == 36 + 6
+    assert plan.disk_bytes == 9 * 500 + 9 * 100
+
+
+def test_format_plan(ctx):
+    ctx.bounded_disk = True
+    text = format_plan(ctx, make_plan(ctx))
+    lines = text.splitlines()
+    assert lines[0] == (
+        'Plan for eng: 2 fonts x 3 exposures x 1 text shards = 6 renders'
+    )
+    assert 'about 3 page(s) per render' in lines[1]
+    assert 'No earlier reports, using rough default costs' in lines
+    assert any(line.startswith('phase_E ') for line in lines)
+    assert 'Estimated peak disk usage of the training directory: ' in text
+    assert 'use --pipeline' in lines[-1]
@@ -0,0 +1,56 @@
+import argparse
+import pathlib
+
+import pytest
+
+from tesstrain.generate import make_outbase, split_training_text
+
+
+@pytest.fixture
+def ctx(tmp_path):
+    training_text = tmp_path / 'eng.training_text'
+    training_text.write_text(
+        ''.join(f'line {i} ' + 'x' * (i % 7) + '\n' for i in range(20)),
+        encoding='utf-8',
+    )
+    return argparse.Namespace(
+        training_text=str(training_text),
+        training_dir=str(tmp_path),
+        lang_code='eng',
+        render_shards=1,
+    )
+
+
+def test_unsharded_text_is_rendered_whole(ctx):
+    assert split_training_text(ctx) == [(None, ctx.training_text)]
+
+
+def test_shards_split_the_text_at_lines(ctx):
+    ctx.render_shards = 3
+    shards = split_training_text(ctx)
+    assert [shard for shard, _ in shards] == [0, 1, 2]
+    texts = [
+        pathlib.Path(text).read_text(encoding='utf-8') for _, text in shards
+    ]
+    assert ''.join(texts) == pathlib.Path(ctx.training_text).read_text(
+        encoding='utf-8'
+    )
+    sizes = [len(text) for text in texts]
+    assert all(text.endswith('\n') for text in texts)
+    assert max(sizes) - min(sizes) < 20
+
+
+def test_shards_are_limited_by_the_lines(ctx):
+    pathlib.Path(ctx.training_text).write_text('a\nb\n', encoding='utf-8')
+    ctx.render_shards = 5
+    shards = split_training_text(ctx)
+    texts = [pathlib.Path(text).read_text() for _, text in shards]
+    assert texts == ['a\n', 'b\n']
+
+
+def test_outbase_of_shard(ctx):
+    assert make_outbase(ctx, 'Arial_Bold', 0).name == 'eng.Arial_Bold.exp0'
+    assert (
+        make_outbase(ctx, 'Arial_Bold', -1, 2).name
+        == 'eng.Arial_Bold.exp-1.shard2'
+    )
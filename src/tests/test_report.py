@@ -0,0 +1,47 @@
+import json
+import sys
+
+from tesstrain.report import REPORT_FILE, RunReport
+from tesstrain.runner import CommandRunner
+from tesstrain.scheduler import TaskGraph
+
+
+def test_report_of_phases_and_jobs(tmp_path):
+    runner = CommandRunner(tmp_path / 'logs')
+    report = RunReport(runner)
+
+    def render(font):
+        runner.run(sys.executable, '-c', f'print("{font}")')
+        report.add_written(100)
+
+    with report.phase('phase_I'):
+        graph = TaskGraph()
+        for font in ('Arial', 'Courier'):
+            graph.add(f'render:eng.{font}.exp0', render, font)
+        graph.run(2)
+    with report.phase('phase_UP'):
+        runner.run(sys.executable, '-c', 'raise SystemExit(1)')
+    report.status = 'succeeded'
+    report_file = report.write(tmp_path / 'out')
+
+    assert report_file == tmp_path / 'out' / REPORT_FILE
+    data = json.loads(report_file.read_text())
+    assert data['status'] == 'succeeded'
+    assert [phase['name'] for phase in data['phases']] == [
+        'phase_I',
+        'phase_UP',
+    ]
+    phase_I, phase_UP = data['phases']
+    assert (phase_I['jobs'], phase_I['failed_jobs']) == (2, 0)
+    assert phase_I['bytes_written'] == 200
+    assert (phase_UP['jobs'], phase_UP['failed_jobs']) == (1, 1)
+    assert phase_UP['bytes_written'] == 0
+    assert data['totals']['jobs'] == 3
+    assert data['totals']['bytes_written'] == 200
+    # Every program is named after the job which ran it.
+    assert sorted(job['job'] for job in data['jobs'][:2]) == [
+        'render:eng.Arial.exp0',
+        'render:eng.Courier.exp0',
+    ]
+    assert data['jobs'][2]['job'] is None
+    assert [job['returncode'] for job in data['failures']] == [1]
@@ -0,0 +1,51 @@
+import os
+import sys
+
+import pytest
+
+from tesstrain.runner import CommandRunner, tail
+
+
+def python(code):
+    return (sys.executable, '-c', code)
+
+
+def test_output_is_streamed_to_a_log_per_job(tmp_path):
+    runner = CommandRunner(tmp_path / 'logs')
+    stats = runner.run(*python('print("rendered")'))
+    assert stats.returncode == 0
+    assert stats.wall_time > 0
+    assert open(stats.log_file).read() == 'rendered\n'
+    second = runner.run(*python('import sys; print("oops", file=sys.stderr)'))
+    assert second.log_file != stats.log_file
+    assert open(second.log_file).read() == 'oops\n'
+    assert runner.stats == [stats, second]
+
+
+def test_usage_of_programs_is_recorded(tmp_path):
+    runner = CommandRunner()
+    stats = runner.run(*python('x = bytearray(64 << 20); sum(range(10**6))'))
+    assert stats.log_file is None
+    # Only reported where the platform has wait4().
+    if hasattr(os, 'wait4'):
+        assert stats.cpu_time > 0
+        assert stats.max_rss >= 64 << 20
+
+
+def test_failed_program_keeps_its_return_code(tmp_path):
+    runner = CommandRunner(tmp_path)
+    stats = runner.run(*python('print("bad"); raise SystemExit(3)'))
+    assert stats.returncode == 3
+    assert open(stats.log_file).read() == 'bad\n'
+
+
+def test_missing_program():
+    with pytest.raises(FileNotFoundError):
+        CommandRunner().run('tesstrain-no-such-program')
+
+
+def test_tail(tmp_path):
+    log_file = tmp_path / 'job.log'
+    log_file.write_text(''.join(f'line {i}\n' for i in range(10000)))
+    assert tail(log_file, 2) == 'line 9998\nline 9999'
+    assert tail(log_file, 2, block_size=16) == 'line 9998\nline 9999'
@@ -0,0 +1,106 @@
+import threading
+import time
+
+import pytest
+
+from tesstrain.runner import JobCancelled
+from tesstrain.scheduler import JobsFailed, TaskGraph
+
+
+class Recorder:
+    """
+    Jobs recording their order and how many of them ran at the same time.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.order = []
+        self.running = 0
+        self.max_running = 0
+
+    def job(self, name, seconds=0.0):
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(seconds)
+        with self.lock:
+            self.running -= 1
+            self.order.append(name)
+        return name
+
+
+def test_jobs_run_after_their_dependencies():
+    rec = Recorder()
+    graph = TaskGraph()
+    render = graph.add('render', rec.job, 'render', 0.05)
+    other = graph.add('other', rec.job, 'other')
+    graph.add('extract', rec.job, 'extract', deps=[render])
+    graph.add('merge', rec.job, 'merge', deps=['extract', other])
+    finished = []
+    graph.run(4, progress=finished.append)
+    assert rec.order.index('render') < rec.order.index('extract')
+    assert rec.order[-1] == 'merge'
+    assert sorted(finished) == ['extract', 'merge', 'other', 'render']
+
+
+def test_higher_priority_jobs_start_first():
+    rec = Recorder()
+    graph = TaskGraph()
+    for name, priority in (('a', 0), ('b', 2), ('c', 1), ('d', 2)):
+        graph.add(name, rec.job, name, priority=priority)
+    graph.run(1)
+    # Jobs of the same priority keep the order they were added in.
+    assert rec.order == ['b', 'd', 'c', 'a']
+
+
+def test_pool_limits():
+    render = Recorder()
+    extract = Recorder()
+    graph = TaskGraph()
+    for i in range(6):
+        graph.add(f'render{i}', render.job, i, 0.02, pool='render')
+        graph.add(f'extract{i}', extract.job, i, 0.02, pool='extract')
+    graph.run(4, pool_limits={'render': 1, 'extract': 2})
+    assert render.max_running == 1
+    assert extract.max_running == 2
+    assert len(render.order) == len(extract.order) == 6
+
+
+def test_duplicate_jobs_are_refused():
+    graph = TaskGraph()
+    graph.add('a', print)
+    with pytest.raises(ValueError):
+        graph.add('a', print)
+
+
+def test_failure_stops_the_remaining_jobs():
+    rec = Recorder()
+    cancelled = threading.Event()
+    calls = []
+
+    def fail():
+        raise RuntimeError('render failed')
+
+    def running_job():
+        # Stands in for a program terminated by on_failure.
+        if not cancelled.wait(5):
+            return 'finished'
+        raise JobCancelled()
+
+    def on_failure():
+        calls.append('on_failure')
+        cancelled.set()
+
+    graph = TaskGraph()
+    graph.add('running', running_job, priority=1)
+    graph.add('render', fail)
+    graph.add('extract', rec.job, 'extract', deps=['render'])
+    graph.add('later', rec.job, 'later', priority=-1)
+    with pytest.raises(JobsFailed) as excinfo:
+        graph.run(2, on_failure=on_failure)
+    assert calls == ['on_failure']
+    assert rec.order == []
+    assert [name for name, _ in excinfo.value.failures] == ['render']
+    # The running job was cancelled, the others never started.
+    assert excinfo.value.cancelled == 3
+    assert 'render failed' in str(excinfo.value)
@@ -0,0 +1,80 @@
+import os
+import tempfile
+
+import pytest
+
+from tesstrain import arguments
+from tesstrain.exceptions import ConfigurationError, InputError
+from tesstrain.runner import resolve_command
+from tesstrain.session import Session
+
+
+@pytest.fixture
+def tmp_dir(tmp_path, monkeypatch):
+    tmp_dir = tmp_path / 'tmp'
+    tmp_dir.mkdir()
+    monkeypatch.setattr(tempfile, 'tempdir', str(tmp_dir))
+    monkeypatch.setattr(arguments, '_training_dirs', set())
+    return tmp_dir
+
+
+@pytest.fixture
+def text2image(tmp_path, monkeypatch):
+    """
+    A fake text2image on PATH which only lists Arial and records its calls in
+    the returned file.
+    """
+    bin_dir = tmp_path / 'bin'
+    bin_dir.mkdir()
+    tool = bin_dir / 'text2image'
+    tool.write_text(
+        '#!/bin/sh\necho "$@" >> "$FAKE_CALLS"\necho "  0: Arial"\n'
+    )
+    tool.chmod(0o755)
+    monkeypatch.setenv('PATH', f'{bin_dir}{os.pathsep}{os.environ["PATH"]}')
+    # Programs are looked up once per process.
+    resolve_command.cache_clear()
+    calls = tmp_path / 'calls'
+    calls.touch()
+    monkeypatch.setenv('FAKE_CALLS', str(calls))
+    return calls
+
+
+def training(tmp_path, **kwargs):
+    fonts_dir = tmp_path / 'fonts'
+    fonts_dir.mkdir(exist_ok=True)
+    params = dict(
+        fonts=['Arial'],
+        langdata_directory=str(tmp_path),
+        tessdata_directory=str(tmp_path),
+        fonts_directory=str(fonts_dir),
+        maximum_pages=1,
+        language_code='eng',
+        output_directory=str(tmp_path / 'out'),
+        linedata_only=True,
+    )
+    params.update(kwargs)
+    return params
+
+
+def test_invalid_arguments_raise(tmp_path, tmp_dir, monkeypatch):
+    monkeypatch.delenv('TESSDATA_PREFIX', raising=False)
+    params = training(tmp_path)
+    del params['tessdata_directory']
+    with Session() as session:
+        with pytest.raises(ConfigurationError):
+            session.run(**params)
+        with pytest.raises(ConfigurationError):
+            session.run(**training(tmp_path, langdata_directory=None))
+
+
+def test_missing_fonts_raise(tmp_path, tmp_dir, text2image):
+    with Session() as session:
+        for _ in range(2):
+            with pytest.raises(InputError) as excinfo:
+                session.run(**training(tmp_path, fonts=['Arial', 'Courier']))
+            assert "'Courier'" in str(excinfo.value)
+        # The fonts are listed once per session.
+        assert len(text2image.read_text().splitlines()) == 1
+    # Failed runs leave no training directory behind.
+    assert not list(tmp_dir.iterdir())
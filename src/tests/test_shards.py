@@ -0,0 +1,75 @@
+import argparse
+import json
+
+import pytest
+
+from tesstrain.exceptions import InputError
+from tesstrain.generate import merge_unicharsets_steps
+from tesstrain.shards import (
+    assign_jobs,
+    finish_shard,
+    merge_shards,
+    parse_shard,
+    select_shard,
+    shard_info_file,
+)
+
+
+def test_parse_shard():
+    assert parse_shard('1/3') == (1, 3)
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_shard('3/3')
+
+
+def test_assign_jobs_is_deterministic_and_balanced():
+    jobs = [(font, '0') for font in ('A', 'B', 'C', 'D', 'E')]
+    costs = {'A': 5.0, 'B': 4.0, 'C': 3.0, 'D': 2.0}
+    shards = assign_jobs(jobs, 2, costs)
+    assert shards == assign_jobs(list(reversed(jobs)), 2, costs)
+    assert set.union(*shards) == set(jobs)
+    # E gets the mean cost 3.5 and goes after B, each job to the shard with
+    # the lower total: A+C = 8 and B+E+D = 9.5.
+    assert shards == [
+        {('A', '0'), ('C', '0')},
+        {('B', '0'), ('E', '0'), ('D', '0')},
+    ]
+
+
+@pytest.fixture
+def ctx(tmp_path):
+    return argparse.Namespace(
+        lang_code='eng',
+        fonts=['Arial', 'Arial Bold'],
+        exposures=[0],
+        synthesize_exposures=False,
+        shard_costs=None,
+        shard=(2, 3),
+        output_dir=str(tmp_path / 'out'),
+        training_dir=str(tmp_path),
+        report=None,
+    )
+
+
+def test_empty_shard_is_finished_without_unicharset(ctx):
+    select_shard(ctx)
+    assert ctx.shard_jobs == set()
+    finish_shard(ctx)
+    info = json.loads(shard_info_file(ctx.output_dir, 'eng').read_text())
+    assert (info['shard'], info['shards'], info['jobs']) == (2, 3, [])
+
+
+def test_merge_of_empty_shards_fails(ctx, tmp_path):
+    ctx.merge_shards = []
+    for index in range(2):
+        ctx.shard = (index, 2)
+        ctx.output_dir = str(tmp_path / f'shard{index}')
+        ctx.shard_jobs = set()
+        finish_shard(ctx)
+        ctx.merge_shards.append(ctx.output_dir)
+    with pytest.raises(InputError):
+        merge_shards(ctx)
+
+
+def test_merge_without_unicharsets_fails(tmp_path):
+    with pytest.raises(InputError):
+        list(merge_unicharsets_steps([], tmp_path / 'eng.unicharset'))
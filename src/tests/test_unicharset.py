@@ -0,0 +1,78 @@
+import argparse
+
+import pytest
+
+from tesstrain import generate
+from tesstrain.generate import box_unicharset_steps, merge_unicharsets_steps
+
+
+def run(steps):
+    """
+    Run a job, emulating its programs. Returns the commands and the result.
+    """
+    commands = []
+    try:
+        command = next(steps)
+        while True:
+            commands.append(command)
+            args = [str(arg) for arg in command.args]
+            if command.cmd == 'unicharset_extractor':
+                with open(args[1], 'w') as f:
+                    f.write(open(args[-1]).read().split()[0] + '\n')
+            elif command.cmd == 'merge_unicharsets':
+                with open(args[-1], 'w') as f:
+                    for name in args[:-1]:
+                        f.write(open(name).read())
+            command = steps.send(None)
+    except StopIteration as stop:
+        return commands, stop.value
+
+
+@pytest.fixture
+def ctx(tmp_path):
+    return argparse.Namespace(
+        training_dir=str(tmp_path),
+        norm_mode=2,
+        bounded_disk=False,
+        report=None,
+    )
+
+
+def test_box_unicharsets_are_extracted_once(tmp_path, ctx):
+    box_file = tmp_path / 'eng.Arial.exp0.box'
+    box_file.write_text('a 0 0 1 1 0\n')
+    commands, unicharset_file = run(box_unicharset_steps(ctx, box_file))
+    assert [command.cmd for command in commands] == ['unicharset_extractor']
+    assert unicharset_file.read_text() == 'a\n'
+
+    assert run(box_unicharset_steps(ctx, box_file)) == ([], unicharset_file)
+    # Touched, but unchanged.
+    box_file.write_text('a 0 0 1 1 0\n')
+    assert run(box_unicharset_steps(ctx, box_file)) == ([], unicharset_file)
+    box_file.write_text('b 0 0 1 1 0\n')
+    commands, _ = run(box_unicharset_steps(ctx, box_file))
+    assert len(commands) == 1
+    assert unicharset_file.read_text() == 'b\n'
+    ctx.norm_mode = 1
+    commands, _ = run(box_unicharset_steps(ctx, box_file))
+    assert len(commands) == 1
+
+
+@pytest.mark.parametrize(
+    'count, merges', [(1, 0), (2, 1), (5, 3), (9, 4), (10, 7)]
+)
+def test_unicharsets_are_merged_in_chunks(
+    tmp_path, monkeypatch, count, merges
+):
+    monkeypatch.setattr(generate, 'MERGE_CHUNK_SIZE', 3)
+    files = []
+    for i in range(count):
+        files.append(tmp_path / f'{i}.unicharset')
+        files[-1].write_text(f'{i}\n')
+    output_file = tmp_path / 'eng.unicharset'
+    commands, _ = run(merge_unicharsets_steps(files, output_file))
+    assert len(commands) == merges
+    assert all(len(command.args) <= 4 for command in commands)
+    assert output_file.read_text() == ''.join(f'{i}\n' for i in range(count))
+    # The partial merges were removed.
+    assert len(list(tmp_path.iterdir())) == count + 1
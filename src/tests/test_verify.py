@@ -0,0 +1,41 @@
+import pytest
+
+from tesstrain.verify import OutputError, require_outputs, verify_outputs
+
+
+def outputs(directory, count):
+    files = []
+    for i in range(count):
+        image = directory / f'eng.Arial.exp{i}.tif'
+        image.write_bytes(b'II*\0image')
+        box = directory / f'eng.Arial.exp{i}.box'
+        box.write_text('a 0 0 1 1 0\n\t 0 0 1 1 0\n')
+        files += [image, box]
+    return files
+
+
+@pytest.mark.parametrize('count', [1, 10])
+def test_valid_outputs(tmp_path, count):
+    # Few files are checked one by one, many by listing their directory.
+    files = outputs(tmp_path, count)
+    assert verify_outputs(files) == []
+    require_outputs(*files)
+
+
+@pytest.mark.parametrize('count', [1, 10])
+def test_all_problems_are_reported(tmp_path, count):
+    files = outputs(tmp_path, count)
+    files[0].write_bytes(b'GIF89a')
+    files[1].write_text('a 0 0 1 1 0\n')
+    (tmp_path / 'eng.lstmf').touch()
+    files += [tmp_path / 'eng.lstmf', tmp_path / 'missing' / 'eng.txt']
+    problems = verify_outputs(files)
+    assert problems == [
+        f'{files[0]} is not a TIFF or PNG image',
+        f'{files[1]} does not end with a tab line',
+        f'{tmp_path / "eng.lstmf"} is empty',
+        f"Expected file '{tmp_path / 'missing' / 'eng.txt'}' does not exist",
+    ]
+    with pytest.raises(OutputError) as excinfo:
+        require_outputs(*files)
+    assert excinfo.value.problems == problems